@@ -10,7 +10,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 # Add the backend directory to the sys.path so we can import from app
 sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.models import Base, Project, Metric, APIKey, User  # noqa
+from app.models import Base, Project, Metric, APIKey, User, URLPath, UserAgent, AlertRule, MetricRollup, MetricRollupState  # noqa
 from app.core.config import settings  # noqa
 
 # this is the Alembic Config object, which provides
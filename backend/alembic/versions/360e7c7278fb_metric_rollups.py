@@ -0,0 +1,51 @@
+"""metric rollups
+
+Revision ID: 360e7c7278fb
+Revises: 3a8d2c6e9f10
+Create Date: 2026-10-19 03:49:01.294528
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '360e7c7278fb'
+down_revision: Union[str, Sequence[str], None] = '3a8d2c6e9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('metric_rollup_state',
+    sa.Column('granularity', sa.Enum('minute', 'hour', 'day', name='time_granularity_enum'), nullable=False),
+    sa.Column('rolled_from', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('rolled_up_to', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('granularity')
+    )
+    op.create_table('metric_rollups',
+    sa.Column('granularity', postgresql.ENUM(name='time_granularity_enum', create_type=False), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('url_path_id', sa.Integer(), nullable=False),
+    sa.Column('method', postgresql.ENUM(name='http_method_enum', create_type=False), nullable=False),
+    sa.Column('response_status_code', sa.SmallInteger(), nullable=False),
+    sa.Column('request_count', sa.Integer(), nullable=False),
+    sa.Column('response_time_sum_us', sa.BigInteger(), nullable=False),
+    sa.Column('response_time_min_us', sa.Integer(), nullable=False),
+    sa.Column('response_time_max_us', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['url_path_id'], ['url_paths.id'], ),
+    sa.PrimaryKeyConstraint('granularity', 'project_id', 'bucket', 'url_path_id', 'method', 'response_status_code')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('metric_rollups')
+    op.drop_table('metric_rollup_state')
+    sa.Enum(name='time_granularity_enum').drop(op.get_bind())
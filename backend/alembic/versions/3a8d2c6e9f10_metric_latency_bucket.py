@@ -0,0 +1,38 @@
+"""metric latency bucket
+
+Revision ID: 3a8d2c6e9f10
+Revises: e7f3a9c1d4b8
+Create Date: 2026-10-19 17:02:44.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8d2c6e9f10'
+down_revision: Union[str, Sequence[str], None] = 'e7f3a9c1d4b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same boundaries as app.core.latency_buckets.BOUNDS_US at the time of writing
+BOUNDS_US = [round(100 * 2 ** (i / 4)) for i in range(84)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('metrics', sa.Column('latency_bucket', sa.SmallInteger(), nullable=True))
+    bounds = ", ".join(str(bound) for bound in BOUNDS_US)
+    op.execute(
+        "UPDATE metrics SET latency_bucket = ("
+        f"SELECT count(*) FROM unnest(ARRAY[{bounds}]) AS bound "
+        "WHERE bound <= response_time_us)"
+    )
+    op.alter_column('metrics', 'latency_bucket', nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('metrics', 'latency_bucket')
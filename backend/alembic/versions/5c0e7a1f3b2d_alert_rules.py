@@ -0,0 +1,52 @@
+"""alert rules
+
+Revision ID: 5c0e7a1f3b2d
+Revises: 99b5a3b107dc
+Create Date: 2026-10-19 14:05:47.912604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c0e7a1f3b2d'
+down_revision: Union[str, Sequence[str], None] = '99b5a3b107dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('alert_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('metric', sa.Enum('error_rate', 'avg_response_time_ms', 'request_count', name='alert_metric_enum'), nullable=False),
+    sa.Column('operator', sa.Enum('gt', 'lt', name='alert_operator_enum'), nullable=False),
+    sa.Column('threshold', sa.Float(), nullable=False),
+    sa.Column('window_seconds', sa.Integer(), nullable=False),
+    sa.Column('url_path_id', sa.Integer(), nullable=True),
+    sa.Column('method', postgresql.ENUM(name='http_method_enum', create_type=False), nullable=True),
+    sa.Column('webhook_url', sa.String(length=2048), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['url_path_id'], ['url_paths.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alert_rules_created_at'), 'alert_rules', ['created_at'], unique=False)
+    op.create_index(op.f('ix_alert_rules_project_id'), 'alert_rules', ['project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_alert_rules_project_id'), table_name='alert_rules')
+    op.drop_index(op.f('ix_alert_rules_created_at'), table_name='alert_rules')
+    op.drop_table('alert_rules')
+    sa.Enum(name='alert_operator_enum').drop(op.get_bind())
+    sa.Enum(name='alert_metric_enum').drop(op.get_bind())
@@ -0,0 +1,71 @@
+"""compact metrics profile
+
+Revision ID: 99b5a3b107dc
+Revises: d1de4be1d18b
+Create Date: 2026-10-19 11:40:02.187355
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '99b5a3b107dc'
+down_revision: Union[str, Sequence[str], None] = 'd1de4be1d18b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes that duplicate the leading column of `idx_project_timestamp` or are
+# never used by the analytics queries (which all filter on project + time).
+REDUNDANT_INDEXES = [
+    ('idx_project_method', ['project_id', 'method']),
+    ('idx_project_status_code', ['project_id', 'response_status_code']),
+    ('idx_project_url_method', ['project_id', 'url_path_id', 'method']),
+    ('idx_project_url_path', ['project_id', 'url_path_id']),
+    ('idx_status_timestamp', ['response_status_code', 'timestamp']),
+    ('ix_metrics_method', ['method']),
+    ('ix_metrics_project_id', ['project_id']),
+    ('ix_metrics_response_status_code', ['response_status_code']),
+    ('ix_metrics_timestamp', ['timestamp']),
+    ('ix_metrics_url_path_id', ['url_path_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, _ in REDUNDANT_INDEXES:
+        op.drop_index(name, table_name='metrics')
+
+    op.alter_column('metrics', 'response_status_code',
+               existing_type=sa.Integer(),
+               type_=sa.SmallInteger(),
+               existing_nullable=False)
+    op.alter_column('metrics', 'response_time_ms',
+               new_column_name='response_time_us',
+               existing_type=sa.Float(),
+               type_=sa.Integer(),
+               existing_nullable=False,
+               postgresql_using='round(response_time_ms * 1000)::integer')
+
+    op.create_index('idx_metrics_timestamp_brin', 'metrics', ['timestamp'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_metrics_timestamp_brin', table_name='metrics', postgresql_using='brin')
+
+    op.alter_column('metrics', 'response_time_us',
+               new_column_name='response_time_ms',
+               existing_type=sa.Integer(),
+               type_=sa.Float(),
+               existing_nullable=False,
+               postgresql_using='response_time_us / 1000.0')
+    op.alter_column('metrics', 'response_status_code',
+               existing_type=sa.SmallInteger(),
+               type_=sa.Integer(),
+               existing_nullable=False)
+
+    for name, columns in REDUNDANT_INDEXES:
+        op.create_index(name, 'metrics', columns, unique=False)
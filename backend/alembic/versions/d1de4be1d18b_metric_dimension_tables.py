@@ -0,0 +1,95 @@
+"""metric dimension tables
+
+Revision ID: d1de4be1d18b
+Revises: 96f2b2497eaa
+Create Date: 2026-10-19 09:12:31.402115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1de4be1d18b'
+down_revision: Union[str, Sequence[str], None] = '96f2b2497eaa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('url_paths',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.String(length=1024), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('value')
+    )
+    op.create_table('user_agents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.String(length=1024), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('value')
+    )
+    op.add_column('metrics', sa.Column('url_path_id', sa.Integer(), nullable=True))
+    op.add_column('metrics', sa.Column('user_agent_id', sa.Integer(), nullable=True))
+
+    # Backfill the dictionaries from the existing rows
+    op.execute(
+        "INSERT INTO url_paths (value) "
+        "SELECT DISTINCT left(url_path, 1024) FROM metrics"
+    )
+    op.execute(
+        "INSERT INTO user_agents (value) "
+        "SELECT DISTINCT left(user_agent, 1024) FROM metrics WHERE user_agent IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE metrics SET url_path_id = url_paths.id FROM url_paths "
+        "WHERE url_paths.value = left(metrics.url_path, 1024)"
+    )
+    op.execute(
+        "UPDATE metrics SET user_agent_id = user_agents.id FROM user_agents "
+        "WHERE user_agents.value = left(metrics.user_agent, 1024)"
+    )
+
+    op.alter_column('metrics', 'url_path_id', nullable=False)
+    op.create_foreign_key('metrics_url_path_id_fkey', 'metrics', 'url_paths', ['url_path_id'], ['id'])
+    op.create_foreign_key('metrics_user_agent_id_fkey', 'metrics', 'user_agents', ['user_agent_id'], ['id'])
+
+    op.drop_index('idx_project_url_path', table_name='metrics')
+    op.drop_index(op.f('ix_metrics_url_path'), table_name='metrics')
+    op.drop_column('metrics', 'url_path')
+    op.drop_column('metrics', 'user_agent')
+
+    op.create_index('idx_project_url_path', 'metrics', ['project_id', 'url_path_id'], unique=False)
+    op.create_index('idx_project_url_method', 'metrics', ['project_id', 'url_path_id', 'method'], unique=False)
+    op.create_index(op.f('ix_metrics_url_path_id'), 'metrics', ['url_path_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('metrics', sa.Column('url_path', sa.String(), nullable=True))
+    op.add_column('metrics', sa.Column('user_agent', sa.String(), nullable=True))
+    op.execute(
+        "UPDATE metrics SET url_path = url_paths.value FROM url_paths "
+        "WHERE url_paths.id = metrics.url_path_id"
+    )
+    op.execute(
+        "UPDATE metrics SET user_agent = user_agents.value FROM user_agents "
+        "WHERE user_agents.id = metrics.user_agent_id"
+    )
+    op.alter_column('metrics', 'url_path', nullable=False)
+
+    op.drop_index(op.f('ix_metrics_url_path_id'), table_name='metrics')
+    op.drop_index('idx_project_url_method', table_name='metrics')
+    op.drop_index('idx_project_url_path', table_name='metrics')
+    op.drop_constraint('metrics_user_agent_id_fkey', 'metrics', type_='foreignkey')
+    op.drop_constraint('metrics_url_path_id_fkey', 'metrics', type_='foreignkey')
+    op.drop_column('metrics', 'user_agent_id')
+    op.drop_column('metrics', 'url_path_id')
+    op.drop_table('user_agents')
+    op.drop_table('url_paths')
+
+    op.create_index(op.f('ix_metrics_url_path'), 'metrics', ['url_path'], unique=False)
+    op.create_index('idx_project_url_path', 'metrics', ['project_id', 'url_path'], unique=False)
@@ -0,0 +1,30 @@
+"""project track rate limits
+
+Revision ID: e3207ed478e6
+Revises: 360e7c7278fb
+Create Date: 2026-10-19 04:10:38.852864
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3207ed478e6'
+down_revision: Union[str, Sequence[str], None] = '360e7c7278fb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('track_rate_limit_per_second', sa.Double(), nullable=True))
+    op.add_column('projects', sa.Column('track_rate_limit_burst', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'track_rate_limit_burst')
+    op.drop_column('projects', 'track_rate_limit_per_second')
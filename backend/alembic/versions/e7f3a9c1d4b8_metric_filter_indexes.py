@@ -0,0 +1,30 @@
+"""metric filter indexes
+
+Revision ID: e7f3a9c1d4b8
+Revises: 5c0e7a1f3b2d
+Create Date: 2026-10-19 16:21:09.530187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f3a9c1d4b8'
+down_revision: Union[str, Sequence[str], None] = '5c0e7a1f3b2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_project_errors_timestamp', 'metrics', ['project_id', 'timestamp'], unique=False, postgresql_where=sa.text('response_status_code >= 400'))
+    op.create_index('ix_url_paths_value_pattern', 'url_paths', ['value'], unique=False, postgresql_ops={'value': 'varchar_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_url_paths_value_pattern', table_name='url_paths', postgresql_ops={'value': 'varchar_pattern_ops'})
+    op.drop_index('idx_project_errors_timestamp', table_name='metrics', postgresql_where=sa.text('response_status_code >= 400'))
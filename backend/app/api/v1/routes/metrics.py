@@ -0,0 +1,40 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from app import schemas
+from app.dependencies import CurrentUserDep, SessionDep, use_db_pool
+from app.services import metric_service, project_service
+
+router = APIRouter(dependencies=[Depends(use_db_pool("analytics", read_only=True))])
+
+
+@router.get(
+    "/summary",
+    response_model=schemas.MetricAccountSummaryResponse,
+    summary="Get account-wide metrics summary",
+    description="""
+    Calculates performance statistics across all of the user's projects (or the ones
+    listed in `projects`, comma-separated or repeated) in a single query, with a
+    per-project breakdown.
+    """,
+)
+async def read_account_metrics_summary(
+    user: CurrentUserDep,
+    session: SessionDep,
+    params: schemas.MetricQuery,
+    projects: Annotated[
+        list[str] | None, Query(description="Project keys to include")
+    ] = None,
+):
+    project_keys = (
+        [key for value in projects for key in value.split(",") if key]
+        if projects
+        else None
+    )
+    user_projects = await project_service.get_user_projects_by_keys(
+        user.id, project_keys, session
+    )
+    return await metric_service.get_account_metrics_summary(
+        session, user_projects, params
+    )
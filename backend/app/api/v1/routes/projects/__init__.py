@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.routes.projects import api_keys, metrics, projects
+from app.api.v1.routes.projects import alert_rules, api_keys, metrics, projects, usage
 
 router = APIRouter()
 router.include_router(
@@ -8,3 +8,7 @@ router.include_router(
 )
 router.include_router(projects.router, tags=["projects"])
 router.include_router(metrics.router, prefix="/{project_key}/metrics", tags=["metrics"])
+router.include_router(
+    alert_rules.router, prefix="/{project_key}/alert-rules", tags=["alert-rules"]
+)
+router.include_router(usage.router, prefix="/{project_key}/usage", tags=["usage"])
@@ -0,0 +1,78 @@
+from typing import Sequence
+
+from fastapi import APIRouter, status
+
+from app import schemas
+from app.dependencies import ProjectDep, SessionDep
+from app.services import alert_service
+
+router = APIRouter()
+
+
+@router.post(
+    "/",
+    response_model=schemas.AlertRuleResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create an alert rule",
+    description="""
+    Creates a threshold rule evaluated over a sliding window of the project's
+    metrics, optionally restricted to one endpoint path and/or method.
+
+    When the rule starts or stops breaching its threshold, a JSON event is POSTed
+    to `webhook_url`.
+    """,
+)
+async def create_alert_rule(
+    rule_in: schemas.AlertRuleCreate, project: ProjectDep, session: SessionDep
+):
+    return await alert_service.create_alert_rule(rule_in, project, session)
+
+
+@router.get(
+    "/",
+    response_model=Sequence[schemas.AlertRuleResponse],
+    summary="List alert rules",
+    description="""
+    Returns all alert rules of the project.
+    """,
+)
+async def list_alert_rules(project: ProjectDep, session: SessionDep):
+    return await alert_service.list_alert_rules(project.id, session)
+
+
+@router.get(
+    "/{rule_id}",
+    response_model=schemas.AlertRuleResponse,
+    summary="Get an alert rule",
+)
+async def get_alert_rule(rule_id: int, project: ProjectDep, session: SessionDep):
+    return await alert_service.get_alert_rule(rule_id, project.id, session)
+
+
+@router.patch(
+    "/{rule_id}",
+    response_model=schemas.AlertRuleResponse,
+    summary="Update an alert rule",
+    description="""
+    Updates an alert rule. Changing its threshold or window restarts its
+    evaluation window.
+    """,
+)
+async def update_alert_rule(
+    rule_id: int,
+    project: ProjectDep,
+    update_data: schemas.AlertRuleUpdate,
+    session: SessionDep,
+):
+    return await alert_service.update_alert_rule(
+        rule_id, project.id, update_data, session
+    )
+
+
+@router.delete(
+    "/{rule_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete an alert rule",
+)
+async def delete_alert_rule(rule_id: int, project: ProjectDep, session: SessionDep):
+    await alert_service.delete_alert_rule(rule_id, project.id, session)
@@ -1,10 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response, status
+from fastapi.responses import StreamingResponse
 
 from app import schemas
-from app.dependencies import ProjectDep, SessionDep
+from app.core import live_stream
+from app.core.config import settings
+from app.core.exceptions import APIError
+from app.dependencies import NotModifiedDep, ProjectDep, SessionDep, use_db_pool
 from app.services import metric_service
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(use_db_pool("analytics", read_only=True))])
 
 
 @router.get(
@@ -16,40 +20,118 @@ router = APIRouter()
     """,
 )
 async def read_metrics(
-    project: ProjectDep, session: SessionDep, params: schemas.MetricQuery
+    project: ProjectDep,
+    session: SessionDep,
+    params: schemas.MetricQuery,
+    not_modified: NotModifiedDep,
+    response: Response,
 ):
-    return await metric_service.get_metrics(session, project.id, params)
+    if not_modified is not None:
+        return not_modified
+    rows = await metric_service.get_metrics(session, project.id, params)
+    # Up to 10k rows: encode them directly instead of validating models first
+    return Response(
+        schemas.MetricRowList.dump_json(rows),
+        media_type="application/json",
+        headers=response.headers,
+    )
 
 
 @router.get(
     "/summary",
     response_model=schemas.MetricSummaryResponse,
+    response_model_exclude_none=True,
     summary="Get metrics summary",
     description="""
     Calculates overall performance statistics for the project over the specified time range.
+
+    With `compare_to`, the same statistics are computed for an earlier window of the
+    same length (in the same query) and returned with the differences.
+
+    With `accuracy=approximate`, only `sample_percent` of the rows are read: counts
+    are scaled up and returned with their 95% margins of error.
     """,
 )
 async def read_metrics_summary(
-    project: ProjectDep, session: SessionDep, params: schemas.MetricQuery
+    project: ProjectDep,
+    session: SessionDep,
+    params: schemas.MetricQuery,
+    not_modified: NotModifiedDep,
+    sampling: schemas.SamplingQuery,
+    compare_to: schemas.CompareTo | None = None,
 ):
-    return await metric_service.get_metrics_summary(session, project.id, params)
+    if not_modified is not None:
+        return not_modified
+    return await metric_service.get_metrics_summary(
+        session, project.id, params, compare_to, sampling
+    )
 
 
 @router.get(
     "/time-series",
     response_model=list[schemas.MetricTimeSeriesPointResponse],
+    response_model_exclude_none=True,
     summary="Get metrics time series",
     description="""
     Retrieves aggregated metrics grouped by a specified time granularity.
+
+    With `accuracy=approximate`, each point is estimated from a sample of the rows.
     """,
 )
 async def read_metrics_time_series(
     project: ProjectDep,
     session: SessionDep,
     params: schemas.MetricQuery,
+    not_modified: NotModifiedDep,
+    sampling: schemas.SamplingQuery,
     granularity: schemas.TimeGranularity = schemas.TimeGranularity.MINUTE,
 ):
+    if not_modified is not None:
+        return not_modified
     return await metric_service.get_metrics_time_series(
+        session, project.id, params, granularity, sampling
+    )
+
+
+@router.get(
+    "/histogram",
+    response_model=list[schemas.MetricLatencyBucketResponse],
+    summary="Get latency histogram",
+    description="""
+    Counts requests per fixed logarithmic latency bucket (each ~19% wider than the
+    previous one). Only non-empty buckets are returned.
+    """,
+)
+async def read_metrics_histogram(
+    project: ProjectDep,
+    session: SessionDep,
+    params: schemas.MetricQuery,
+    not_modified: NotModifiedDep,
+):
+    if not_modified is not None:
+        return not_modified
+    return await metric_service.get_metrics_histogram(session, project.id, params)
+
+
+@router.get(
+    "/heatmap",
+    response_model=list[schemas.MetricHeatmapCellResponse],
+    summary="Get latency heatmap",
+    description="""
+    Counts requests per time bucket and latency bucket (the same buckets as
+    `/histogram`). Only non-empty cells are returned, ordered by time.
+    """,
+)
+async def read_metrics_heatmap(
+    project: ProjectDep,
+    session: SessionDep,
+    params: schemas.MetricQuery,
+    not_modified: NotModifiedDep,
+    granularity: schemas.TimeGranularity = schemas.TimeGranularity.HOUR,
+):
+    if not_modified is not None:
+        return not_modified
+    return await metric_service.get_metrics_heatmap(
         session, project.id, params, granularity
     )
 
@@ -57,12 +139,61 @@ async def read_metrics_time_series(
 @router.get(
     "/endpoints",
     response_model=list[schemas.MetricEndpointStatsResponse],
+    response_model_exclude_none=True,
     summary="Get endpoint statistics",
     description="""
     Retrieves performance statistics grouped by endpoint (URL path and method).
+
+    With `compare_to`, each endpoint also gets its statistics over an earlier window
+    of the same length and the differences.
+
+    With `accuracy=approximate`, statistics are estimated from a sample of the rows;
+    endpoints absent from the sample are not listed.
     """,
 )
 async def read_metrics_endpoints_stats(
-    project: ProjectDep, session: SessionDep, params: schemas.MetricQuery
+    project: ProjectDep,
+    session: SessionDep,
+    params: schemas.MetricQuery,
+    not_modified: NotModifiedDep,
+    sampling: schemas.SamplingQuery,
+    compare_to: schemas.CompareTo | None = None,
 ):
-    return await metric_service.get_metrics_endpoints_stats(session, project.id, params)
+    if not_modified is not None:
+        return not_modified
+    return await metric_service.get_metrics_endpoints_stats(
+        session, project.id, params, compare_to, sampling
+    )
+
+
+@router.get(
+    "/live",
+    response_class=StreamingResponse,
+    summary="Stream live metrics",
+    description="""
+    Server-Sent Events stream pushing, once per second, the request count, error
+    count, average and p95 response time of the metrics ingested in that second.
+
+    Only available with `LIVE_STREAM_ENABLED` (single worker or sticky routing).
+    """,
+)
+async def stream_live_metrics(project: ProjectDep, session: SessionDep):
+    if not settings.LIVE_STREAM_ENABLED:
+        raise APIError(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="Live stream is not enabled",
+        )
+    project_id = project.id
+    # The stream never touches the database, don't hold a connection open
+    await session.close()
+
+    async def event_stream():
+        async with live_stream.hub.subscribe(project_id) as frames:
+            while True:
+                yield await frames.get()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+
+from app import schemas
+from app.dependencies import ProjectDep, SessionDep
+from app.services import usage_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    response_model=schemas.ProjectUsageResponse,
+    summary="Get metric usage",
+    description="""
+    Returns the number of metrics ingested by the project this calendar month
+    (UTC), with its soft and hard quotas.
+
+    Counts from other workers reach the database every few seconds, so the
+    latest requests may not be included yet.
+    """,
+)
+async def get_usage(project: ProjectDep, session: SessionDep):
+    return await usage_service.get_usage(session, project)
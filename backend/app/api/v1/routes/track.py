@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends
 
 from app import schemas
-from app.core.rate_limiter import limiter
-from app.dependencies import ProjectIdDep, SessionDep
+from app.core import quotas
+from app.dependencies import (
+    ProjectIdDep,
+    SessionDep,
+    check_track_quota,
+    check_track_rate_limit,
+    use_db_pool,
+)
 from app.services import metric_service
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(use_db_pool("ingest"))])
 
 
 @router.post(
@@ -18,12 +24,13 @@ router = APIRouter()
     This endpoint is used by client libraries (SDKs) or direct API calls to log details
     about an incoming request in the application being monitored.
     
-    The API key must be sent in the `X-API-Key` header.
+    The API key must be sent in the `X-API-Key` header. Each project has a
+    token-bucket rate limit and may have a monthly quota; over either, `429` is
+    returned with `Retry-After`.
     """,
+    dependencies=[Depends(check_track_rate_limit), Depends(check_track_quota)],
 )
-@limiter.limit("100/minute")
 async def track_metric(
-    request: Request,
     metric: schemas.MetricCreate,
     session: SessionDep,
     project_id: ProjectIdDep,
@@ -31,4 +38,6 @@ async def track_metric(
     """
     Track an API metric.
     """
-    return await metric_service.add_metric(session, project_id, metric)
+    db_metric = await metric_service.add_metric(session, project_id, metric)
+    quotas.usage.count(project_id, quotas.current_period())
+    return db_metric
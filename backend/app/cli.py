@@ -0,0 +1,76 @@
+"""
+Operator commands, run against the database configured in `.env`.
+
+Per-project overrides are not part of the owner's `PATCH /projects/{key}`, so
+tenants cannot raise their own limits; operators set them here. Pass `default`
+to reset an override to the setting it overrides.
+
+    uv run python -m app.cli project-limits production-api-a1b2 \\
+        --track-rate-limit-per-second 50 --track-rate-limit-burst 100
+    uv run python -m app.cli project-limits production-api-a1b2 \\
+        --metric-quota-soft 800000 --metric-quota-hard default
+"""
+
+import argparse
+import asyncio
+import sys
+
+from pydantic import ValidationError
+
+from app import schemas
+from app.core import db
+from app.core.exceptions import APIError
+from app.services import project_service
+
+LIMITS = {
+    "--track-rate-limit-per-second": float,
+    "--track-rate-limit-burst": int,
+    "--metric-quota-soft": int,
+    "--metric-quota-hard": int,
+}
+
+
+def override(parse):
+    def parse_override(value: str):
+        return None if value == "default" else parse(value)
+
+    return parse_override
+
+
+async def project_limits(project_key: str, limits: schemas.ProjectLimits) -> None:
+    try:
+        async with db.AsyncSessionLocal() as session:
+            project = await project_service.set_project_limits(
+                project_key, limits, session
+            )
+    finally:
+        await db.dispose_engines()
+    for key in schemas.ProjectLimits.model_fields:
+        print(f"{key}: {getattr(project, key)}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    limits = commands.add_parser(
+        "project-limits", help="Set a project's per-project overrides"
+    )
+    limits.add_argument("project_key")
+    for flag, parse in LIMITS.items():
+        limits.add_argument(flag, type=override(parse), default=argparse.SUPPRESS)
+    args = vars(parser.parse_args())
+
+    command, project_key = args.pop("command"), args.pop("project_key")
+    try:
+        if command == "project-limits":
+            asyncio.run(project_limits(project_key, schemas.ProjectLimits(**args)))
+    except ValidationError as e:
+        parser.error(str(e))
+    except APIError as e:
+        print(e.message, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
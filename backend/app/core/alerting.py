@@ -0,0 +1,483 @@
+"""
+Incremental alert rule evaluation.
+
+Every active rule keeps a ring of per-second buckets (requests, errors and
+latency sum) covering its window, plus running totals. Ingestion adds to the
+current bucket of the matching rules and each tick only expires the buckets
+that left the window, so evaluating a rule costs O(1) no matter how much
+traffic it covers. State changes (firing / resolved) are handed to an async
+notifier that delivers them from a bounded pool of workers.
+
+With several workers (`REDIS_URL` set), each worker only sees the metrics it
+ingested itself, so the counts go through Redis: every tick each worker adds
+its per-second, per-rule counts to a Redis hash, and the single worker
+holding the leader lease merges the closed seconds of all of them into its
+rule windows, evaluates them and sends the notifications. The firing state
+is kept in Redis too, so a new leader doesn't announce a firing alert again.
+"""
+
+import asyncio
+import logging
+import socket
+import time
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from http import HTTPMethod
+
+import httpx
+from redis.asyncio import Redis
+
+from app import models, schemas
+from app.core.config import settings
+from app.core.types import is_public_address
+
+logger = logging.getLogger(__name__)
+
+US_PER_MS = 1000.0
+
+# Counts of a second are merged once every worker has pushed it (they push at
+# their own tick, just after the second closes)
+MERGE_LAG_SECONDS = 2
+# Longer than the largest rule window, so a new leader can refill its windows
+COUNTS_TTL_SECONDS = 2 * 3600
+COUNTS_KEY = "alerts:counts:{second}"
+FIRING_KEY = "alerts:firing"
+LEADER_KEY = "alerts:leader"
+
+# Take the lease when it's free, renew it when we hold it
+LEASE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+class RuleWindow:
+    """Sliding-window state of a single alert rule."""
+
+    def __init__(self, rule: models.AlertRule, now_second: int):
+        self.rule_id = rule.id
+        self.project_id = rule.project_id
+        self.name = rule.name
+        self.metric = rule.metric
+        self.operator = rule.operator
+        self.threshold = rule.threshold
+        self.window_seconds = rule.window_seconds
+        self.url_path_id = rule.url_path_id
+        self.method = rule.method
+        self.webhook_url = rule.webhook_url
+
+        self.started_second = now_second
+        self.firing = False
+        self.clear(now_second)
+
+    def clear(self, now_second: int) -> None:
+        """Drop every bucket, e.g. before refilling the window from Redis."""
+        size = self.window_seconds
+        self.bucket_seconds = [-1] * size
+        self.requests = [0] * size
+        self.errors = [0] * size
+        self.latency_sums_us = [0] * size
+
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_latency_us = 0
+
+        self.expired_through = now_second - size
+
+    @property
+    def definition(self) -> tuple:
+        return (
+            self.metric,
+            self.operator,
+            self.threshold,
+            self.window_seconds,
+            self.url_path_id,
+            self.method,
+            self.webhook_url,
+            self.name,
+        )
+
+    def matches(self, url_path_id: int, method: HTTPMethod) -> bool:
+        return (self.url_path_id is None or self.url_path_id == url_path_id) and (
+            self.method is None or self.method == method
+        )
+
+    def add(self, second: int, response_time_us: int, is_error: bool) -> None:
+        self.add_counts(second, 1, is_error, response_time_us)
+
+    def add_counts(
+        self, second: int, requests: int, errors: int, latency_us: int
+    ) -> None:
+        if second <= self.expired_through:
+            return
+        i = second % self.window_seconds
+        if self.bucket_seconds[i] != second:
+            self._drop(i)
+            self.bucket_seconds[i] = second
+        self.requests[i] += requests
+        self.errors[i] += errors
+        self.latency_sums_us[i] += latency_us
+        self.total_requests += requests
+        self.total_errors += errors
+        self.total_latency_us += latency_us
+
+    def advance(self, now_second: int) -> None:
+        """Expire the buckets that fell out of the window ending at `now_second`."""
+        oldest_kept = now_second - self.window_seconds + 1
+        # Catching up after a long pause never needs more than one full lap
+        start = max(self.expired_through + 1, oldest_kept - self.window_seconds)
+        for second in range(start, oldest_kept):
+            i = second % self.window_seconds
+            if self.bucket_seconds[i] == second:
+                self._drop(i)
+        self.expired_through = max(self.expired_through, oldest_kept - 1)
+
+    def value(self) -> float | None:
+        if self.metric == schemas.AlertMetric.REQUEST_COUNT:
+            return float(self.total_requests)
+        if self.total_requests == 0:
+            return None
+        if self.metric == schemas.AlertMetric.ERROR_RATE:
+            return self.total_errors / self.total_requests * 100
+        return self.total_latency_us / self.total_requests / US_PER_MS
+
+    def is_warm(self, now_second: int) -> bool:
+        """A rule cannot fire before it has observed one full window."""
+        return now_second - self.started_second >= self.window_seconds
+
+    def breached(self, value: float | None) -> bool:
+        if value is None:
+            return False
+        if self.operator == schemas.AlertOperator.GT:
+            return value > self.threshold
+        return value < self.threshold
+
+    def _drop(self, i: int) -> None:
+        self.total_requests -= self.requests[i]
+        self.total_errors -= self.errors[i]
+        self.total_latency_us -= self.latency_sums_us[i]
+        self.requests[i] = self.errors[i] = self.latency_sums_us[i] = 0
+        self.bucket_seconds[i] = -1
+
+
+class AlertNotifier:
+    """Delivers alert events from a bounded queue with a fixed pool of workers."""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue: asyncio.Queue[tuple[schemas.AlertEvent, str | None]] = (
+            asyncio.Queue(maxsize=queue_size)
+        )
+        self._tasks: list[asyncio.Task] = []
+        self._client: httpx.AsyncClient | None = None
+
+    def notify(self, event: schemas.AlertEvent, webhook_url: str | None) -> None:
+        try:
+            self.queue.put_nowait((event, webhook_url))
+        except asyncio.QueueFull:
+            logger.warning(
+                "Alert notification queue full, dropping event",
+                extra={"rule_id": event.rule_id, "status": event.status},
+            )
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(timeout=settings.ALERT_WEBHOOK_TIMEOUT_SECONDS)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _worker(self) -> None:
+        while True:
+            event, webhook_url = await self.queue.get()
+            try:
+                await self.deliver(event, webhook_url)
+            except Exception:
+                logger.exception(
+                    "Alert delivery failed", extra={"rule_id": event.rule_id}
+                )
+            finally:
+                self.queue.task_done()
+
+    async def deliver(self, event: schemas.AlertEvent, webhook_url: str | None):
+        logger.warning(
+            f"Alert '{event.name}' {event.status}",
+            extra={"rule_id": event.rule_id, "value": event.value},
+        )
+        if webhook_url and self._client is not None:
+            url = httpx.URL(webhook_url)
+            # Connect to the address that was checked, so the host can't
+            # resolve to a public address here and a private one on connect
+            address = await resolve_public_address(
+                url.host, url.port or (443 if url.scheme == "https" else 80)
+            )
+            response = await self._client.post(
+                url.copy_with(host=address),
+                content=event.model_dump_json(),
+                headers={
+                    "Content-Type": "application/json",
+                    "Host": url.netloc.decode("ascii"),
+                },
+                extensions={"sni_hostname": url.host},
+            )
+            response.raise_for_status()
+
+
+async def resolve_public_address(host: str, port: int) -> str:
+    """Resolve a webhook host, refusing any that maps to a non-public address."""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    addresses = [info[4][0] for info in infos]
+    if not addresses or not all(is_public_address(a) for a in addresses):
+        raise ValueError(f"Webhook host '{host}' resolves to a non-public address")
+    return addresses[0]
+
+
+class SharedAlertCounts:
+    """Alert counts of every worker and the evaluation lease, in Redis."""
+
+    def __init__(self, url: str):
+        self.client = Redis.from_url(url)
+        self.worker_id = uuid.uuid4().hex
+        self._lease = self.client.register_script(LEASE_SCRIPT)
+
+    async def lead(self) -> bool:
+        """Take or renew the lease; only its holder evaluates the rules."""
+        return bool(
+            await self._lease(
+                keys=[LEADER_KEY],
+                args=[self.worker_id, settings.ALERT_LEADER_LEASE_SECONDS * 1000],
+            )
+        )
+
+    async def push(self, counts: dict[int, dict[int, list[int]]]) -> None:
+        """Add `second -> rule id -> [requests, errors, latency_us]` counts."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for second, rules in counts.items():
+                key = COUNTS_KEY.format(second=second)
+                for rule_id, (requests, errors, latency_us) in rules.items():
+                    pipe.hincrby(key, f"{rule_id}:requests", requests)
+                    pipe.hincrby(key, f"{rule_id}:errors", errors)
+                    pipe.hincrby(key, f"{rule_id}:latency_us", latency_us)
+                pipe.expire(key, COUNTS_TTL_SECONDS)
+            await pipe.execute()
+
+    async def pull(self, seconds: range) -> list[dict[int, list[int]]]:
+        """The counts of every worker for each second, in order."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for second in seconds:
+                pipe.hgetall(COUNTS_KEY.format(second=second))
+            hashes = await pipe.execute()
+
+        pulled = []
+        for fields in hashes:
+            counts: dict[int, list[int]] = {}
+            for field, value in fields.items():
+                rule_id, kind = field.decode().split(":")
+                index = ("requests", "errors", "latency_us").index(kind)
+                counts.setdefault(int(rule_id), [0, 0, 0])[index] = int(value)
+            pulled.append(counts)
+        return pulled
+
+    async def firing(self) -> set[int]:
+        return {int(rule_id) for rule_id in await self.client.smembers(FIRING_KEY)}
+
+    async def set_firing(self, events: list[schemas.AlertEvent]) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for event in events:
+                if event.status == schemas.AlertStatus.FIRING:
+                    pipe.sadd(FIRING_KEY, event.rule_id)
+                else:
+                    pipe.srem(FIRING_KEY, event.rule_id)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class AlertEngine:
+    def __init__(
+        self, notifier: AlertNotifier, shared: SharedAlertCounts | None = None
+    ):
+        self.notifier = notifier
+        self.shared = shared
+        self.rules: dict[int, RuleWindow] = {}
+        self.by_project: dict[int, list[RuleWindow]] = {}
+        # Without a shared store this worker sees all the traffic
+        self.leader = shared is None
+        # second -> rule id -> [requests, errors, latency_us] not pushed yet
+        self.pending: dict[int, dict[int, list[int]]] = {}
+        self.merged_through = 0
+
+    def load(self, rules: Iterable[models.AlertRule]) -> None:
+        """Sync with the stored rules, keeping the state of unchanged ones."""
+        rules = list(rules)
+        seen = {rule.id for rule in rules}
+        for rule_id in list(self.rules):
+            if rule_id not in seen:
+                self.remove(rule_id)
+        for rule in rules:
+            self.upsert(rule)
+
+    def upsert(self, rule: models.AlertRule) -> None:
+        if not rule.is_active:
+            self.remove(rule.id)
+            return
+
+        current = self.rules.get(rule.id)
+        window = RuleWindow(rule, int(time.time()))
+        if current is not None:
+            if current.definition == window.definition:
+                return
+            window.firing = current.firing
+            self.remove(rule.id)
+
+        self.rules[rule.id] = window
+        self.by_project.setdefault(rule.project_id, []).append(window)
+
+    def remove(self, rule_id: int) -> None:
+        window = self.rules.pop(rule_id, None)
+        if window is None:
+            return
+        project_rules = self.by_project[window.project_id]
+        project_rules.remove(window)
+        if not project_rules:
+            del self.by_project[window.project_id]
+
+    def record(
+        self,
+        project_id: int,
+        url_path_id: int,
+        method: HTTPMethod,
+        response_time_us: int,
+        status_code: int,
+    ) -> None:
+        windows = self.by_project.get(project_id)
+        if not windows:
+            return
+        second = int(time.time())
+        is_error = status_code >= 400
+        for window in windows:
+            if not window.matches(url_path_id, method):
+                continue
+            if self.shared is None:
+                window.add(second, response_time_us, is_error)
+            else:
+                rules = self.pending.setdefault(second, {})
+                counts = rules.setdefault(window.rule_id, [0, 0, 0])
+                counts[0] += 1
+                counts[1] += is_error
+                counts[2] += response_time_us
+
+    async def tick(self, now: float | None = None) -> list[schemas.AlertEvent]:
+        """Share this worker's counts and, on the leader, evaluate the rules."""
+        now = time.time() if now is None else now
+        if self.shared is not None:
+            await self.sync(int(now))
+        if not self.leader:
+            return []
+        events = self.evaluate(now)
+        if self.shared is not None and events:
+            await self.shared.set_firing(events)
+        return events
+
+    async def sync(self, now_second: int) -> None:
+        """
+        Push the pending counts and renew the lease. The leader then merges
+        the seconds every worker has pushed since the last tick; a worker that
+        just took the lease refills its windows from Redis and picks up the
+        firing state of the previous leader.
+        """
+        pending, self.pending = self.pending, {}
+        if pending:
+            await self.shared.push(pending)
+
+        was_leader, self.leader = self.leader, False
+        self.leader = await self.shared.lead()
+        if not self.leader:
+            return
+
+        through = now_second - MERGE_LAG_SECONDS
+        if not was_leader:
+            firing = await self.shared.firing()
+            for window in self.rules.values():
+                window.clear(now_second)
+                window.firing = window.rule_id in firing
+            longest = max((w.window_seconds for w in self.rules.values()), default=0)
+            self.merged_through = through - longest
+
+        seconds = range(self.merged_through + 1, through + 1)
+        for second, counts in zip(seconds, await self.shared.pull(seconds)):
+            for rule_id, (requests, errors, latency_us) in counts.items():
+                window = self.rules.get(rule_id)
+                if window is not None:
+                    window.add_counts(second, requests, errors, latency_us)
+        self.merged_through = through
+
+    def evaluate(self, now: float | None = None) -> list[schemas.AlertEvent]:
+        """Advance every rule to `now` and notify the ones that changed state."""
+        now = time.time() if now is None else now
+        now_second = int(now)
+        timestamp = datetime.fromtimestamp(now_second, tz=timezone.utc)
+
+        events = []
+        for window in self.rules.values():
+            window.advance(now_second)
+            if not window.is_warm(now_second):
+                continue
+            value = window.value()
+            breached = window.breached(value)
+            if breached == window.firing:
+                continue
+
+            window.firing = breached
+            event = schemas.AlertEvent(
+                rule_id=window.rule_id,
+                project_id=window.project_id,
+                name=window.name,
+                status=(
+                    schemas.AlertStatus.FIRING
+                    if breached
+                    else schemas.AlertStatus.RESOLVED
+                ),
+                metric=window.metric,
+                operator=window.operator,
+                threshold=window.threshold,
+                value=value,
+                timestamp=timestamp,
+            )
+            self.notifier.notify(event, window.webhook_url)
+            events.append(event)
+        return events
+
+    def clear(self) -> None:
+        self.rules.clear()
+        self.by_project.clear()
+
+
+def create_shared_counts(url: str) -> SharedAlertCounts | None:
+    if url.startswith("memory://"):
+        return None
+    return SharedAlertCounts(url)
+
+
+engine = AlertEngine(
+    AlertNotifier(
+        workers=settings.ALERT_NOTIFIER_WORKERS,
+        queue_size=settings.ALERT_NOTIFIER_QUEUE_SIZE,
+    ),
+    create_shared_counts(settings.REDIS_URL),
+)
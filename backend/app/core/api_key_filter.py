@@ -0,0 +1,144 @@
+"""
+Keeps floods of unknown or recently rejected API keys off the database.
+
+Each worker keeps a Bloom filter of every API key prefix, refreshed in the
+background (new keys every `API_KEY_FILTER_REFRESH_SECONDS`, a full rebuild
+every `API_KEY_FILTER_REBUILD_SECONDS`). A prefix missing from it may still be
+a key just issued by another worker, so it is looked up too, but at most
+`API_KEY_FILTER_MISS_CONCURRENCY` such lookups run at once per worker: past
+that, unknown prefixes are rejected in memory and known ones keep their
+connections. Keys the database rejected (unknown, wrong secret, expired,
+revoked) are remembered for `API_KEY_NEGATIVE_CACHE_SECONDS`.
+
+The filter can only answer "definitely not issued": until it has been built,
+or when its refresh falls behind, every key counts as known.
+"""
+
+import hashlib
+import math
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class APIKeyFilter:
+    def __init__(self, negative_size: int, negative_ttl: float):
+        self.negative_ttl = negative_ttl
+        # key hash -> monotonic expiry
+        self._rejected = LRUCache(negative_size)
+        self._prefixes: BloomFilter | None = None
+        self._refreshed_at = 0.0
+        # Newest `created_at` loaded, where the next incremental refresh starts
+        self.watermark: datetime | None = None
+        # Lookups in flight for prefixes missing from the filter
+        self.misses = 0
+
+    def may_exist(self, key_prefix: str) -> bool:
+        """False only if no key with this prefix existed at the last refresh."""
+        if self._prefixes is None or (
+            time.monotonic() - self._refreshed_at
+            > 3 * settings.API_KEY_FILTER_REFRESH_SECONDS
+        ):
+            return True
+        return key_prefix in self._prefixes
+
+    @contextmanager
+    def lookup(self, key_prefix: str) -> Iterator[bool]:
+        """
+        Whether a key with this prefix may be looked up now: always when the
+        filter has its prefix, otherwise while a miss slot is free. A missing
+        prefix whose lookup completes (the key was accepted, e.g. issued by
+        another worker since the last refresh) is added to the filter.
+        """
+        if self.may_exist(key_prefix):
+            yield True
+        elif self.misses >= settings.API_KEY_FILTER_MISS_CONCURRENCY:
+            yield False
+        else:
+            self.misses += 1
+            try:
+                yield True
+            finally:
+                self.misses -= 1
+            self.add(key_prefix)
+
+    def rebuild(self, key_prefixes: list[str], watermark: datetime | None) -> None:
+        prefixes = BloomFilter(
+            max(2 * len(key_prefixes), settings.API_KEY_FILTER_MIN_CAPACITY),
+            settings.API_KEY_FILTER_ERROR_RATE,
+        )
+        for key_prefix in key_prefixes:
+            prefixes.add(key_prefix)
+        self._prefixes = prefixes
+        self.watermark = watermark
+        self._refreshed_at = time.monotonic()
+
+    def extend(self, key_prefixes: list[str], watermark: datetime | None) -> None:
+        if self._prefixes is None:
+            return
+        for key_prefix in key_prefixes:
+            self._prefixes.add(key_prefix)
+        self.watermark = max(filter(None, [self.watermark, watermark]), default=None)
+        self._refreshed_at = time.monotonic()
+
+    def add(self, key_prefix: str) -> None:
+        """Record a key created by this worker, before the next refresh."""
+        if self._prefixes is not None:
+            self._prefixes.add(key_prefix)
+
+    def is_rejected(self, key_hash: str) -> bool:
+        expires_at = self._rejected.get(key_hash)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            self._rejected.pop(key_hash)
+            return False
+        return True
+
+    def reject(self, key_hash: str) -> None:
+        self._rejected.put(key_hash, time.monotonic() + self.negative_ttl)
+
+    def forget_rejections(self) -> None:
+        """Drop the negative cache (e.g. after a key was updated)."""
+        self._rejected.clear()
+
+    def clear(self) -> None:
+        self.forget_rejections()
+        self._prefixes = None
+        self._refreshed_at = 0.0
+        self.watermark = None
+        self.misses = 0
+
+
+key_filter = APIKeyFilter(
+    settings.API_KEY_NEGATIVE_CACHE_SIZE, settings.API_KEY_NEGATIVE_CACHE_SECONDS
+)
@@ -5,6 +5,7 @@ from typing import Annotated, Any, Literal
 from pydantic import (
     AfterValidator,
     AnyUrl,
+    BaseModel,
     BeforeValidator,
     PostgresDsn,
     computed_field,
@@ -35,6 +36,19 @@ def get_env_file():
     return candidate if candidate.exists() else base_dir / ".env"
 
 
+class DBPool(BaseModel):
+    """Connection pool of one workload (see `app.core.db`)."""
+
+    pool_size: int = 4
+    max_overflow: int = 2
+    # Seconds to wait for a connection before giving up (503)
+    pool_timeout: float = 30.0
+    # Default `statement_timeout` of the pool's connections
+    statement_timeout_ms: int | None = None
+    # Prepared statements asyncpg keeps per connection (LRU, 0 disables)
+    prepared_statement_cache_size: int = 100
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=get_env_file(),
@@ -65,6 +79,122 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = ""
     REDIS_URL: str
 
+    # Create missing tables at startup. Turn off where `alembic upgrade head`
+    # runs before deploying: startup then skips the catalog round trips
+    DB_CREATE_ALL: bool = True
+
+    # Connection pool per workload: `ingest` (`/track`, request metrics,
+    # usage), `analytics` (metric queries, rollups) and `default`
+    # (everything else, and any workload missing here). A worker can open the
+    # sum of `pool_size + max_overflow` (18 with these defaults, 72 for the
+    # Dockerfile's 4 workers): keep workers x that under Postgres'
+    # `max_connections` (100 by default, 3 reserved for superusers), with room
+    # left for migrations and admin sessions
+    DB_POOLS: dict[str, DBPool] = {
+        "default": DBPool(),
+        "ingest": DBPool(
+            pool_size=6, max_overflow=2, pool_timeout=5.0, statement_timeout_ms=5_000
+        ),
+        "analytics": DBPool(
+            pool_size=3,
+            max_overflow=1,
+            pool_timeout=10.0,
+            prepared_statement_cache_size=500,
+        ),
+    }
+
+    # Postgres / Redis are probed in the background every HEALTH_PROBE_SECONDS
+    # (the health endpoints only read the results). Readiness fails while the
+    # alert notification queue is more than HEALTH_QUEUE_SATURATION full
+    HEALTH_PROBE_SECONDS: int = 5
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_QUEUE_SATURATION: float = 0.9
+
+    # Read replicas (comma-separated DSNs) for read-only analytics routes, each
+    # with an `analytics` pool. Checked every DB_REPLICA_CHECK_SECONDS; those
+    # unreachable or lagging more than DB_REPLICA_MAX_LAG_SECONDS are skipped,
+    # and without any left reads go to the primary
+    DB_REPLICA_URLS: Annotated[list[str] | str, BeforeValidator(parse_list)] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10.0
+    DB_REPLICA_CHECK_SECONDS: int = 5
+
+    # `/track` token bucket per project (overridable per project). Each worker
+    # mirrors up to RATE_LIMIT_LOCAL_KEYS buckets to reject overruns locally
+    RATE_LIMIT_ENABLED: bool = True
+    TRACK_RATE_LIMIT_PER_SECOND: float = 100.0
+    TRACK_RATE_LIMIT_BURST: int = 200
+    RATE_LIMIT_LOCAL_KEYS: int = 10_000
+
+    # Monthly metric quotas per project (overridable per project; None: no
+    # quota). Workers count in memory and add their counts to the database
+    # every USAGE_FLUSH_SECONDS
+    METRIC_QUOTA_SOFT: int | None = None
+    METRIC_QUOTA_HARD: int | None = None
+    USAGE_FLUSH_SECONDS: int = 5
+
+    # Metrics storage
+    DIMENSION_CACHE_SIZE: int = 10_000
+    METRICS_RETENTION_DAYS: int = 90
+
+    # Minute / hour / day rollups, maintained in the background. Each level is
+    # kept for its own retention and answers the whole buckets it covers
+    ROLLUPS_ENABLED: bool = False
+    ROLLUP_INTERVAL_SECONDS: int = 60
+    # Minutes newer than this may still receive in-flight inserts
+    ROLLUP_LAG_SECONDS: int = 60
+    ROLLUP_MINUTE_RETENTION_DAYS: int = 90
+    ROLLUP_HOUR_RETENTION_DAYS: int = 800
+    ROLLUP_DAY_RETENTION_DAYS: int = 3_660
+
+    # Analytics query guard: statement timeout per query (overrides by name:
+    # list, summary, account_summary, time_series, histogram, heatmap,
+    # endpoints) and, when set, the most metric rows the planner may expect
+    ANALYTICS_STATEMENT_TIMEOUT_MS: int = 10_000
+    ANALYTICS_STATEMENT_TIMEOUTS_MS: dict[str, int] = {
+        "endpoints": 20_000,
+        "heatmap": 20_000,
+    }
+    ANALYTICS_ROW_BUDGET: int | None = None
+
+    # HTTP caching of analytics responses: ranges ending more than this long
+    # ago are served as immutable. `public` lets shared caches (CDNs) keep
+    # them too, only use it if they key responses by Authorization
+    ANALYTICS_CACHE_SETTLE_SECONDS: int = 60
+    ANALYTICS_CACHE_SCOPE: Literal["private", "public"] = "private"
+
+    # `accuracy=approximate` queries. BERNOULLI samples rows (reads every
+    # page, honest margins of error), SYSTEM samples whole pages (reads only
+    # that share of the table, but rows of a page are correlated so no margins
+    # are reported). Ranges the planner expects to hold fewer rows than
+    # APPROXIMATE_MIN_ROWS are read exactly instead
+    APPROXIMATE_SAMPLE_PERCENT: float = 1.0
+    APPROXIMATE_SAMPLE_METHOD: Literal["SYSTEM", "BERNOULLI"] = "BERNOULLI"
+    APPROXIMATE_MIN_ROWS: int = 1_000_000
+
+    # Per-worker in-memory window of recent metrics, answers live dashboards
+    # without touching Postgres. Only enable with a single worker or sticky
+    # routing by project: each worker only sees its own ingest.
+    LIVE_WINDOW_ENABLED: bool = False
+    LIVE_WINDOW_SECONDS: int = 900
+    LIVE_WINDOW_CAPACITY: int = 65_536
+    # Per-second SSE stream (`/metrics/live`), aggregated per worker: same
+    # single worker / sticky routing requirement as the live window
+    LIVE_STREAM_ENABLED: bool = False
+
+    # Alerting. With Redis, workers share their counts and the holder of a
+    # lease (renewed every second) evaluates the rules and sends webhooks
+    ALERT_RULE_PROJECT_LIMIT: int = 100
+    ALERT_RULES_REFRESH_SECONDS: int = 30
+    ALERT_NOTIFIER_WORKERS: int = 4
+    ALERT_NOTIFIER_QUEUE_SIZE: int = 1_000
+    ALERT_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+    ALERT_LEADER_LEASE_SECONDS: int = 5
+
+    # Cold-tier archive (Parquet files on local disk or any mounted path)
+    ARCHIVE_PATH: str | None = None
+    ARCHIVE_BATCH_SIZE: int = 50_000
+    ARCHIVE_COMPRESSION: Literal["zstd", "snappy", "gzip", "none"] = "zstd"
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
@@ -84,6 +214,10 @@ class Settings(BaseSettings):
     # Dummy hash to use for timing attack prevention when user is not found.
     # This is an Argon2 hash of a random password, used to ensure constant-time comparison
     SECURITY_DUMMY_HASH: str = "$argon2id$v=19$m=65536,t=3,p=4$MjQyZWE1MzBjYjJlZTI0Yw$YTU4NGM5ZTZmYjE2NzZlZjY0ZWY3ZGRkY2U2OWFjNjk"
+    # Argon2 hashing and password strength checks run in a bounded thread
+    # pool; once it holds workers + queue size jobs, requests get a 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
 
     # CORS & Trusted Hosts
     TRUSTED_HOSTS: Annotated[list[str] | str, BeforeValidator(parse_list)] = []
@@ -97,6 +231,17 @@ class Settings(BaseSettings):
     API_KEY_LOOKUP_PREFIX_LENGTH: int = 20
     API_KEY_PROJECT_LIMIT: int = 10
     API_KEY_DEFAULT_EXPIRY_DAYS: int = 60
+    # Per-worker Bloom filter of issued key prefixes (new keys picked up every
+    # REFRESH, rebuilt every REBUILD; at most MISS_CONCURRENCY lookups of
+    # prefixes it doesn't have at once) and cache of recently rejected keys
+    API_KEY_FILTER_ENABLED: bool = True
+    API_KEY_FILTER_REFRESH_SECONDS: int = 2
+    API_KEY_FILTER_REBUILD_SECONDS: int = 600
+    API_KEY_FILTER_MISS_CONCURRENCY: int = 2
+    API_KEY_FILTER_MIN_CAPACITY: int = 10_000
+    API_KEY_FILTER_ERROR_RATE: float = 0.001
+    API_KEY_NEGATIVE_CACHE_SIZE: int = 10_000
+    API_KEY_NEGATIVE_CACHE_SECONDS: int = 60
 
     @computed_field  # type: ignore[prop-decorator]
     @property
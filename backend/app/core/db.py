@@ -1,32 +1,242 @@
+"""
+Database engines, one connection pool per workload (`DB_POOLS`).
+
+Ingest, analytics and everything else check connections out of separate
+pools, so slow dashboard queries can use up the `analytics` pool without
+stalling `/track`. Each pool records how long checkouts wait for a
+connection; `pool_stats()` reports it.
+
+Read-only sessions go to a healthy read replica (`DB_REPLICA_URLS`) when
+there is one, round-robin, and to the primary otherwise.
+"""
+
+import asyncio
+import itertools
 import logging
+import time
+from dataclasses import dataclass
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import exc, make_url, select, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.core.config import settings
+from app.core.config import DBPool, settings
 from app.models import Base
 
 logger = logging.getLogger(__name__)
 
-async_engine = create_async_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI), pool_pre_ping=True
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records the time spent waiting for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.stats.checkouts += 1
+            self.stats.wait_seconds_total += waited
+            self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+
+
+def create_engine(pool: DBPool, url: str | None = None) -> AsyncEngine:
+    connect_args = {"prepared_statement_cache_size": pool.prepared_statement_cache_size}
+    if pool.statement_timeout_ms is not None:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(pool.statement_timeout_ms)
+        }
+    return create_async_engine(
+        url or str(settings.SQLALCHEMY_DATABASE_URI),
+        pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        pool_size=pool.pool_size,
+        max_overflow=pool.max_overflow,
+        pool_timeout=pool.pool_timeout,
+        connect_args=connect_args,
+    )
+
+
+def create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+
+
+pools: dict[str, DBPool] = {"default": DBPool(), **settings.DB_POOLS}
+engines: dict[str, AsyncEngine] = {
+    name: create_engine(pool) for name, pool in pools.items()
+}
+sessionmakers = {name: create_sessionmaker(engine) for name, engine in engines.items()}
+async_engine = engines["default"]
+AsyncSessionLocal = sessionmakers["default"]
+
+# Zero when the replica has replayed everything it received, even if the
+# primary has been idle since its last transaction
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
 )
-AsyncSessionLocal = async_sessionmaker(
-    async_engine,
-    class_=AsyncSession,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
+
+
+class Replica:
+    def __init__(self, url: str, pool: DBPool):
+        url_obj = make_url(url).set(drivername="postgresql+asyncpg")
+        self.name = url_obj.render_as_string(hide_password=True)
+        self.engine = create_engine(pool, url_obj.render_as_string(False))
+        self.sessions = create_sessionmaker(self.engine)
+        # Unused until a check finds it up to date
+        self.healthy = False
+        self.lag_seconds: float | None = None
+
+    async def check(self, timeout: float) -> None:
+        try:
+            async with asyncio.timeout(timeout), self.engine.connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_QUERY)).scalar_one()
+        except Exception:
+            if self.healthy:
+                logger.warning(f"Replica unreachable: {self.name}", exc_info=True)
+            self.healthy = False
+            self.lag_seconds = None
+            return
+
+        self.lag_seconds = float(lag or 0)
+        healthy = self.lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        if self.healthy and not healthy:
+            logger.warning(
+                f"Replica lagging: {self.name}",
+                extra={"lag_seconds": self.lag_seconds},
+            )
+        self.healthy = healthy
+
+
+class ReplicaSet:
+    def __init__(self, replicas: list[Replica]):
+        self.replicas = replicas
+        self._turn = itertools.count()
+
+    def choose(self) -> Replica | None:
+        """The next healthy replica, round-robin, or None."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self) -> None:
+        timeout = settings.DB_REPLICA_CHECK_SECONDS
+        await asyncio.gather(*(replica.check(timeout) for replica in self.replicas))
+
+    def status(self) -> list[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replicas = ReplicaSet(
+    [
+        Replica(url, settings.DB_POOLS.get("analytics", DBPool()))
+        for url in settings.DB_REPLICA_URLS
+    ]
 )
 
 
-async def is_db_connected() -> bool:
-    try:
-        async with AsyncSessionLocal() as session:
-            await session.execute(select(1))
-        return True
-    except Exception:
-        return False
+def session_factory(
+    pool: str, read_only: bool = False
+) -> async_sessionmaker[AsyncSession]:
+    """Sessions on the `pool` connection pool (or the default one).
+
+    Read-only sessions use a healthy replica instead, when there is one.
+    """
+    if read_only and (replica := replicas.choose()) is not None:
+        return replica.sessions
+    return sessionmakers.get(pool, AsyncSessionLocal)
+
+
+async def run_replica_checks() -> None:
+    """Re-check replica health and lag every `DB_REPLICA_CHECK_SECONDS`."""
+    while True:
+        await replicas.check()
+        await asyncio.sleep(settings.DB_REPLICA_CHECK_SECONDS)
+
+
+def pool_stats() -> dict[str, dict]:
+    stats = {}
+    replica_engines = {
+        f"replica-{i}": replica.engine for i, replica in enumerate(replicas.replicas)
+    }
+    for name, engine in {**engines, **replica_engines}.items():
+        pool = engine.pool
+        timed = pool.stats if isinstance(pool, TimedQueuePool) else PoolStats()
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "checkouts": timed.checkouts,
+            "timeouts": timed.timeouts,
+            "avg_wait_ms": round(
+                timed.wait_seconds_total / max(timed.checkouts, 1) * 1000, 3
+            ),
+            "max_wait_ms": round(timed.wait_seconds_max * 1000, 3),
+        }
+    return stats
+
+
+def pool_exhausted(name: str) -> bool:
+    """Whether every connection the `name` pool may open is checked out."""
+    if name not in engines:
+        name = "default"
+    pool = pools[name]
+    return engines[name].pool.checkedout() >= pool.pool_size + pool.max_overflow
+
+
+async def dispose_engines() -> None:
+    for engine in engines.values():
+        await engine.dispose()
+    await replicas.dispose()
+
+
+async def ping() -> None:
+    """Round trip to the primary; raises when it can't be reached."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(select(1))
 
 
 async def init_db() -> None:
@@ -3,19 +3,24 @@ import logging
 from fastapi import Request, status
 from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.responses import JSONResponse
-from slowapi.errors import RateLimitExceeded
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 logger = logging.getLogger(__name__)
 
 
 class APIError(Exception):
     def __init__(
-        self, message: str, status_code: int = 500, details: dict | None = None
+        self,
+        message: str,
+        status_code: int = 500,
+        details: dict | None = None,
+        headers: dict[str, str] | None = None,
     ):
         super().__init__(message)
         self.message = message
         self.status_code = status_code
         self.details = details or {}
+        self.headers = headers
 
 
 async def generic_exception_handler(request: Request, exc: Exception):
@@ -40,6 +45,7 @@ async def api_exception_handler(request: Request, exc: APIError):
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": exc.message, "details": exc.details},
+        headers=exc.headers,
     )
 
 
@@ -56,8 +62,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    logger.warning(f"Database pool exhausted: {exc}")
     return JSONResponse(
-        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-        content={"error": "Rate limit exceeded", "details": str(exc)},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"error": "Server busy, please retry shortly", "details": {}},
     )
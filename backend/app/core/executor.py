@@ -0,0 +1,53 @@
+"""
+Bounded thread pools for CPU-heavy work that would otherwise block the event
+loop (and every concurrent request on the worker), such as Argon2 hashing.
+
+The pool only accepts `workers + queue_size` jobs at a time; beyond that, new
+jobs are rejected right away with `503` instead of piling up behind a burst.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, ParamSpec, TypeVar
+
+from fastapi import status
+
+from app.core.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=name
+        )
+
+    async def run(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """Run `fn` in the pool, or fail fast with `503` when it is saturated."""
+        if self.pending >= self.capacity:
+            logger.warning(
+                f"Executor saturated: {self.name}",
+                extra={"executor": self.name, "pending": self.pending},
+            )
+            raise APIError(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                message="Server busy, please retry shortly",
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.pending -= 1
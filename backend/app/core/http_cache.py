@@ -0,0 +1,109 @@
+"""
+HTTP validators for analytics responses.
+
+Server timestamps are assigned at ingest, so once a range has ended (plus
+`ANALYTICS_CACHE_SETTLE_SECONDS` for in-flight inserts) its results can only
+change when old data is deleted. The ETag of a response hashes the request
+with a per-project data watermark: the oldest metric timestamp (moved by
+retention) and, for ranges still open, the newest one (moved by every new
+metric). A matching `If-None-Match` is answered with `304` before any
+analytics query runs.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+from app import schemas
+from app.core.config import settings
+
+# Closed ranges never change: let caches keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime | None
+    immutable: bool
+
+    @property
+    def headers(self) -> dict[str, str]:
+        scope = settings.ANALYTICS_CACHE_SCOPE
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": (
+                f"{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable"
+                if self.immutable
+                else f"{scope}, no-cache"
+            ),
+            "Vary": "Authorization",
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+
+def validators(
+    request: Request,
+    project_id: int,
+    params: schemas.MetricParams,
+    watermark: tuple[datetime | None, datetime | None],
+    now: datetime | None = None,
+) -> Validators:
+    now = now or datetime.now(timezone.utc)
+    settled = now - timedelta(seconds=settings.ANALYTICS_CACHE_SETTLE_SECONDS)
+    immutable = params.end_date < settled
+    first, last = watermark
+    if immutable:
+        # Nothing can be ingested into the range anymore
+        last = None
+        last_modified = params.end_date
+    else:
+        last_modified = min(last, params.end_date) if last is not None else None
+
+    key = json.dumps(
+        [
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            project_id,
+            # Default dates depend on the day of the request
+            params.start_date.isoformat(),
+            params.end_date.isoformat(),
+            first.isoformat() if first else None,
+            last.isoformat() if last else None,
+        ]
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return Validators(
+        etag=f'"{digest}"',
+        # HTTP dates have second precision
+        last_modified=last_modified.replace(microsecond=0) if last_modified else None,
+        immutable=immutable,
+    )
+
+
+def is_fresh(request: Request, validators: Validators) -> bool:
+    """Whether the client's cached copy is still valid (RFC 9110, 13.2.2)."""
+    if if_none_match := request.headers.get("If-None-Match"):
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or validators.etag in tags
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since and validators.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except ValueError:
+            return False
+        return since.tzinfo is not None and validators.last_modified <= since
+    return False
+
+
+def not_modified(validators: Validators) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+    )
@@ -0,0 +1,31 @@
+"""
+Fixed logarithmic latency buckets.
+
+Bucket 0 holds responses faster than 0.1 ms; each following bucket is
+2^(1/4) (~19%) wider than the previous one, up to ~3 minutes, so relative
+error is bounded at every scale with only 85 buckets. The boundaries never
+change: a metric's bucket is computed once at ingest and stored with it.
+"""
+
+from bisect import bisect_right
+
+MIN_LATENCY_US = 100
+BUCKETS_PER_DOUBLING = 4
+BUCKET_COUNT = 85
+
+# Lower bound (inclusive, in microseconds) of buckets 1..BUCKET_COUNT-1
+BOUNDS_US = [
+    round(MIN_LATENCY_US * 2 ** (i / BUCKETS_PER_DOUBLING))
+    for i in range(BUCKET_COUNT - 1)
+]
+
+
+def bucket_for(response_time_us: int) -> int:
+    return bisect_right(BOUNDS_US, response_time_us)
+
+
+def bucket_range_ms(bucket: int) -> tuple[float, float | None]:
+    """Lower (inclusive) and upper (exclusive, None if unbounded) bound in ms."""
+    lower = BOUNDS_US[bucket - 1] / 1000 if bucket > 0 else 0.0
+    upper = BOUNDS_US[bucket] / 1000 if bucket < len(BOUNDS_US) else None
+    return lower, upper
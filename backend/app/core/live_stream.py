@@ -0,0 +1,119 @@
+"""
+In-process fan-out of per-second project metrics for live (SSE) streams.
+
+Ingestion feeds `hub.record()`, which only accumulates for projects that have
+at least one subscriber. Each watched project gets a single ticker task that,
+once per second, closes the current bucket, computes its aggregate once and
+pushes the same encoded frame to every subscriber queue, so the cost per tick
+does not depend on the number of connected clients.
+
+Like the live window, a worker only sees metrics it ingested itself: with
+several workers a subscriber would only receive the share of traffic routed
+to the worker serving its stream. The route is therefore off unless
+`LIVE_STREAM_ENABLED` is set, for a single worker or when `/track` and the
+stream of a project are routed to the same worker.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app import schemas
+
+TICK_SECONDS = 1.0
+# Frames buffered per subscriber; a slow client drops the oldest ones instead
+# of holding back the ticker.
+SUBSCRIBER_QUEUE_SIZE = 10
+
+
+class _ProjectStream:
+    def __init__(self):
+        self.subscribers: set[asyncio.Queue[str]] = set()
+        self.task: asyncio.Task | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.request_count = 0
+        self.error_count = 0
+        self.response_times_us: list[int] = []
+
+    def record(self, response_time_us: int, status_code: int) -> None:
+        self.request_count += 1
+        self.error_count += status_code >= 400
+        self.response_times_us.append(response_time_us)
+
+    def flush(self, timestamp: datetime) -> str:
+        """Close the current bucket and broadcast its frame to all subscribers."""
+        latencies = np.asarray(self.response_times_us, dtype=np.float64)
+        frame = schemas.MetricLiveFrameResponse(
+            timestamp=timestamp,
+            request_count=self.request_count,
+            error_count=self.error_count,
+            avg_response_time_ms=(
+                round(latencies.mean() / 1000, 2) if latencies.size else 0
+            ),
+            p95_response_time_ms=(
+                round(np.percentile(latencies, 95) / 1000, 2) if latencies.size else 0
+            ),
+        )
+        self._reset()
+
+        message = f"event: metrics\ndata: {frame.model_dump_json()}\n\n"
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+        return message
+
+    async def run(self) -> None:
+        while True:
+            # Align ticks on wall-clock second boundaries
+            await asyncio.sleep(TICK_SECONDS - time.time() % TICK_SECONDS)
+            self.flush(_closed_bucket_start(datetime.now(timezone.utc)))
+
+
+def _closed_bucket_start(now: datetime) -> datetime:
+    """Start of the bucket a tick firing at `now` closes (one tick earlier)."""
+    return now.replace(microsecond=0) - timedelta(seconds=TICK_SECONDS)
+
+
+class LiveStreamHub:
+    def __init__(self):
+        self.streams: dict[int, _ProjectStream] = {}
+
+    def record(self, project_id: int, response_time_us: int, status_code: int) -> None:
+        stream = self.streams.get(project_id)
+        if stream is not None:
+            stream.record(response_time_us, status_code)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, project_id: int) -> AsyncIterator[asyncio.Queue[str]]:
+        """Register a subscriber queue of SSE-encoded frames for `project_id`."""
+        stream = self.streams.get(project_id)
+        if stream is None:
+            stream = self.streams[project_id] = _ProjectStream()
+            stream.task = asyncio.create_task(stream.run())
+
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        stream.subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            stream.subscribers.discard(queue)
+            if not stream.subscribers:
+                del self.streams[project_id]
+                if stream.task is not None:
+                    stream.task.cancel()
+
+    def clear(self) -> None:
+        for stream in self.streams.values():
+            if stream.task is not None:
+                stream.task.cancel()
+        self.streams.clear()
+
+
+hub = LiveStreamHub()
@@ -0,0 +1,197 @@
+"""
+Per-project in-memory "live window" of recent metrics.
+
+Each worker keeps a fixed-size, columnar ring buffer per project, fed by the
+ingestion path. Queries over the last few minutes are answered with vectorized
+NumPy operations instead of a round trip to Postgres; anything older than the
+window (or older than what this worker has seen) falls back to SQL.
+
+The buffers only contain what *this* worker ingested, so enable it only when
+ingestion and dashboard reads for a project land on the same worker (single
+worker, or sticky routing by project).
+"""
+
+import time
+from datetime import datetime, timezone
+from http import HTTPMethod
+
+import numpy as np
+
+from app.core.config import settings
+
+US_PER_SECOND = 1_000_000
+US_PER_MS = 1_000.0
+
+METHODS = list(HTTPMethod)
+METHOD_CODES = {method: code for code, method in enumerate(METHODS)}
+
+BUCKET_SIZES_US = {
+    "minute": 60 * US_PER_SECOND,
+    "hour": 3_600 * US_PER_SECOND,
+    "day": 86_400 * US_PER_SECOND,
+}
+
+
+def to_us(dt: datetime) -> int:
+    """Aware datetime -> integer microseconds since the epoch."""
+    return int(dt.timestamp() * US_PER_SECOND)
+
+
+def from_us(us: int) -> datetime:
+    return datetime.fromtimestamp(us / US_PER_SECOND, tz=timezone.utc)
+
+
+class LiveWindow:
+    """Fixed-size ring buffer of a single project's most recent metrics."""
+
+    def __init__(self, capacity: int, covered_since_us: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.response_times_us = np.zeros(capacity, dtype=np.int32)
+        self.status_codes = np.zeros(capacity, dtype=np.int16)
+        self.endpoint_ids = np.zeros(capacity, dtype=np.int32)
+        self.methods = np.zeros(capacity, dtype=np.int8)
+
+        self._size = 0
+        self._next = 0
+        # Every metric ingested by this worker at or after this instant is
+        # still in the buffer.
+        self.covered_since_us = covered_since_us
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(
+        self,
+        timestamp_us: int,
+        response_time_us: int,
+        status_code: int,
+        endpoint_id: int,
+        method: HTTPMethod,
+    ) -> None:
+        i = self._next
+        if self._size == self.capacity:
+            # Overwriting the oldest entry shrinks the covered range
+            self.covered_since_us = max(
+                self.covered_since_us, int(self.timestamps[i]) + 1
+            )
+        else:
+            self._size += 1
+
+        self.timestamps[i] = timestamp_us
+        self.response_times_us[i] = response_time_us
+        self.status_codes[i] = status_code
+        self.endpoint_ids[i] = endpoint_id
+        self.methods[i] = METHOD_CODES[method]
+        self._next = (i + 1) % self.capacity
+
+    def covers(self, start_us: int) -> bool:
+        return start_us >= self.covered_since_us
+
+    def summary(self, start_us: int, end_us: int) -> dict:
+        mask = self._mask(start_us, end_us)
+        latencies = self.response_times_us[mask]
+        if latencies.size == 0:
+            return {"request_count": 0}
+
+        return {
+            "request_count": int(latencies.size),
+            "avg_response_time_ms": float(latencies.mean()) / US_PER_MS,
+            "error_count": int(np.count_nonzero(self.status_codes[mask] >= 400)),
+            "slowest_request_ms": float(latencies.max()) / US_PER_MS,
+            "fastest_request_ms": float(latencies.min()) / US_PER_MS,
+        }
+
+    def percentiles(
+        self, start_us: int, end_us: int, quantiles: tuple[float, ...]
+    ) -> list[float]:
+        """Latency percentiles (in ms) for `quantiles` given in 0-100."""
+        latencies = self.response_times_us[self._mask(start_us, end_us)]
+        if latencies.size == 0:
+            return [0.0] * len(quantiles)
+        return [float(p) / US_PER_MS for p in np.percentile(latencies, quantiles)]
+
+    def time_series(self, start_us: int, end_us: int, granularity: str) -> list[dict]:
+        mask = self._mask(start_us, end_us)
+        if not mask.any():
+            return []
+
+        bucket_us = BUCKET_SIZES_US[granularity]
+        buckets, inverse = np.unique(
+            self.timestamps[mask] // bucket_us, return_inverse=True
+        )
+        counts = np.bincount(inverse)
+        latency_sums = np.bincount(inverse, weights=self.response_times_us[mask])
+        errors = np.bincount(inverse, weights=self.status_codes[mask] >= 400)
+
+        return [
+            {
+                "timestamp": from_us(int(bucket) * bucket_us),
+                "request_count": int(count),
+                "avg_response_time_ms": float(latency_sum / count) / US_PER_MS,
+                "error_count": int(error_count),
+            }
+            for bucket, count, latency_sum, error_count in zip(
+                buckets, counts, latency_sums, errors
+            )
+        ]
+
+    def _mask(self, start_us: int, end_us: int) -> np.ndarray:
+        # Unused slots hold timestamp 0 and never match a real range
+        return (self.timestamps >= start_us) & (self.timestamps <= end_us)
+
+
+class LiveWindowRegistry:
+    """Lazily creates one `LiveWindow` per project."""
+
+    def __init__(self):
+        self.windows: dict[int, LiveWindow] = {}
+        # A project's buffer is created on its first metric, so the worker
+        # has seen every metric of every project since it started.
+        self.started_at_us = to_us(datetime.now(timezone.utc))
+
+    def record(
+        self,
+        project_id: int,
+        timestamp: datetime,
+        response_time_us: int,
+        status_code: int,
+        endpoint_id: int,
+        method: HTTPMethod,
+    ) -> None:
+        if not settings.LIVE_WINDOW_ENABLED:
+            return
+
+        window = self.windows.get(project_id)
+        if window is None:
+            window = LiveWindow(settings.LIVE_WINDOW_CAPACITY, self.started_at_us)
+            self.windows[project_id] = window
+        window.append(
+            to_us(timestamp), response_time_us, status_code, endpoint_id, method
+        )
+
+    def lookup(self, project_id: int, start: datetime) -> LiveWindow | None:
+        """
+        Return the project's window if it can answer a query starting at
+        `start`, or None if the caller must fall back to SQL.
+        """
+        if not settings.LIVE_WINDOW_ENABLED:
+            return None
+
+        start_us = to_us(start)
+        horizon_us = int((time.time() - settings.LIVE_WINDOW_SECONDS) * US_PER_SECOND)
+        if start_us < max(horizon_us, self.started_at_us):
+            return None
+
+        window = self.windows.get(project_id)
+        if window is None:
+            # Nothing ingested for this project since the worker started
+            return LiveWindow(1, self.started_at_us)
+        return window if window.covers(start_us) else None
+
+    def clear(self) -> None:
+        self.windows.clear()
+        self.started_at_us = to_us(datetime.now(timezone.utc))
+
+
+registry = LiveWindowRegistry()
@@ -0,0 +1,113 @@
+"""
+Background health probing.
+
+Load balancers, the Docker healthcheck and uptime monitors poll the health
+endpoints constantly, so the endpoints never touch Postgres or Redis
+themselves: a task probes both every `HEALTH_PROBE_SECONDS` and the
+endpoints read the cached results. A result older than three intervals
+(the prober is stuck) counts as a failure.
+
+Readiness also turns false while this worker can't take more `/track`
+traffic: its `ingest` or `default` connection pool is exhausted, or the
+alert notification queue fed by ingest is nearly full. Redis is reported by
+`/health` only: the rate limiter lets requests through without it, so a
+worker that can't reach it can still serve traffic.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.core import alerting, db, rate_limiter
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pools `/track` and authentication depend on; a busy `analytics` pool only
+# slows dashboards down
+READINESS_POOLS = ("ingest", "default")
+
+
+@dataclass
+class Probe:
+    healthy: bool = False
+    latency_ms: float | None = None
+    checked_at: datetime | None = None
+
+    @property
+    def fresh(self) -> bool:
+        max_age = timedelta(seconds=3 * settings.HEALTH_PROBE_SECONDS)
+        return (
+            self.checked_at is not None
+            and datetime.now(timezone.utc) - self.checked_at <= max_age
+        )
+
+    @property
+    def ok(self) -> bool:
+        return self.healthy and self.fresh
+
+    def status(self) -> dict:
+        return {
+            "healthy": self.ok,
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+        }
+
+
+class HealthProber:
+    def __init__(self):
+        self.database = Probe()
+        # None while rate limiting keeps its buckets in memory
+        self.redis: Probe | None = None
+
+    async def check(self) -> None:
+        probes = [self._probe("database", self.database, db.ping)]
+        store = rate_limiter.limiter.store
+        if isinstance(store, rate_limiter.RedisBuckets):
+            self.redis = self.redis or Probe()
+            probes.append(self._probe("redis", self.redis, store.ping))
+        await asyncio.gather(*probes)
+
+    async def _probe(self, name: str, probe: Probe, ping) -> None:
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(settings.HEALTH_PROBE_TIMEOUT_SECONDS):
+                await ping()
+        except Exception:
+            if probe.healthy:
+                logger.warning(f"Health probe failed: {name}", exc_info=True)
+            probe.healthy = False
+            probe.latency_ms = None
+        else:
+            if not probe.healthy and probe.checked_at is not None:
+                logger.info(f"Health probe recovered: {name}")
+            probe.healthy = True
+            probe.latency_ms = round((time.monotonic() - start) * 1000, 3)
+        probe.checked_at = datetime.now(timezone.utc)
+
+    def readiness(self) -> tuple[bool, dict[str, bool]]:
+        """Whether this worker should receive traffic, and every check."""
+        queue = alerting.engine.notifier.queue
+        checks = {
+            "database": self.database.ok,
+            **{f"{name}_pool": not db.pool_exhausted(name) for name in READINESS_POOLS},
+            "alert_queue": queue.qsize()
+            < queue.maxsize * settings.HEALTH_QUEUE_SATURATION,
+        }
+        return all(checks.values()), checks
+
+    def clear(self) -> None:
+        self.database = Probe()
+        self.redis = None
+
+
+async def run_health_probes() -> None:
+    """Re-probe Postgres and Redis every `HEALTH_PROBE_SECONDS`."""
+    while True:
+        await asyncio.sleep(settings.HEALTH_PROBE_SECONDS)
+        await prober.check()
+
+
+prober = HealthProber()
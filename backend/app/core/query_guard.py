@@ -0,0 +1,141 @@
+"""
+Cost guard for analytics queries.
+
+Every analytics statement runs under a per-query `statement_timeout` so a
+single heavy read cannot hold the database (and starve ingest) for long.
+With `ANALYTICS_ROW_BUDGET` set, a cheap `EXPLAIN` runs first and statements
+the planner expects to read more metric rows than the budget are rejected
+before touching any data (`RowBudgetExceeded`, which callers may extend with
+more specific suggestions). The estimated and actual cost of every statement
+is logged.
+"""
+
+import json
+import logging
+import time
+
+from fastapi import status
+from sqlalchemy import Result, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+from app import models
+from app.core.config import settings
+from app.core.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE of a statement cancelled by `statement_timeout`
+QUERY_CANCELED = "57014"
+
+SUGGESTIONS = [
+    "Narrow the date range",
+    "Add method, status or url_path filters",
+    "Use accuracy=approximate",
+]
+
+
+class RowBudgetExceeded(APIError):
+    def __init__(self, estimated_rows: int):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            message="Query would scan too many rows",
+            details={
+                "estimated_rows": estimated_rows,
+                "row_budget": settings.ANALYTICS_ROW_BUDGET,
+                "suggestions": list(SUGGESTIONS),
+            },
+        )
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def timeout_ms(name: str) -> int:
+    return settings.ANALYTICS_STATEMENT_TIMEOUTS_MS.get(
+        name, settings.ANALYTICS_STATEMENT_TIMEOUT_MS
+    )
+
+
+async def execute(
+    session: AsyncSession, query, name: str, params: dict | None = None
+) -> Result:
+    """Run the analytics query `name` (with `params`) within its budgets."""
+    if session.bind is None or session.bind.dialect.name != "postgresql":
+        return await session.execute(query, params)
+
+    timeout = timeout_ms(name)
+    # Transaction-local, so pooled connections get their default back
+    await session.execute(
+        select(func.set_config("statement_timeout", f"{timeout}ms", True))
+    )
+
+    cost = {}
+    if settings.ANALYTICS_ROW_BUDGET is not None:
+        cost = await estimate(session, query, params)
+        if cost["estimated_rows"] > settings.ANALYTICS_ROW_BUDGET:
+            logger.warning(
+                f"Analytics query rejected: {name}",
+                extra={"query": name, **cost},
+            )
+            raise RowBudgetExceeded(cost["estimated_rows"])
+
+    start = time.perf_counter()
+    try:
+        result = await session.execute(query, params)
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED:
+            raise
+        logger.warning(
+            f"Analytics query timed out: {name}",
+            extra={"query": name, "timeout_ms": timeout, **cost},
+        )
+        raise APIError(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message="Query exceeded its time budget",
+            details={"timeout_ms": timeout, "suggestions": SUGGESTIONS},
+        ) from e
+
+    logger.info(
+        f"Analytics query: {name}",
+        extra={
+            "query": name,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            **cost,
+        },
+    )
+    return result
+
+
+async def estimate(session: AsyncSession, query, params: dict | None = None) -> dict:
+    """Planner estimate of the metric rows `query` reads and its total cost."""
+    plan = (await session.execute(Explain(query), params)).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]["Plan"]
+    return {
+        "estimated_rows": round(_scanned_rows(root)),
+        "estimated_cost": root["Total Cost"],
+    }
+
+
+def _scanned_rows(node: dict) -> float:
+    """Rows produced by every scan of the metrics table in a plan (sub)tree."""
+    rows = 0.0
+    if node.get("Relation Name") == models.Metric.__tablename__:
+        rows = node["Plan Rows"]
+    return rows + sum(_scanned_rows(child) for child in node.get("Plans", []))
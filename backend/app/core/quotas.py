@@ -0,0 +1,86 @@
+"""
+Monthly metric quotas per project.
+
+`/track` only touches in-process counters: the usage a worker enforces is the
+total it last read from the database plus what it counted since. Every
+`USAGE_FLUSH_SECONDS`, `usage_service` adds the counts to `project_usage` and
+reads back the totals of all workers, so a project can overshoot its hard
+limit by about one flush interval of traffic per worker.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from app import models
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Quota:
+    soft: int | None
+    hard: int | None
+
+
+def current_period(now: datetime | None = None) -> date:
+    """The first day of the current month (UTC)."""
+    now = now or datetime.now(timezone.utc)
+    return now.date().replace(day=1)
+
+
+def period_end(period: date) -> datetime:
+    """When the quota of `period` resets."""
+    if period.month == 12:
+        return datetime(period.year + 1, 1, 1, tzinfo=timezone.utc)
+    return datetime(period.year, period.month + 1, 1, tzinfo=timezone.utc)
+
+
+class UsageCounters:
+    def __init__(self):
+        self.period = current_period()
+        # Counted here, not flushed yet
+        self._pending: dict[tuple[int, date], int] = {}
+        # project id -> total of `period` at the last flush, across workers
+        self._totals: dict[int, int] = {}
+
+    def count(self, project_id: int, period: date, n: int = 1) -> None:
+        key = (project_id, period)
+        self._pending[key] = self._pending.get(key, 0) + n
+
+    def used(self, project_id: int, period: date) -> int:
+        if period != self.period:
+            self.period = period
+            self._totals.clear()
+        return self._totals.get(project_id, 0) + self.pending(project_id, period)
+
+    def pending(self, project_id: int, period: date) -> int:
+        return self._pending.get((project_id, period), 0)
+
+    def drain(self) -> dict[tuple[int, date], int]:
+        """Take the pending counts, to be flushed."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: dict[tuple[int, date], int]) -> None:
+        """Put back counts whose flush failed."""
+        for (project_id, period), n in pending.items():
+            self.count(project_id, period, n)
+
+    def update_totals(self, totals: dict[tuple[int, date], int]) -> None:
+        for (project_id, period), total in totals.items():
+            if period == self.period:
+                self._totals[project_id] = total
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._totals.clear()
+
+
+def project_quota(project: models.Project) -> Quota:
+    """The project's quota, or the default one."""
+    return Quota(
+        soft=project.metric_quota_soft or settings.METRIC_QUOTA_SOFT,
+        hard=project.metric_quota_hard or settings.METRIC_QUOTA_HARD,
+    )
+
+
+usage = UsageCounters()
@@ -1,6 +1,156 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+"""
+Token-bucket rate limiting, per project.
 
+Buckets live in Redis: a Lua script refills the bucket and takes a token
+atomically in a single round trip, on the Redis clock so every worker agrees.
+With `REDIS_URL=memory://` (tests, single-process development) they live in
+process memory instead.
+
+Each worker also mirrors the last bucket state Redis returned for a key. Other
+workers can only take tokens, so the mirror plus its refill since then is an
+upper bound of the real bucket: while it is below one token, requests are
+rejected without a round trip.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app import models
+from app.core.cache import LRUCache
 from app.core.config import settings
 
-limiter = Limiter(key_func=get_remote_address, storage_uri=settings.REDIS_URL)
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+if tokens == nil then
+    tokens = burst
+else
+    tokens = math.min(burst, tokens + math.max(0, now - tonumber(bucket[2])) * rate)
+end
+
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass(frozen=True)
+class Limit:
+    per_second: float
+    burst: int
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    remaining: float
+    # Seconds until the next token (0 when allowed)
+    retry_after: float
+
+
+class MemoryBuckets:
+    """Buckets in process memory, for a single worker."""
+
+    def __init__(self):
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    async def take(self, key: str, limit: Limit) -> tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated_at) * limit.per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    async def close(self) -> None:
+        self.clear()
+
+
+class RedisBuckets:
+    """Buckets shared by every worker, one atomic script call per request."""
+
+    def __init__(self, url: str):
+        self.client = Redis.from_url(url)
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, limit: Limit) -> tuple[bool, float]:
+        allowed, tokens = await self._script(
+            keys=[key], args=[limit.per_second, limit.burst]
+        )
+        return bool(allowed), float(tokens)
+
+    async def ping(self) -> None:
+        await self.client.ping()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class RateLimiter:
+    def __init__(self, store: MemoryBuckets | RedisBuckets, local_keys: int):
+        self.store = store
+        # key -> (tokens, monotonic time) as last returned by the store
+        self._mirror = LRUCache(local_keys)
+
+    async def acquire(self, key: str, limit: Limit) -> Decision:
+        mirrored = self._mirror.get(key)
+        if mirrored is not None:
+            tokens, synced_at = mirrored
+            tokens = min(
+                limit.burst, tokens + (time.monotonic() - synced_at) * limit.per_second
+            )
+            if tokens < 1:
+                return Decision(False, tokens, (1 - tokens) / limit.per_second)
+
+        try:
+            allowed, tokens = await self.store.take(key, limit)
+        except RedisError:
+            # Ingest must not depend on Redis being up
+            logger.warning("Rate limiter unavailable, request allowed", exc_info=True)
+            return Decision(True, limit.burst, 0)
+
+        self._mirror.put(key, (tokens, time.monotonic()))
+        retry_after = 0 if allowed else (1 - tokens) / limit.per_second
+        return Decision(allowed, tokens, retry_after)
+
+    def clear(self) -> None:
+        self._mirror.clear()
+
+
+def track_limit(project: models.Project) -> Limit:
+    """The project's `/track` limit, or the default one."""
+    return Limit(
+        per_second=project.track_rate_limit_per_second
+        or settings.TRACK_RATE_LIMIT_PER_SECOND,
+        burst=project.track_rate_limit_burst or settings.TRACK_RATE_LIMIT_BURST,
+    )
+
+
+def create_store(url: str) -> MemoryBuckets | RedisBuckets:
+    if url.startswith("memory://"):
+        return MemoryBuckets()
+    return RedisBuckets(url)
+
+
+limiter = RateLimiter(create_store(settings.REDIS_URL), settings.RATE_LIMIT_LOCAL_KEYS)
@@ -1,21 +1,29 @@
+import functools
 import hashlib
 import hmac
 import secrets
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
 
 import jwt
 from fastapi import status
 from jwt import InvalidTokenError
-from pwdlib import PasswordHash
-from pydantic import ValidationError
-from zxcvbn import zxcvbn
+from pydantic import SecretStr, ValidationError
 
 from app import schemas
 from app.core.config import settings
 from app.core.exceptions import APIError
-from app.core.types import SecurePassword
+from app.core.executor import BoundedExecutor
 
-password_hash = PasswordHash.recommended()
+if TYPE_CHECKING:
+    from pwdlib import PasswordHash
+
+# Password hashing / verification / strength checks, off the event loop
+password_executor = BoundedExecutor(
+    "password",
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
 
 
 # --------------- IP ----------------
@@ -62,20 +70,33 @@ def compare_api_key(plain_api_key: str, hashed_api_key: str) -> bool:
 
 
 # --------------- Password ----------------
+# Argon2 and zxcvbn (whose dictionaries take ~30 ms to load) are imported on
+# first use rather than at startup: most workers rarely see a login
+
+
+@functools.cache
+def get_password_hash() -> "PasswordHash":
+    from pwdlib import PasswordHash
+
+    return PasswordHash.recommended()
+
+
 def hash_password(password: str) -> str:
     """Hash a password for storage."""
-    return password_hash.hash(password)
+    return get_password_hash().hash(password)
 
 
 def verify_password(
     plain_password: str, hashed_password: str
 ) -> tuple[bool, str | None]:
     """Verify a password against a hash."""
-    return password_hash.verify_and_update(plain_password, hashed_password)
+    return get_password_hash().verify_and_update(plain_password, hashed_password)
 
 
-def validate_password(password: SecurePassword) -> SecurePassword:
+def validate_password(password: SecretStr) -> SecretStr:
     """Validate password meets security requirements."""
+    from zxcvbn import zxcvbn
+
     result = zxcvbn(password.get_secret_value())
     if result["score"] < 3:
         feedback = ", ".join(result["feedback"]["suggestions"])
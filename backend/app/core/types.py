@@ -1,7 +1,8 @@
+import ipaddress
 from datetime import datetime, timezone
 from typing import Annotated
 
-from pydantic import AfterValidator, AwareDatetime, BeforeValidator, SecretStr
+from pydantic import AfterValidator, AwareDatetime, BeforeValidator, HttpUrl
 
 
 def get_default_start_date() -> AwareDatetime:
@@ -20,11 +21,29 @@ def normalize_url_path(url_path: str) -> str:
     return url_path.rstrip("/") or "/"
 
 
-def validate_secure_password(password: SecretStr) -> SecretStr:
-    from app.core import security
+NormalizedUrlPath = Annotated[str, BeforeValidator(normalize_url_path)]
 
-    return security.validate_password(password)
 
+def is_public_address(address: str) -> bool:
+    """Not loopback, private, link-local (cloud metadata), reserved or multicast."""
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
 
-NormalizedUrlPath = Annotated[str, BeforeValidator(normalize_url_path)]
-SecurePassword = Annotated[SecretStr, AfterValidator(validate_secure_password)]
+
+def ensure_public_host(url: HttpUrl) -> HttpUrl:
+    # Host names are checked again once resolved, when the request is sent
+    host = (url.host or "").strip("[]").rstrip(".").lower()
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ValueError("URL must not point to this host")
+    try:
+        public = is_public_address(host)
+    except ValueError:
+        return url
+    if not public:
+        raise ValueError("URL must not point to a private or reserved address")
+    return url
+
+
+PublicHttpUrl = Annotated[HttpUrl, AfterValidator(ensure_public_host)]
@@ -1,12 +1,17 @@
+import hmac
+import math
+from datetime import datetime, timezone
 from typing import Annotated
 
-from fastapi import Depends, Security, status
+from fastapi import Depends, Request, Response, Security, status
 from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 
-from app import models
-from app.core import config, db, security
+from app import models, schemas
+from app.core import config, db, http_cache, quotas, rate_limiter, security
+from app.core.api_key_filter import key_filter
 from app.core.exceptions import APIError
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -15,66 +20,146 @@ reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{config.settings.API_PREFIX}/l
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-async def get_db() -> AsyncSession:  # type: ignore
-    async with db.AsyncSessionLocal() as session:
+def use_db_pool(pool: str, read_only: bool = False):
+    """Router dependency: the request's sessions use the `pool` connections.
+
+    Router dependencies are resolved before the route's own, so every
+    dependency of the route (API key, project lookup...) shares the session.
+    Routers that never write can set `read_only` to use a read replica.
+    """
+
+    async def set_db_pool(request: Request) -> None:
+        request.state.db_pool = pool
+        request.state.db_read_only = read_only
+
+    return set_db_pool
+
+
+async def get_db(request: Request) -> AsyncSession:  # type: ignore
+    pool = getattr(request.state, "db_pool", "default")
+    read_only = getattr(request.state, "db_read_only", False)
+    async with db.session_factory(pool, read_only)() as session:
         yield session
 
 
 SessionDep = Annotated[AsyncSession, Depends(get_db)]
 
 
-async def get_project_id_by_api_key(
+async def get_project_by_api_key(
     session: SessionDep,
     api_key: str = Security(api_key_header),
-) -> int:
-    """Validates API key and returns the Project id."""
+) -> models.Project:
+    """Validates API key and returns its Project."""
     if not api_key:
         raise APIError(
             status_code=status.HTTP_401_UNAUTHORIZED, message="API key required"
         )
 
     key_prefix = api_key[: config.settings.API_KEY_LOOKUP_PREFIX_LENGTH]
-    api_key_obj_raw = await session.execute(
-        select(models.APIKey)
-        .join(models.Project)
-        .where(
-            models.APIKey.key_prefix == key_prefix,
-            models.APIKey.is_active.is_(True),
-            models.Project.is_active.is_(True),
+    key_hash = security.hash_api_key(api_key)
+    # Recently rejected keys, and unknown prefixes past the miss budget, never
+    # reach the database
+    with key_filter.lookup(key_prefix) as admitted:
+        if not admitted or key_filter.is_rejected(key_hash):
+            raise APIError(
+                status_code=status.HTTP_401_UNAUTHORIZED, message="Invalid API key"
+            )
+
+        api_key_obj_raw = await session.execute(
+            select(models.APIKey)
+            .join(models.Project)
+            .where(
+                models.APIKey.key_prefix == key_prefix,
+                models.APIKey.is_active.is_(True),
+                models.Project.is_active.is_(True),
+            )
+            .options(contains_eager(models.APIKey.project))
         )
-    )
-    api_key_obj = api_key_obj_raw.scalar_one_or_none()
+        api_key_obj = api_key_obj_raw.scalar_one_or_none()
+
+        if (
+            not api_key_obj
+            or not api_key_obj.is_valid
+            or not hmac.compare_digest(key_hash, api_key_obj.key_hash)
+        ):
+            key_filter.reject(key_hash)
+            raise APIError(
+                status_code=status.HTTP_401_UNAUTHORIZED, message="Invalid API key"
+            )
+    return api_key_obj.project
+
+
+ProjectByAPIKeyDep = Annotated[models.Project, Depends(get_project_by_api_key)]
 
-    if (
-        not api_key_obj
-        or not api_key_obj.is_valid
-        or not security.compare_api_key(api_key, api_key_obj.key_hash)
-    ):
-        raise APIError(
-            status_code=status.HTTP_401_UNAUTHORIZED, message="Invalid API key"
-        )
-    return api_key_obj.project_id
+
+async def get_project_id_by_api_key(project: ProjectByAPIKeyDep) -> int:
+    return project.id
 
 
 ProjectIdDep = Annotated[int, Depends(get_project_id_by_api_key)]
 
 
-async def get_current_user(session: SessionDep, token: TokenDep) -> models.User:
-    token_data = security.decode_token(token)
-    user = await session.get(models.User, token_data.user_id)
-    if user is None:
+async def check_track_rate_limit(
+    response: Response, project: ProjectByAPIKeyDep
+) -> None:
+    """Takes a token from the project's `/track` bucket, or rejects with `429`."""
+    if not config.settings.RATE_LIMIT_ENABLED:
+        return
+
+    limit = rate_limiter.track_limit(project)
+    decision = await rate_limiter.limiter.acquire(f"track:{project.id}", limit)
+    headers = {
+        "X-RateLimit-Limit": str(limit.burst),
+        "X-RateLimit-Remaining": str(int(decision.remaining)),
+    }
+    if not decision.allowed:
         raise APIError(
-            status_code=status.HTTP_404_NOT_FOUND,
-            message="User not found",
-            details={"headers": {"WWW-Authenticate": "Bearer"}},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            message="Rate limit exceeded",
+            details={"retry_after": round(decision.retry_after, 3)},
+            headers={**headers, "Retry-After": str(math.ceil(decision.retry_after))},
         )
-    if not user.is_active:
+    response.headers.update(headers)
+
+
+async def check_track_quota(response: Response, project: ProjectByAPIKeyDep) -> None:
+    """Rejects `/track` with `429` once the project's monthly hard quota is used."""
+    quota = quotas.project_quota(project)
+    limit = quota.hard or quota.soft
+    if limit is None:
+        return
+
+    now = datetime.now(timezone.utc)
+    period = quotas.current_period(now)
+    used = quotas.usage.used(project.id, period)
+    reset_at = quotas.period_end(period)
+    headers = {
+        "X-Quota-Limit": str(limit),
+        "X-Quota-Remaining": str(max(0, limit - used)),
+        "X-Quota-Reset": str(int(reset_at.timestamp())),
+    }
+    if quota.hard is not None and used >= quota.hard:
         raise APIError(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            message="Inactive user",
-            details={"headers": {"WWW-Authenticate": "Bearer"}},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            message="Monthly metric quota exceeded",
+            details={
+                "quota": quota.hard,
+                "used": used,
+                "reset_at": reset_at.isoformat(),
+            },
+            headers={
+                **headers,
+                "Retry-After": str(math.ceil((reset_at - now).total_seconds())),
+            },
         )
-    return user
+    if quota.soft is not None and used >= quota.soft:
+        headers["X-Quota-Warning"] = "Soft monthly metric quota exceeded"
+    response.headers.update(headers)
+
+
+async def get_current_user(session: SessionDep, token: TokenDep) -> models.User:
+    token_data = security.decode_token(token)
+    return _check_user(await session.get(models.User, token_data.user_id))
 
 
 CurrentUserDep = Annotated[models.User, Depends(get_current_user)]
@@ -82,15 +167,18 @@ CurrentUserDep = Annotated[models.User, Depends(get_current_user)]
 
 async def get_user_project(
     project_key: str,
-    user: CurrentUserDep,
     session: SessionDep,
+    token: TokenDep,
 ) -> models.Project:
+    """The user's project, resolved with the user itself in a single query."""
     # Avoid circular import
     from app.services import project_service
 
-    project = await project_service.get_user_project_by_key(
-        user.id, project_key, session
+    token_data = security.decode_token(token)
+    user, project = await project_service.get_user_and_project(
+        token_data.user_id, project_key, session
     )
+    _check_user(user)
     if not project:
         raise APIError(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -99,4 +187,44 @@ async def get_user_project(
     return project
 
 
+def _check_user(user: models.User | None) -> models.User:
+    if user is None:
+        raise APIError(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="User not found",
+            details={"headers": {"WWW-Authenticate": "Bearer"}},
+        )
+    if not user.is_active:
+        raise APIError(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Inactive user",
+            details={"headers": {"WWW-Authenticate": "Bearer"}},
+        )
+    return user
+
+
 ProjectDep = Annotated[models.Project, Depends(get_user_project)]
+
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    project: ProjectDep,
+    session: SessionDep,
+    params: schemas.MetricQuery,
+) -> Response | None:
+    """
+    `304 Not Modified` when the client already has the current response,
+    otherwise None (and the validators are set on the response).
+    """
+    from app.services import metric_service
+
+    watermark = await metric_service.get_data_watermark(session, project.id)
+    validators = http_cache.validators(request, project.id, params, watermark)
+    if http_cache.is_fresh(request, validators):
+        return http_cache.not_modified(validators)
+    response.headers.update(validators.headers)
+    return None
+
+
+NotModifiedDep = Annotated[Response | None, Depends(check_not_modified)]
@@ -1,10 +1,11 @@
 from datetime import datetime, timezone
 from importlib.metadata import version
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
 from app.core.config import settings
-from app.core.db import is_db_connected
+from app.core.db import pool_stats, replicas
+from app.core.probes import prober
 
 router = APIRouter()
 
@@ -16,11 +17,31 @@ except Exception:
 
 @router.get("/health")
 async def health():
-    db_connected = await is_db_connected()
+    """Status from the background probes; never opens a connection."""
+    db_connected = prober.database.ok
     return {
         "status": "online" if db_connected else "offline",
         "database_status": "healthy" if db_connected else "unhealthy",
+        "database_probe": prober.database.status(),
+        "redis_probe": prober.redis.status() if prober.redis is not None else None,
+        "database_pools": pool_stats(),
+        "database_replicas": replicas.status(),
         "environment": settings.ENVIRONMENT,
         "version": API_VERSION,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
+
+
+@router.get("/health/live")
+async def live():
+    """The process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def ready(response: Response):
+    """Whether this worker should receive traffic (503 when not)."""
+    is_ready, checks = prober.readiness()
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if is_ready else "unavailable", "checks": checks}
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -5,24 +6,29 @@ from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic_core import ValidationError
-from slowapi.errors import RateLimitExceeded
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
 from app.api.v1.routes import router as v1_router
-from app.core import db
+from app.core import alerting, db, probes, rate_limiter
 from app.core.config import settings
 from app.core.exceptions import (
     APIError,
     api_exception_handler,
     generic_exception_handler,
     http_exception_handler,
-    rate_limit_handler,
+    pool_timeout_handler,
     validation_exception_handler,
 )
 from app.core.logging_config import setup_logging
-from app.core.rate_limiter import limiter
 from app.health import router as health_router
 from app.middleware import LoggingMiddleware, MetricMiddleware, RequestIDMiddleware
+from app.services import (
+    alert_service,
+    api_key_service,
+    rollup_service,
+    usage_service,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +37,49 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     setup_logging()
 
-    await db.init_db()
-    if not await db.is_db_connected():
+    if settings.DB_CREATE_ALL:
+        await db.init_db()
+    await probes.prober.check()
+    if not probes.prober.database.ok:
         raise Exception("Database connection failed")
+    probe_task = asyncio.create_task(probes.run_health_probes())
+
+    await alerting.engine.notifier.start()
+    alerting_task = asyncio.create_task(alert_service.run_alerting())
+    usage_task = asyncio.create_task(usage_service.run_usage_flush())
+    rollup_task = None
+    if settings.ROLLUPS_ENABLED:
+        rollup_task = asyncio.create_task(rollup_service.run_rollups())
+    replica_task = None
+    if db.replicas.replicas:
+        await db.replicas.check()
+        replica_task = asyncio.create_task(db.run_replica_checks())
+    key_filter_task = None
+    if settings.API_KEY_FILTER_ENABLED:
+        key_filter_task = asyncio.create_task(api_key_service.run_key_filter_refresh())
+
     logger.info("Application started successfully!")
     yield
     logger.info("Application shutting down!")
 
+    probe_task.cancel()
+    alerting_task.cancel()
+    usage_task.cancel()
+    if rollup_task is not None:
+        rollup_task.cancel()
+    if key_filter_task is not None:
+        key_filter_task.cancel()
+    if replica_task is not None:
+        replica_task.cancel()
+    # Don't lose the counts of the last few seconds
+    async with db.session_factory("ingest")() as session:
+        await usage_service.flush_usage(session)
+    await alerting.engine.notifier.stop()
+    if alerting.engine.shared is not None:
+        await alerting.engine.shared.close()
+    await rate_limiter.limiter.store.close()
+    await db.dispose_engines()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -45,10 +87,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, rate_limit_handler)  # type: ignore
 app.add_exception_handler(HTTPException, http_exception_handler)  # type: ignore
 app.add_exception_handler(APIError, api_exception_handler)  # type: ignore
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)  # type: ignore
 app.add_exception_handler(RequestValidationError, validation_exception_handler)  # type: ignore
 app.add_exception_handler(ValidationError, validation_exception_handler)  # type: ignore
 app.add_exception_handler(Exception, generic_exception_handler)  # type: ignore
@@ -28,7 +28,7 @@ async def log_metric(
     Background task to log API metrics to the database.
     """
     try:
-        async with db.AsyncSessionLocal() as session:
+        async with db.session_factory("ingest")() as session:
             await add_metric(session, project_id, metric)
     except Exception:
         logger.exception("Failed to log metric in background")
@@ -3,10 +3,14 @@ Database models package.
 Exports all models for easy importing.
 """
 
+from app.models.alert_rule import AlertRule
 from app.models.api_key import APIKey
 from app.models.base import Base
+from app.models.dimension import URLPath, UserAgent
 from app.models.metric import Metric
+from app.models.metric_rollup import MetricRollup, MetricRollupState
 from app.models.project import Project
+from app.models.project_usage import ProjectUsage
 from app.models.user import User
 
 __all__ = [
@@ -15,4 +19,10 @@ __all__ = [
     "Project",
     "User",
     "APIKey",
+    "URLPath",
+    "UserAgent",
+    "AlertRule",
+    "MetricRollup",
+    "MetricRollupState",
+    "ProjectUsage",
 ]
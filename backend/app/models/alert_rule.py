@@ -0,0 +1,61 @@
+from http import HTTPMethod
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Enum, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.base import Base, TimestampMixin
+from app.models.dimension import URLPath
+from app.schemas.alert_rule import AlertMetric, AlertOperator
+
+if TYPE_CHECKING:
+    from app.models.project import Project
+
+
+class AlertRule(Base, TimestampMixin):
+    """
+    Threshold rule on a project's metrics, evaluated over a sliding window.
+
+    Rules are evaluated in memory by `app.core.alerting` from the ingest
+    stream; this table is only their definition.
+    """
+
+    __tablename__ = "alert_rules"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), index=True)
+    project: Mapped["Project"] = relationship(back_populates="alert_rules")
+
+    name: Mapped[str] = mapped_column(String(100))
+    metric: Mapped[AlertMetric] = mapped_column(
+        Enum(
+            AlertMetric,
+            name="alert_metric_enum",
+            values_callable=lambda e: [m.value for m in e],
+        )
+    )
+    operator: Mapped[AlertOperator] = mapped_column(
+        Enum(
+            AlertOperator,
+            name="alert_operator_enum",
+            values_callable=lambda e: [m.value for m in e],
+        )
+    )
+    threshold: Mapped[float]
+    window_seconds: Mapped[int]
+
+    # Optional endpoint filters
+    url_path_id: Mapped[int | None] = mapped_column(ForeignKey("url_paths.id"))
+    url_path_entry: Mapped[URLPath | None] = relationship(lazy="joined")
+    method: Mapped[HTTPMethod | None] = mapped_column(
+        Enum(HTTPMethod, name="http_method_enum")
+    )
+
+    webhook_url: Mapped[str | None] = mapped_column(String(2048))
+
+    is_active: Mapped[bool] = mapped_column(default=True)
+
+    @property
+    def url_path(self) -> str | None:
+        return self.url_path_entry.value if self.url_path_entry else None
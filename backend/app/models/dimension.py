@@ -0,0 +1,47 @@
+from sqlalchemy import Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+DIMENSION_VALUE_MAX_LENGTH = 1024
+
+
+class URLPath(Base):
+    """
+    Dictionary of distinct request paths.
+
+    Metrics reference a path by its integer id instead of repeating the string.
+    """
+
+    __tablename__ = "url_paths"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    value: Mapped[str] = mapped_column(String(DIMENSION_VALUE_MAX_LENGTH), unique=True)
+
+    __table_args__ = (
+        # Path prefix filters (LIKE 'prefix%') regardless of the collation
+        Index(
+            "ix_url_paths_value_pattern",
+            "value",
+            postgresql_ops={"value": "varchar_pattern_ops"},
+        ),
+    )
+
+    def __repr__(self):
+        return f"URLPath(id={self.id}, value={self.value})"
+
+
+class UserAgent(Base):
+    """
+    Dictionary of distinct user agent strings.
+
+    Metrics reference a user agent by its integer id instead of repeating the string.
+    """
+
+    __tablename__ = "user_agents"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    value: Mapped[str] = mapped_column(String(DIMENSION_VALUE_MAX_LENGTH), unique=True)
+
+    def __repr__(self):
+        return f"UserAgent(id={self.id}, value={self.value})"
@@ -2,48 +2,115 @@ from datetime import datetime
 from http import HTTPMethod
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Enum, ForeignKey, Index, func
+from sqlalchemy import Enum, ForeignKey, Index, SmallInteger, func, select, text
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core import latency_buckets
 from app.models.base import Base
+from app.models.dimension import URLPath, UserAgent
 
 if TYPE_CHECKING:
     from app.models.project import Project
 
+US_PER_MS = 1000.0
+
 
 class Metric(Base):
     """
     Database model for storing API request metrics.
+
+    `url_path` and `user_agent` are dictionary-encoded: the row only stores the
+    ids of the matching `url_paths` / `user_agents` entries.
+
+    The table is write-heavy, so it is kept narrow: response times are stored
+    as integer microseconds, status codes as smallint, and only the indexes
+    that `metric_service` queries actually use are maintained.
     """
 
     __tablename__ = "metrics"
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
-    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), index=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"))
     project: Mapped["Project"] = relationship(back_populates="metrics")
 
-    url_path: Mapped[str] = mapped_column(index=True)
+    url_path_id: Mapped[int] = mapped_column(ForeignKey("url_paths.id"))
+    url_path_entry: Mapped[URLPath] = relationship(lazy="joined", innerjoin=True)
+
     method: Mapped[HTTPMethod] = mapped_column(
-        Enum(HTTPMethod, name="http_method_enum"), index=True
+        Enum(HTTPMethod, name="http_method_enum")
     )
 
-    response_status_code: Mapped[int] = mapped_column(index=True)
+    response_status_code: Mapped[int] = mapped_column(SmallInteger)
 
-    response_time_ms: Mapped[float]
-    timestamp: Mapped[datetime] = mapped_column(server_default=func.now(), index=True)
+    response_time_us: Mapped[int]
+    # Fixed log bucket of `response_time_us`, see app.core.latency_buckets
+    latency_bucket: Mapped[int] = mapped_column(
+        SmallInteger,
+        default=lambda ctx: latency_buckets.bucket_for(
+            ctx.get_current_parameters()["response_time_us"]
+        ),
+    )
+    timestamp: Mapped[datetime] = mapped_column(server_default=func.now())
+
+    user_agent_id: Mapped[int | None] = mapped_column(ForeignKey("user_agents.id"))
+    user_agent_entry: Mapped[UserAgent | None] = relationship(lazy="joined")
 
-    user_agent: Mapped[str | None]
     ip_hash: Mapped[str | None]
 
     __table_args__ = (
+        # Every analytics query filters on project and time range
         Index("idx_project_timestamp", "project_id", "timestamp"),
-        Index("idx_project_url_path", "project_id", "url_path"),
-        Index("idx_project_method", "project_id", "method"),
-        Index("idx_project_status_code", "project_id", "response_status_code"),
-        Index("idx_status_timestamp", "response_status_code", "timestamp"),
-        Index("idx_project_url_method", "project_id", "url_path", "method"),
+        # Retention scans by time only; BRIN is tiny for append-ordered data
+        Index("idx_metrics_timestamp_brin", "timestamp", postgresql_using="brin"),
+        # Error drill-downs (4xx/5xx filters); errors are a small share of rows
+        Index(
+            "idx_project_errors_timestamp",
+            "project_id",
+            "timestamp",
+            postgresql_where=text("response_status_code >= 400"),
+        ),
     )
 
+    @hybrid_property
+    def response_time_ms(self) -> float:
+        return self.response_time_us / US_PER_MS
+
+    @response_time_ms.inplace.setter
+    def _response_time_ms_setter(self, value: float) -> None:
+        self.response_time_us = round(value * US_PER_MS)
+
+    @response_time_ms.inplace.expression
+    @classmethod
+    def _response_time_ms_expression(cls):
+        return cls.response_time_us / US_PER_MS
+
+    @hybrid_property
+    def url_path(self) -> str:
+        return self.url_path_entry.value
+
+    @url_path.inplace.expression
+    @classmethod
+    def _url_path_expression(cls):
+        return (
+            select(URLPath.value).where(URLPath.id == cls.url_path_id).scalar_subquery()
+        )
+
+    @hybrid_property
+    def user_agent(self) -> str | None:
+        return self.user_agent_entry.value if self.user_agent_entry else None
+
+    @user_agent.inplace.expression
+    @classmethod
+    def _user_agent_expression(cls):
+        return (
+            select(UserAgent.value)
+            .where(UserAgent.id == cls.user_agent_id)
+            .scalar_subquery()
+        )
+
     def __repr__(self):
-        return f"<Metric {self.method} {self.url_path} - {self.response_status_code}>"
+        return (
+            f"<Metric {self.method} {self.url_path_id} - {self.response_status_code}>"
+        )
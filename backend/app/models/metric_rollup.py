@@ -0,0 +1,57 @@
+from datetime import datetime
+from http import HTTPMethod
+
+from sqlalchemy import BigInteger, Enum, ForeignKey, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.schemas.metric import TimeGranularity
+
+granularity_enum = Enum(
+    TimeGranularity,
+    name="time_granularity_enum",
+    values_callable=lambda e: [m.value for m in e],
+)
+
+
+class MetricRollup(Base):
+    """
+    Pre-aggregated metrics per minute, hour or day.
+
+    One row per (bucket, project, endpoint, method, status code). Minute rows
+    are built from `metrics`, hour rows from minute rows and day rows from
+    hour rows by `rollup_service`; each level has its own retention, so long
+    ranges stay queryable after the raw rows are gone.
+    """
+
+    __tablename__ = "metric_rollups"
+
+    granularity: Mapped[TimeGranularity] = mapped_column(
+        granularity_enum, primary_key=True
+    )
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(primary_key=True)
+    url_path_id: Mapped[int] = mapped_column(
+        ForeignKey("url_paths.id"), primary_key=True
+    )
+    method: Mapped[HTTPMethod] = mapped_column(
+        Enum(HTTPMethod, name="http_method_enum"), primary_key=True
+    )
+    response_status_code: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+
+    request_count: Mapped[int]
+    response_time_sum_us: Mapped[int] = mapped_column(BigInteger)
+    response_time_min_us: Mapped[int]
+    response_time_max_us: Mapped[int]
+
+
+class MetricRollupState(Base):
+    """Range `[rolled_from, rolled_up_to)` already rolled up at each level."""
+
+    __tablename__ = "metric_rollup_state"
+
+    granularity: Mapped[TimeGranularity] = mapped_column(
+        granularity_enum, primary_key=True
+    )
+    rolled_from: Mapped[datetime]
+    rolled_up_to: Mapped[datetime]
@@ -1,12 +1,13 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy import BigInteger, ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.config import settings
 from app.models.base import Base, TimestampMixin
 
 if TYPE_CHECKING:
+    from app.models.alert_rule import AlertRule
     from app.models.api_key import APIKey
     from app.models.metric import Metric
     from app.models.user import User
@@ -36,8 +37,20 @@ class Project(Base, TimestampMixin):
         back_populates="project", cascade="all, delete-orphan"
     )
 
+    alert_rules: Mapped[list["AlertRule"]] = relationship(
+        back_populates="project", cascade="all, delete-orphan"
+    )
+
     is_active: Mapped[bool] = mapped_column(default=True)
 
+    # `/track` rate limit overrides (defaults: TRACK_RATE_LIMIT_*)
+    track_rate_limit_per_second: Mapped[float | None]
+    track_rate_limit_burst: Mapped[int | None]
+    # Metrics per calendar month: over `soft`, `/track` warns; at `hard`, it
+    # rejects (defaults: METRIC_QUOTA_*, no quota when unset)
+    metric_quota_soft: Mapped[int | None] = mapped_column(BigInteger)
+    metric_quota_hard: Mapped[int | None] = mapped_column(BigInteger)
+
     __table_args__ = (
         UniqueConstraint("user_id", "name", name="uq_user_project_name"),
         Index("idx_project_project_key", "project_key"),
@@ -0,0 +1,24 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ProjectUsage(Base):
+    """
+    Metrics ingested per project and calendar month (UTC), for quotas.
+
+    Each worker counts `/track` requests in memory (`app.core.quotas`) and
+    `usage_service` adds its counts here every few seconds.
+    """
+
+    __tablename__ = "project_usage"
+
+    project_id: Mapped[int] = mapped_column(
+        ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True
+    )
+    # First day of the month
+    period: Mapped[date] = mapped_column(primary_key=True)
+    metric_count: Mapped[int] = mapped_column(BigInteger, default=0)
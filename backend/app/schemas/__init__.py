@@ -1,3 +1,12 @@
+from app.schemas.alert_rule import (
+    AlertEvent,
+    AlertMetric,
+    AlertOperator,
+    AlertRuleCreate,
+    AlertRuleResponse,
+    AlertRuleUpdate,
+    AlertStatus,
+)
 from app.schemas.api_key import (
     APIKeyCreate,
     APIKeyCreateResponse,
@@ -7,16 +16,40 @@ from app.schemas.api_key import (
 )
 from app.schemas.auth import LoginRequest, TokenData, TokenResponse
 from app.schemas.metric import (
+    Accuracy,
+    CompareTo,
+    MetricAccountSummaryResponse,
+    MetricApproximation,
     MetricCreate,
+    MetricEndpointComparison,
     MetricEndpointStatsResponse,
+    MetricHeatmapCellResponse,
+    MetricLatencyBucketResponse,
+    MetricLiveFrameResponse,
+    MetricMarginOfError,
     MetricParams,
+    MetricProjectSummary,
     MetricQuery,
     MetricResponse,
+    MetricRow,
+    MetricRowList,
+    MetricStatsDelta,
+    MetricSummaryComparison,
     MetricSummaryResponse,
+    MetricSummaryStats,
     MetricTimeSeriesPointResponse,
+    SamplingParams,
+    SamplingQuery,
+    StatusClass,
     TimeGranularity,
 )
-from app.schemas.project import ProjectCreate, ProjectResponse, ProjectUpdate
+from app.schemas.project import (
+    ProjectCreate,
+    ProjectLimits,
+    ProjectResponse,
+    ProjectUpdate,
+    ProjectUsageResponse,
+)
 from app.schemas.user import UserCreate, UserResponse
 
 __all__ = [
@@ -26,8 +59,10 @@ __all__ = [
     "TokenData",
     # Project
     "ProjectCreate",
+    "ProjectLimits",
     "ProjectResponse",
     "ProjectUpdate",
+    "ProjectUsageResponse",
     # User
     "UserCreate",
     "UserResponse",
@@ -39,11 +74,37 @@ __all__ = [
     "APIKeyUpdate",
     # Metrics
     "MetricResponse",
+    "MetricRow",
+    "MetricRowList",
     "MetricSummaryResponse",
     "MetricTimeSeriesPointResponse",
     "MetricEndpointStatsResponse",
+    "MetricLiveFrameResponse",
     "MetricParams",
     "MetricQuery",
     "MetricCreate",
     "TimeGranularity",
+    "StatusClass",
+    "MetricLatencyBucketResponse",
+    "MetricHeatmapCellResponse",
+    "CompareTo",
+    "MetricStatsDelta",
+    "MetricSummaryStats",
+    "MetricSummaryComparison",
+    "MetricEndpointComparison",
+    "MetricProjectSummary",
+    "MetricAccountSummaryResponse",
+    "Accuracy",
+    "SamplingParams",
+    "SamplingQuery",
+    "MetricApproximation",
+    "MetricMarginOfError",
+    # Alerts
+    "AlertEvent",
+    "AlertMetric",
+    "AlertOperator",
+    "AlertRuleCreate",
+    "AlertRuleResponse",
+    "AlertRuleUpdate",
+    "AlertStatus",
 ]
@@ -0,0 +1,92 @@
+from enum import StrEnum
+from http import HTTPMethod
+
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field
+
+from app.core.types import NormalizedUrlPath, PublicHttpUrl
+
+
+class AlertMetric(StrEnum):
+    ERROR_RATE = "error_rate"
+    AVG_RESPONSE_TIME_MS = "avg_response_time_ms"
+    REQUEST_COUNT = "request_count"
+
+
+class AlertOperator(StrEnum):
+    GT = "gt"
+    LT = "lt"
+
+
+class AlertStatus(StrEnum):
+    FIRING = "firing"
+    RESOLVED = "resolved"
+
+
+class AlertRuleBase(BaseModel):
+    name: str = Field(..., max_length=100)
+    metric: AlertMetric = Field(..., description="Aggregate the rule watches")
+    operator: AlertOperator = Field(..., description="Fire when above/below")
+    threshold: float = Field(..., ge=0, description="Error rate in %, or ms")
+    window_seconds: int = Field(
+        300, ge=60, le=3600, description="Sliding window the metric is computed on"
+    )
+    url_path: NormalizedUrlPath | None = Field(
+        None, description="Only count requests to this endpoint path"
+    )
+    method: HTTPMethod | None = Field(
+        None, description="Only count requests with this method"
+    )
+    webhook_url: PublicHttpUrl | None = Field(
+        None, description="Receives a POST when the alert fires or resolves"
+    )
+
+
+class AlertRuleCreate(AlertRuleBase):
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "name": "Orders failing",
+                    "metric": "error_rate",
+                    "operator": "gt",
+                    "threshold": 5,
+                    "window_seconds": 300,
+                    "url_path": "/orders",
+                    "method": "POST",
+                    "webhook_url": "https://hooks.example.com/alerts",
+                }
+            ]
+        }
+    )
+
+
+class AlertRuleUpdate(BaseModel):
+    name: str | None = Field(None, max_length=100)
+    threshold: float | None = Field(None, ge=0)
+    window_seconds: int | None = Field(None, ge=60, le=3600)
+    webhook_url: PublicHttpUrl | None = None
+    is_active: bool | None = None
+
+
+class AlertRuleResponse(AlertRuleBase):
+    id: int
+    project_id: int
+    is_active: bool
+    created_at: AwareDatetime
+    webhook_url: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AlertEvent(BaseModel):
+    """Payload sent to the rule's webhook when its state changes."""
+
+    rule_id: int
+    project_id: int
+    name: str
+    status: AlertStatus
+    metric: AlertMetric
+    operator: AlertOperator
+    threshold: float
+    value: float | None = Field(..., description="Metric value over the window")
+    timestamp: AwareDatetime
@@ -1,7 +1,8 @@
-from datetime import timedelta, timezone
+import re
+from datetime import datetime, timedelta, timezone
 from enum import StrEnum
 from http import HTTPMethod, HTTPStatus
-from typing import Annotated, Self
+from typing import Annotated, Self, TypedDict
 
 from fastapi import Depends
 from pydantic import (
@@ -9,9 +10,12 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    PrivateAttr,
+    TypeAdapter,
     model_validator,
 )
 
+from app.core.config import settings
 from app.core.types import (
     NormalizedUrlPath,
     get_default_end_date,
@@ -73,6 +77,74 @@ class MetricResponse(MetricBase):
     )
 
 
+class MetricRow(TypedDict):
+    """A `MetricResponse` as selected by `metric_service.get_metrics`."""
+
+    url_path: str
+    method: HTTPMethod
+    response_status_code: int
+    response_time_ms: float
+    user_agent: str | None
+    id: int
+    timestamp: datetime
+    ip_hash: str | None
+
+
+# Encodes rows straight to JSON bytes, without building or validating models
+MetricRowList = TypeAdapter(list[MetricRow])
+
+
+class Accuracy(StrEnum):
+    EXACT = "exact"
+    APPROXIMATE = "approximate"
+
+
+class SamplingParams(BaseModel):
+    accuracy: Accuracy = Field(
+        default=Accuracy.EXACT,
+        description="`approximate` answers from a random sample of the rows",
+    )
+    sample_percent: float = Field(
+        default=settings.APPROXIMATE_SAMPLE_PERCENT,
+        gt=0,
+        le=100,
+        description="Percentage of rows sampled when `accuracy=approximate`",
+    )
+
+    @property
+    def fraction(self) -> float | None:
+        """Sampled fraction of the rows, None for exact queries."""
+        if self.accuracy == Accuracy.EXACT:
+            return None
+        return self.sample_percent / 100
+
+
+SamplingQuery = Annotated[SamplingParams, Depends()]
+
+
+class MetricMarginOfError(BaseModel):
+    """Half-width of the 95% confidence interval of each estimate."""
+
+    request_count: float
+    error_count: float
+    avg_response_time_ms: float | None = Field(
+        ..., description="None when fewer than two rows were sampled"
+    )
+    error_rate: float | None = Field(
+        ..., description="In percentage points, None when no row was sampled"
+    )
+
+
+class MetricApproximation(BaseModel):
+    sample_percent: float = Field(..., description="Percentage of rows sampled")
+    sampled_requests: int = Field(..., description="Rows the estimates are based on")
+    margin_of_error: MetricMarginOfError | None = Field(
+        ...,
+        description="None with SYSTEM sampling: rows of a sampled page are "
+        "correlated, so the margins of independent sampling don't hold",
+    )
+
+
 class MetricTimeSeriesPointResponse(BaseModel):
     timestamp: AwareDatetime = Field(..., description="Timestamp")
     request_count: int = Field(..., description="Number of requests")
@@ -80,6 +152,9 @@ class MetricTimeSeriesPointResponse(BaseModel):
         ..., description="Average response time in milliseconds"
     )
     error_count: int = Field(..., description="Number of errors")
+    approximation: MetricApproximation | None = Field(
+        None, description="Only present for `accuracy=approximate` estimates"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -95,6 +170,41 @@ class MetricTimeSeriesPointResponse(BaseModel):
     )
 
 
+class MetricLiveFrameResponse(BaseModel):
+    """Aggregate of the metrics ingested during one second."""
+
+    timestamp: AwareDatetime = Field(..., description="Start of the second")
+    request_count: int = Field(..., description="Number of requests")
+    error_count: int = Field(..., description="Number of errors")
+    avg_response_time_ms: float = Field(
+        ..., description="Average response time in milliseconds"
+    )
+    p95_response_time_ms: float = Field(
+        ..., description="95th percentile response time in milliseconds"
+    )
+
+
+class MetricLatencyBucketResponse(BaseModel):
+    bucket: int = Field(..., description="Fixed logarithmic latency bucket index")
+    lower_ms: float = Field(..., description="Inclusive lower bound in milliseconds")
+    upper_ms: float | None = Field(
+        ..., description="Exclusive upper bound in milliseconds (None: unbounded)"
+    )
+    request_count: int = Field(..., description="Number of requests")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {"bucket": 29, "lower_ms": 16.0, "upper_ms": 19.03, "request_count": 42}
+            ]
+        }
+    )
+
+
+class MetricHeatmapCellResponse(MetricLatencyBucketResponse):
+    timestamp: AwareDatetime = Field(..., description="Start of the time bucket")
+
+
 class PerformanceStatsMixin(BaseModel):
     """Common performance statistics fields."""
 
@@ -114,10 +224,50 @@ class PerformanceStatsMixin(BaseModel):
     )
 
 
-class MetricSummaryResponse(PerformanceStatsMixin):
+class MetricSummaryStats(PerformanceStatsMixin):
+    requests_per_minute: float = Field(..., description="Requests per minute")
+
+
+class CompareTo(StrEnum):
+    PREVIOUS_PERIOD = "previous_period"
+    PREVIOUS_DAY = "previous_day"
+    PREVIOUS_WEEK = "previous_week"
+
+
+class MetricStatsDelta(BaseModel):
+    """Current minus previous value of each statistic."""
+
+    request_count: int
+    avg_response_time_ms: float
+    error_count: int
+    error_rate: float = Field(..., description="Difference in percentage points")
+    slowest_request_ms: float
+    fastest_request_ms: float
+
+
+class MetricSummaryComparison(BaseModel):
+    compare_to: CompareTo
+    start_date: AwareDatetime = Field(..., description="Start of the previous window")
+    end_date: AwareDatetime = Field(..., description="End of the previous window")
+    previous: MetricSummaryStats
+    delta: MetricStatsDelta
+
+
+class MetricEndpointComparison(BaseModel):
+    compare_to: CompareTo
+    previous: PerformanceStatsMixin
+    delta: MetricStatsDelta
+
+
+class MetricSummaryResponse(MetricSummaryStats):
     """Schema for summary statistics."""
 
-    requests_per_minute: float = Field(..., description="Requests per minute")
+    comparison: MetricSummaryComparison | None = Field(
+        None, description="Only present when `compare_to` is requested"
+    )
+    approximation: MetricApproximation | None = Field(
+        None, description="Only present for `accuracy=approximate` estimates"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -136,9 +286,26 @@ class MetricSummaryResponse(PerformanceStatsMixin):
     )
 
 
+class MetricProjectSummary(MetricSummaryStats):
+    project_key: str = Field(..., description="Project key")
+    name: str = Field(..., description="Project name")
+
+
+class MetricAccountSummaryResponse(MetricSummaryStats):
+    """Summary over several projects, with a per-project breakdown."""
+
+    projects: list[MetricProjectSummary]
+
+
 class MetricEndpointStatsResponse(PerformanceStatsMixin):
     url_path: str = Field(..., description="API endpoint path")
     method: HTTPMethod = Field(..., description="HTTP method")
+    comparison: MetricEndpointComparison | None = Field(
+        None, description="Only present when `compare_to` is requested"
+    )
+    approximation: MetricApproximation | None = Field(
+        None, description="Only present for `accuracy=approximate` estimates"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -158,6 +325,59 @@ class MetricEndpointStatsResponse(PerformanceStatsMixin):
     )
 
 
+class TimeGranularity(StrEnum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+    @property
+    def duration(self) -> timedelta:
+        return {
+            TimeGranularity.MINUTE: timedelta(minutes=1),
+            TimeGranularity.HOUR: timedelta(hours=1),
+            TimeGranularity.DAY: timedelta(days=1),
+        }[self]
+
+    def floor(self, value: datetime) -> datetime:
+        """Start of the (UTC) minute / hour / day containing `value`."""
+        value = value.astimezone(timezone.utc).replace(second=0, microsecond=0)
+        if self != TimeGranularity.MINUTE:
+            value = value.replace(minute=0)
+        if self == TimeGranularity.DAY:
+            value = value.replace(hour=0)
+        return value
+
+    def ceil(self, value: datetime) -> datetime:
+        floor = self.floor(value)
+        return floor if floor == value else floor + self.duration
+
+
+# Longer ranges are aligned to whole hours / days, so they can be answered
+# from the hour / day rollups
+HOUR_ALIGNED_RANGE = timedelta(days=60)
+DAY_ALIGNED_RANGE = timedelta(days=400)
+# Without rollups every range is read from the raw metrics
+RAW_MAX_RANGE = timedelta(days=60)
+ROLLUP_MAX_RANGE = timedelta(days=5 * 366)
+
+
+def max_range() -> timedelta:
+    return ROLLUP_MAX_RANGE if settings.ROLLUPS_ENABLED else RAW_MAX_RANGE
+
+
+class StatusClass(StrEnum):
+    SUCCESS = "2xx"
+    REDIRECT = "3xx"
+    CLIENT_ERROR = "4xx"
+    SERVER_ERROR = "5xx"
+
+    @property
+    def status_range(self) -> tuple[int, int]:
+        """Inclusive lower and exclusive upper status code bound."""
+        low = int(self.value[0]) * 100
+        return low, low + 100
+
+
 class MetricParams(BaseModel):
     start_date: AwareDatetime | None = Field(
         default=None,
@@ -170,6 +390,64 @@ class MetricParams(BaseModel):
     page: int = Field(default=1, ge=1, description="Page number")
     page_size: int = Field(default=1000, ge=1, le=10000, description="Items per page")
 
+    # Dimension filters
+    method: HTTPMethod | None = Field(
+        default=None, description="Only requests with this HTTP method"
+    )
+    status_class: StatusClass | None = Field(
+        default=None, description="Only responses in this status class"
+    )
+    status_code: int | None = Field(
+        default=None, ge=100, le=599, description="Only responses with this status"
+    )
+    url_path: NormalizedUrlPath | None = Field(
+        default=None,
+        description="Path prefix (`/checkout` matches `/checkout/...`) or template "
+        "with `{param}` / `*` segments (`/users/{id}/orders`)",
+    )
+
+    @property
+    def url_path_template(self) -> tuple[str, str] | None:
+        """
+        For a templated `url_path`, its literal leading part (usable as an
+        index-friendly prefix) and an anchored regex matching whole paths.
+        """
+        if self.url_path is None:
+            return None
+        segments = self.url_path.split("/")
+        placeholders = [
+            segment == "*" or (segment.startswith("{") and segment.endswith("}"))
+            for segment in segments
+        ]
+        if not any(placeholders):
+            return None
+
+        prefix = "/".join(segments[: placeholders.index(True)]) + "/"
+        regex = "/".join(
+            "[^/]+" if placeholder else re.escape(segment)
+            for segment, placeholder in zip(segments, placeholders)
+        )
+        return prefix, f"^{regex}$"
+
+    _resolution: TimeGranularity = PrivateAttr(default=TimeGranularity.MINUTE)
+
+    @property
+    def resolution(self) -> TimeGranularity:
+        """Unit the range is aligned to, and the finest usable granularity."""
+        return self._resolution
+
+    @property
+    def has_dimension_filters(self) -> bool:
+        return any(
+            value is not None
+            for value in (
+                self.method,
+                self.status_class,
+                self.status_code,
+                self.url_path,
+            )
+        )
+
     @model_validator(mode="after")
     def validate_dates(self) -> Self:
         if self.start_date is None:
@@ -183,23 +461,29 @@ class MetricParams(BaseModel):
         if self.end_date < self.start_date:
             raise ValueError("end_date cannot be before start_date")
 
-        if self.end_date - self.start_date > timedelta(days=60):
-            raise ValueError("Date range must be 60 days or less")
+        if self.end_date - self.start_date > max_range():
+            raise ValueError(f"Date range must be {max_range().days} days or less")
 
         if self.end_date - self.start_date < timedelta(minutes=1):
             raise ValueError("Date range must be at least 1 minute")
 
-        # Truncate to the minute
-        self.start_date = self.start_date.replace(second=0, microsecond=0)
-        self.end_date = self.end_date.replace(second=59, microsecond=999999)
+        # Widen to whole minutes (hours / days for long ranges); end is inclusive
+        length = self.end_date - self.start_date
+        if length > DAY_ALIGNED_RANGE:
+            resolution = TimeGranularity.DAY
+        elif length > HOUR_ALIGNED_RANGE:
+            resolution = TimeGranularity.HOUR
+        else:
+            resolution = TimeGranularity.MINUTE
+        self._resolution = resolution
+        self.start_date = resolution.floor(self.start_date)
+        self.end_date = (
+            resolution.floor(self.end_date)
+            + resolution.duration
+            - timedelta(microseconds=1)
+        )
 
         return self
 
 
 MetricQuery = Annotated[MetricParams, Depends()]
-
-
-class TimeGranularity(StrEnum):
-    MINUTE = "minute"
-    HOUR = "hour"
-    DAY = "day"
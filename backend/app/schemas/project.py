@@ -1,3 +1,5 @@
+from datetime import date
+
 from pydantic import (
     AwareDatetime,
     BaseModel,
@@ -56,6 +58,17 @@ class ProjectUpdate(BaseModel):
     )
 
 
+class ProjectLimits(BaseModel):
+    """Per-project overrides set by operators (`python -m app.cli`), not owners."""
+
+    # `/track` rate limit overrides, `null` for TRACK_RATE_LIMIT_*
+    track_rate_limit_per_second: float | None = Field(None, gt=0)
+    track_rate_limit_burst: int | None = Field(None, ge=1)
+    # Monthly metric quota overrides, `null` for METRIC_QUOTA_*
+    metric_quota_soft: int | None = Field(None, ge=1)
+    metric_quota_hard: int | None = Field(None, ge=1)
+
+
 class ProjectResponse(ProjectBase):
     """Schema for project in responses."""
 
@@ -63,6 +76,10 @@ class ProjectResponse(ProjectBase):
     project_key: str
     user_id: int
     is_active: bool
+    track_rate_limit_per_second: float | None = None
+    track_rate_limit_burst: int | None = None
+    metric_quota_soft: int | None = None
+    metric_quota_hard: int | None = None
     created_at: AwareDatetime
     updated_at: AwareDatetime | None
 
@@ -77,6 +94,10 @@ class ProjectResponse(ProjectBase):
                     "project_key": "production-api-a1b2",
                     "user_id": 1,
                     "is_active": True,
+                    "track_rate_limit_per_second": None,
+                    "track_rate_limit_burst": None,
+                    "metric_quota_soft": None,
+                    "metric_quota_hard": None,
                     "created_at": "2026-01-01T12:00:00Z",
                     "updated_at": "2026-01-01T12:00:00Z",
                 }
@@ -106,6 +127,10 @@ class ProjectDetailResponse(ProjectResponse):
                     "project_key": "production-api-a1b2",
                     "user_id": 1,
                     "is_active": True,
+                    "track_rate_limit_per_second": None,
+                    "track_rate_limit_burst": None,
+                    "metric_quota_soft": None,
+                    "metric_quota_hard": None,
                     "created_at": "2026-01-01T12:00:00Z",
                     "updated_at": "2026-01-01T12:00:00Z",
                     "total_api_keys": 5,
@@ -133,3 +158,27 @@ class ProjectListResponse(BaseModel):
             "examples": [{"items": [], "total": 0, "page": 1, "page_size": 20}]
         }
     )
+
+
+class ProjectUsageResponse(BaseModel):
+    """Metrics ingested this month, against the project's quota."""
+
+    period_start: date
+    reset_at: AwareDatetime
+    metric_count: int
+    soft_limit: int | None
+    hard_limit: int | None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "period_start": "2026-01-01",
+                    "reset_at": "2026-02-01T00:00:00Z",
+                    "metric_count": 812345,
+                    "soft_limit": 800000,
+                    "hard_limit": 1000000,
+                }
+            ]
+        }
+    )
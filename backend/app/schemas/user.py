@@ -1,14 +1,14 @@
 from fastapi.openapi.models import EmailStr
-from pydantic import AwareDatetime, BaseModel, ConfigDict
-
-from app.core.types import SecurePassword
+from pydantic import AwareDatetime, BaseModel, ConfigDict, SecretStr
 
 
 class UserCreate(BaseModel):
     """Schema for user registration."""
 
     email: EmailStr
-    password: SecurePassword
+    # Strength is checked by `auth_service.register`, off the event loop
+    # (zxcvbn is CPU-heavy)
+    password: SecretStr
     full_name: str | None = None
 
     model_config = ConfigDict(
@@ -1,15 +1,25 @@
 from app.services import (
+    alert_service,
     api_key_service,
+    archive_service,
     auth_service,
+    dimension_service,
     metric_service,
     project_service,
+    rollup_service,
+    usage_service,
     user_service,
 )
 
 __all__ = [
+    "alert_service",
     "api_key_service",
+    "archive_service",
     "auth_service",
+    "dimension_service",
     "metric_service",
     "project_service",
+    "rollup_service",
+    "usage_service",
     "user_service",
 ]
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from typing import Sequence
+
+from fastapi import status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.core import alerting, db
+from app.core.config import settings
+from app.core.exceptions import APIError
+from app.services import dimension_service
+
+logger = logging.getLogger(__name__)
+
+
+async def create_alert_rule(
+    rule_in: schemas.AlertRuleCreate, project: models.Project, session: AsyncSession
+) -> models.AlertRule:
+    stmt = select(func.count(models.AlertRule.id)).where(
+        models.AlertRule.project_id == project.id
+    )
+    if (await session.execute(stmt)).scalar_one() >= settings.ALERT_RULE_PROJECT_LIMIT:
+        raise APIError(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Project has reached the maximum number of alert rules",
+        )
+
+    data = rule_in.model_dump(exclude={"url_path", "webhook_url"})
+    rule = models.AlertRule(
+        **data,
+        project_id=project.id,
+        url_path_id=await dimension_service.get_url_path_id(session, rule_in.url_path)
+        if rule_in.url_path
+        else None,
+        webhook_url=str(rule_in.webhook_url) if rule_in.webhook_url else None,
+    )
+    session.add(rule)
+    await session.commit()
+    await session.refresh(rule)
+
+    alerting.engine.upsert(rule)
+    return rule
+
+
+async def list_alert_rules(
+    project_id: int, session: AsyncSession
+) -> Sequence[models.AlertRule]:
+    stmt = (
+        select(models.AlertRule)
+        .where(models.AlertRule.project_id == project_id)
+        .order_by(models.AlertRule.created_at.desc())
+    )
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def get_alert_rule(
+    rule_id: int, project_id: int, session: AsyncSession
+) -> models.AlertRule:
+    stmt = select(models.AlertRule).where(
+        models.AlertRule.id == rule_id,
+        models.AlertRule.project_id == project_id,
+    )
+    rule = (await session.execute(stmt)).scalar_one_or_none()
+    if rule is None:
+        raise APIError(
+            status_code=status.HTTP_404_NOT_FOUND, message="Alert rule not found"
+        )
+    return rule
+
+
+async def update_alert_rule(
+    rule_id: int,
+    project_id: int,
+    update_data: schemas.AlertRuleUpdate,
+    session: AsyncSession,
+) -> models.AlertRule:
+    rule = await get_alert_rule(rule_id, project_id, session)
+
+    update_dict = update_data.model_dump(exclude_unset=True)
+    if "webhook_url" in update_dict:
+        webhook_url = update_dict.pop("webhook_url")
+        rule.webhook_url = str(webhook_url) if webhook_url else None
+    for key, value in update_dict.items():
+        setattr(rule, key, value)
+
+    await session.commit()
+    await session.refresh(rule)
+
+    alerting.engine.upsert(rule)
+    return rule
+
+
+async def delete_alert_rule(
+    rule_id: int, project_id: int, session: AsyncSession
+) -> None:
+    rule = await get_alert_rule(rule_id, project_id, session)
+    await session.delete(rule)
+    await session.commit()
+
+    alerting.engine.remove(rule_id)
+
+
+async def get_active_rules(session: AsyncSession) -> Sequence[models.AlertRule]:
+    stmt = (
+        select(models.AlertRule)
+        .join(models.Project)
+        .where(models.AlertRule.is_active.is_(True), models.Project.is_active.is_(True))
+    )
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def run_alerting() -> None:
+    """
+    Evaluate every rule once per second, re-reading the definitions every
+    `ALERT_RULES_REFRESH_SECONDS` so edits made through other workers apply.
+
+    Every worker runs this loop to share its counts; only the one holding
+    the leader lease evaluates and notifies (see `alerting`).
+    """
+    last_refresh = float("-inf")
+    while True:
+        try:
+            if time.monotonic() - last_refresh >= settings.ALERT_RULES_REFRESH_SECONDS:
+                async with db.AsyncSessionLocal() as session:
+                    alerting.engine.load(await get_active_rules(session))
+                last_refresh = time.monotonic()
+            await alerting.engine.tick()
+        except Exception:
+            logger.exception("Alert evaluation failed")
+        await asyncio.sleep(1 - time.time() % 1)
@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
 from typing import Sequence
 
 from fastapi import status
@@ -5,9 +9,17 @@ from sqlalchemy import func, select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
+from app.core import db
+from app.core.api_key_filter import key_filter
 from app.core.config import settings
 from app.core.exceptions import APIError
 
+logger = logging.getLogger(__name__)
+
+# `created_at` is the creating transaction's start time: reload keys this much
+# older than the newest one seen, in case their transaction committed later
+_REFRESH_OVERLAP = timedelta(minutes=1)
+
 
 async def create_api_key(
     key_in: schemas.APIKeyCreate, project: models.Project, session: AsyncSession
@@ -28,6 +40,7 @@ async def create_api_key(
     session.add(api_key)
     await session.commit()
     await session.refresh(api_key)
+    key_filter.add(api_key.key_prefix)
 
     return api_key, plain_key
 
@@ -74,6 +87,7 @@ async def update_api_key(
 
     await session.commit()
     await session.refresh(api_key)
+    key_filter.forget_rejections()
     return api_key
 
 
@@ -98,6 +112,7 @@ async def rotate_api_key(
 
     await session.commit()
     await session.refresh(new_api_key)
+    key_filter.add(new_api_key.key_prefix)
 
     return new_api_key, new_plain_key
 
@@ -123,3 +138,38 @@ async def delete_api_key(
 
     await session.delete(api_key)
     await session.commit()
+
+
+async def refresh_key_filter(session: AsyncSession, rebuild: bool = False) -> None:
+    """Load the key prefixes created since the last refresh, or all of them."""
+    stmt = select(models.APIKey.key_prefix, models.APIKey.created_at)
+    if not rebuild and key_filter.watermark is not None:
+        stmt = stmt.where(
+            models.APIKey.created_at >= key_filter.watermark - _REFRESH_OVERLAP
+        )
+    rows = (await session.execute(stmt)).all()
+
+    prefixes = [row.key_prefix for row in rows]
+    watermark = max((row.created_at for row in rows), default=key_filter.watermark)
+    if rebuild:
+        key_filter.rebuild(prefixes, watermark)
+    else:
+        key_filter.extend(prefixes, watermark)
+
+
+async def run_key_filter_refresh() -> None:
+    """Keep the API key filter up to date (see `app.core.api_key_filter`)."""
+    rebuilt_at = None
+    while True:
+        rebuild = (
+            rebuilt_at is None
+            or time.monotonic() - rebuilt_at >= settings.API_KEY_FILTER_REBUILD_SECONDS
+        )
+        try:
+            async with db.AsyncSessionLocal() as session:
+                await refresh_key_filter(session, rebuild=rebuild)
+            if rebuild:
+                rebuilt_at = time.monotonic()
+        except Exception:
+            logger.exception("API key filter refresh failed")
+        await asyncio.sleep(settings.API_KEY_FILTER_REFRESH_SECONDS)
@@ -0,0 +1,321 @@
+"""
+Cold-tier storage for metrics older than the retention window.
+
+Expiring rows are written to compressed Parquet files laid out as
+`<ARCHIVE_PATH>/metrics/project_id=<id>/day=<YYYY-MM-DD>/*.parquet` and are
+queried back with an embedded DuckDB engine, so Postgres only keeps the hot
+window while history stays available.
+
+Requires the optional `archive` extra (`duckdb`, `pyarrow`).
+"""
+
+import asyncio
+import importlib
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.core import latency_buckets
+from app.core.config import settings
+
+
+def is_enabled() -> bool:
+    return settings.ARCHIVE_PATH is not None
+
+
+def reaches_archive(params: schemas.MetricParams) -> bool:
+    """Whether part of the requested range may only exist in the archive."""
+    if not is_enabled():
+        return False
+    hot_window_start = datetime.now(timezone.utc) - timedelta(
+        days=settings.METRICS_RETENTION_DAYS
+    )
+    return params.start_date < hot_window_start
+
+
+async def archive_metrics(session: AsyncSession, cutoff: datetime) -> int:
+    """
+    Move every metric older than `cutoff` to the archive, returning how many.
+
+    Rows go in id order and in fixed-size batches. Each batch deletes exactly
+    the rows it wrote, so a row that commits late (below ids already moved) is
+    left for the next run rather than deleted unarchived. Before writing, the
+    batch's id range is saved as pending next to the files; if a run dies
+    before clearing it, the next one keeps the batch when its rows are gone
+    from Postgres (the delete committed) and removes its files otherwise.
+    """
+    pa = _require("pyarrow")
+    pq = _require("pyarrow.parquet")
+
+    query = (
+        select(
+            models.Metric.id,
+            models.Metric.project_id,
+            models.Metric.timestamp,
+            models.URLPath.value.label("url_path"),
+            models.Metric.method,
+            models.Metric.response_status_code,
+            models.Metric.response_time_us,
+            models.UserAgent.value.label("user_agent"),
+            models.Metric.ip_hash,
+        )
+        .join(models.URLPath, models.URLPath.id == models.Metric.url_path_id)
+        .outerjoin(models.UserAgent, models.UserAgent.id == models.Metric.user_agent_id)
+        .where(models.Metric.timestamp < cutoff)
+        .order_by(models.Metric.id)
+        .limit(settings.ARCHIVE_BATCH_SIZE)
+    )
+
+    await _recover_pending(session)
+    moved = 0
+    while True:
+        result = await session.execute(query)
+        rows = result.all()
+        if not rows:
+            break
+
+        # Parquet keeps naive UTC timestamps; DuckDB reads them back as such
+        timestamps = [row.timestamp.astimezone(timezone.utc) for row in rows]
+        table = pa.table(
+            {
+                "project_id": pa.array([row.project_id for row in rows], pa.int32()),
+                "day": pa.array([ts.date().isoformat() for ts in timestamps]),
+                "timestamp": pa.array(
+                    [ts.replace(tzinfo=None) for ts in timestamps], pa.timestamp("us")
+                ),
+                "url_path": pa.array([row.url_path for row in rows]),
+                "method": pa.array([row.method.value for row in rows]),
+                "response_status_code": pa.array(
+                    [row.response_status_code for row in rows], pa.int16()
+                ),
+                "response_time_us": pa.array(
+                    [row.response_time_us for row in rows], pa.int32()
+                ),
+                "user_agent": pa.array([row.user_agent for row in rows], pa.string()),
+                "ip_hash": pa.array([row.ip_hash for row in rows], pa.string()),
+            }
+        )
+
+        # Named after the batch's id range, see `_recover_pending`
+        batch = f"{rows[0].id}-{rows[-1].id}"
+        await asyncio.to_thread(_write_pending, batch)
+        await asyncio.to_thread(
+            pq.write_to_dataset,
+            table,
+            root_path=str(_metrics_root()),
+            partition_cols=["project_id", "day"],
+            basename_template=f"metrics-{batch}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            compression=settings.ARCHIVE_COMPRESSION,
+        )
+        await _delete_batch(session, [row.id for row in rows])
+        await session.commit()
+        await asyncio.to_thread(_clear_pending)
+        moved += len(rows)
+
+    return moved
+
+
+async def get_summary(
+    project_id: int, params: schemas.MetricParams
+) -> list[dict[str, Any]]:
+    return await _query(
+        project_id,
+        params,
+        f"SELECT {_AGGREGATES} FROM metrics WHERE {{where}} HAVING count(*) > 0",
+    )
+
+
+async def get_time_series(
+    project_id: int,
+    params: schemas.MetricParams,
+    granularity: schemas.TimeGranularity,
+) -> list[dict[str, Any]]:
+    bucket = f"date_trunc('{granularity.value}', timestamp)"
+    return await _query(
+        project_id,
+        params,
+        f"SELECT {bucket} AS timestamp, {_AGGREGATES} "
+        f"FROM metrics WHERE {{where}} GROUP BY 1 ORDER BY 1",
+    )
+
+
+async def get_endpoints_stats(
+    project_id: int, params: schemas.MetricParams
+) -> list[dict[str, Any]]:
+    return await _query(
+        project_id,
+        params,
+        f"SELECT url_path, method, {_AGGREGATES} "
+        f"FROM metrics WHERE {{where}} GROUP BY url_path, method",
+    )
+
+
+async def get_histogram(
+    project_id: int, params: schemas.MetricParams
+) -> list[dict[str, Any]]:
+    return await _query(
+        project_id,
+        params,
+        f"SELECT {_LATENCY_BUCKET} AS latency_bucket, count(*) AS request_count "
+        f"FROM metrics WHERE {{where}} GROUP BY 1",
+        {"latency_bounds": latency_buckets.BOUNDS_US},
+    )
+
+
+async def get_heatmap(
+    project_id: int,
+    params: schemas.MetricParams,
+    granularity: schemas.TimeGranularity,
+) -> list[dict[str, Any]]:
+    bucket = f"date_trunc('{granularity.value}', timestamp)"
+    return await _query(
+        project_id,
+        params,
+        f"SELECT {bucket} AS timestamp, {_LATENCY_BUCKET} AS latency_bucket, "
+        f"count(*) AS request_count FROM metrics WHERE {{where}} GROUP BY 1, 2",
+        {"latency_bounds": latency_buckets.BOUNDS_US},
+    )
+
+
+# Archived rows don't store the bucket: bisect the same fixed boundaries
+_LATENCY_BUCKET = "len(list_filter($latency_bounds, b -> b <= response_time_us))"
+
+_AGGREGATES = """
+    count(*) AS request_count,
+    avg(response_time_us) / 1000.0 AS avg_response_time_ms,
+    sum(CASE WHEN response_status_code >= 400 THEN 1 ELSE 0 END) AS error_count,
+    max(response_time_us) / 1000.0 AS slowest_request_ms,
+    min(response_time_us) / 1000.0 AS fastest_request_ms
+"""
+
+# `day` is the hive partition column, filtering on it prunes whole directories
+_RANGE = """
+    day BETWEEN $start_day AND $end_day
+    AND timestamp BETWEEN $start_date AND $end_date
+"""
+
+
+async def _query(
+    project_id: int,
+    params: schemas.MetricParams,
+    sql: str,
+    extra_parameters: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    project_root = _metrics_root() / f"project_id={project_id}"
+    if not project_root.is_dir():
+        return []
+
+    start = params.start_date.astimezone(timezone.utc).replace(tzinfo=None)
+    end = params.end_date.astimezone(timezone.utc).replace(tzinfo=None)
+    where = [_RANGE]
+    parameters: dict[str, Any] = {
+        "start_day": start.date().isoformat(),
+        "end_day": end.date().isoformat(),
+        "start_date": start,
+        "end_date": end,
+    }
+
+    # Same dimension filters as metric_service._dimension_filters
+    if params.method is not None:
+        where.append("method = $method")
+        parameters["method"] = params.method.value
+    if params.status_code is not None:
+        where.append("response_status_code = $status_code")
+        parameters["status_code"] = params.status_code
+    if params.status_class is not None:
+        where.append("response_status_code >= $status_low")
+        where.append("response_status_code < $status_high")
+        parameters["status_low"], parameters["status_high"] = (
+            params.status_class.status_range
+        )
+    if params.url_path is not None:
+        if template := params.url_path_template:
+            where.append("regexp_full_match(url_path, $url_path_regex)")
+            parameters["url_path_regex"] = template[1]
+        else:
+            where.append("(url_path = $url_path OR starts_with(url_path, $url_prefix))")
+            parameters["url_path"] = params.url_path
+            parameters["url_prefix"] = params.url_path.rstrip("/") + "/"
+
+    parameters |= extra_parameters or {}
+    sql = sql.format(where=" AND ".join(where))
+    return await asyncio.to_thread(_run_duckdb, project_root, sql, parameters)
+
+
+def _run_duckdb(
+    project_root: Path, sql: str, parameters: dict[str, Any]
+) -> list[dict[str, Any]]:
+    duckdb = _require("duckdb")
+
+    files = str(project_root / "*" / "*.parquet").replace("'", "''")
+    with duckdb.connect() as conn:
+        conn.execute(
+            "CREATE VIEW metrics AS SELECT * FROM read_parquet("
+            f"'{files}', hive_partitioning = true, hive_types = {{'day': VARCHAR}})"
+        )
+        cursor = conn.execute(sql, parameters)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _metrics_root() -> Path:
+    return Path(settings.ARCHIVE_PATH or "") / "metrics"
+
+
+def _pending_path() -> Path:
+    return _metrics_root() / "_pending_batch"
+
+
+def _write_pending(batch: str) -> None:
+    path = _pending_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staged = path.with_name(f"{path.name}.tmp")
+    staged.write_text(str(batch))
+    # Atomic: a crash leaves either no marker or a complete one
+    os.replace(staged, path)
+
+
+def _clear_pending() -> None:
+    _pending_path().unlink(missing_ok=True)
+
+
+async def _delete_batch(session: AsyncSession, ids: list[int]) -> None:
+    await session.execute(delete(models.Metric).where(models.Metric.id.in_(ids)))
+
+
+async def _recover_pending(session: AsyncSession) -> None:
+    """
+    Settle the batch a previous run left pending. Its delete is one
+    transaction: if its first row is still in Postgres none of its rows were
+    deleted, and its (possibly partial) files are removed to be written again.
+    """
+    try:
+        batch = _pending_path().read_text()
+    except FileNotFoundError:
+        return
+    first_id = int(batch.split("-")[0])
+    query = select(models.Metric.id).where(models.Metric.id == first_id)
+    if await session.scalar(query) is not None:
+        await asyncio.to_thread(_remove_batch, batch)
+    await asyncio.to_thread(_clear_pending)
+
+
+def _remove_batch(batch: str) -> None:
+    for path in _metrics_root().glob(f"project_id=*/day=*/metrics-{batch}-*.parquet"):
+        path.unlink()
+
+
+def _require(module: str) -> ModuleType:
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise RuntimeError(
+            f"Metric archiving requires '{module}'. Install the 'archive' extra."
+        ) from e
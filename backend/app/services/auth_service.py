@@ -1,4 +1,6 @@
 from fastapi import status
+from fastapi.exceptions import RequestValidationError
+from pydantic import SecretStr
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
@@ -9,12 +11,15 @@ from app.services import user_service
 
 
 async def register(user: schemas.UserCreate, session: AsyncSession) -> models.User:
+    await validate_password(user.password)
     if await user_service.get_user_by_email(user.email, session):
         raise APIError(
             status_code=status.HTTP_400_BAD_REQUEST, message="Email already registered"
         )
 
-    hashed_password = security.hash_password(user.password.get_secret_value())
+    hashed_password = await security.password_executor.run(
+        security.hash_password, user.password.get_secret_value()
+    )
     new_user = models.User(
         email=user.email, hashed_password=hashed_password, full_name=user.full_name
     )
@@ -26,6 +31,23 @@ async def register(user: schemas.UserCreate, session: AsyncSession) -> models.Us
     return new_user
 
 
+async def validate_password(password: SecretStr) -> None:
+    """Password strength check, reported like a request validation error."""
+    try:
+        await security.password_executor.run(security.validate_password, password)
+    except ValueError as e:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "value_error",
+                    "loc": ("body", "password"),
+                    "msg": f"Value error, {e}",
+                    "input": "**********",
+                }
+            ]
+        ) from e
+
+
 def create_user_token(user: models.User) -> schemas.TokenResponse:
     token_data = schemas.TokenData(user_id=user.id, email=user.email)
     return schemas.TokenResponse(access_token=security.create_access_token(token_data))
@@ -38,15 +60,18 @@ async def authenticate_user(
     if not user or not user.is_active:
         # Prevent timing attacks by running password verification even when user doesn't exist
         # This ensures the response time is similar whether or not the email exists
-        # This ensures the response time is similar whether or not the email exists
-        security.verify_password(password, settings.SECURITY_DUMMY_HASH)
+        await security.password_executor.run(
+            security.verify_password, password, settings.SECURITY_DUMMY_HASH
+        )
         raise APIError(
             status_code=status.HTTP_401_UNAUTHORIZED,
             message="Incorrect email or password",
             details={"headers": {"WWW-Authenticate": "Bearer"}},
         )
 
-    success, updated_hash = security.verify_password(password, user.hashed_password)
+    success, updated_hash = await security.password_executor.run(
+        security.verify_password, password, user.hashed_password
+    )
     if not success:
         raise APIError(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,60 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.dimension import DIMENSION_VALUE_MAX_LENGTH
+
+DimensionModel = type[models.URLPath] | type[models.UserAgent]
+
+# Per-worker string -> id caches. Ids are never reassigned, so entries only
+# need to be dropped when the transaction that created them is rolled back.
+_caches: dict[DimensionModel, LRUCache] = {
+    models.URLPath: LRUCache(settings.DIMENSION_CACHE_SIZE),
+    models.UserAgent: LRUCache(settings.DIMENSION_CACHE_SIZE),
+}
+
+
+async def get_url_path_id(session: AsyncSession, url_path: str) -> int:
+    return await _resolve(session, models.URLPath, url_path)
+
+
+async def get_user_agent_id(
+    session: AsyncSession, user_agent: str | None
+) -> int | None:
+    if user_agent is None:
+        return None
+    return await _resolve(session, models.UserAgent, user_agent)
+
+
+def clear_cache() -> None:
+    """Forget every cached id (e.g. after a rollback)."""
+    for cache in _caches.values():
+        cache.clear()
+
+
+async def _resolve(session: AsyncSession, model: DimensionModel, value: str) -> int:
+    """Return the id for `value`, inserting it on first sight."""
+    value = value[:DIMENSION_VALUE_MAX_LENGTH]
+    cache = _caches[model]
+
+    dimension_id = cache.get(value)
+    if dimension_id is not None:
+        return dimension_id
+
+    stmt = (
+        insert(model)
+        .values(value=value)
+        .on_conflict_do_nothing(index_elements=[model.value])
+        .returning(model.id)
+    )
+    dimension_id = (await session.execute(stmt)).scalar_one_or_none()
+    if dimension_id is None:
+        # Already present (or inserted concurrently by another worker)
+        stmt = select(model.id).where(model.value == value)
+        dimension_id = (await session.execute(stmt)).scalar_one()
+
+    cache.put(value, dimension_id)
+    return dimension_id
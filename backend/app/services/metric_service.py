@@ -1,14 +1,50 @@
+import functools
+import math
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Sequence
+from http import HTTPMethod
+from typing import Callable, Hashable, Literal, Sequence
 
-from sqlalchemy import case, delete, func, select
+from fastapi import status
+from sqlalchemy import (
+    ARRAY,
+    Float,
+    Integer,
+    and_,
+    any_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    or_,
+    select,
+    tablesample,
+)
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.util import ClauseAdapter
+from sqlalchemy.sql.visitors import cloned_traverse
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app import models, schemas
+from app.core import (
+    alerting,
+    latency_buckets,
+    live_stream,
+    live_window,
+    query_guard,
+)
 from app.core.config import settings
+from app.core.exceptions import APIError
+from app.core.live_window import to_us
 from app.core.security import hash_ip
+from app.models.metric import US_PER_MS
+from app.services import archive_service, dimension_service, rollup_service
+
+# z-score of a two-sided 95% confidence interval
+Z_95 = 1.96
 
 
 @retry(
@@ -25,45 +61,143 @@ async def add_metric(
     if ip := data.pop("ip", None):
         data["ip_hash"] = hash_ip(ip, settings.SECURITY_KEY)
 
-    metric = models.Metric(**data)
-
-    session.add(metric)
     try:
+        data["url_path_id"] = await dimension_service.get_url_path_id(
+            session, data.pop("url_path")
+        )
+        data["user_agent_id"] = await dimension_service.get_user_agent_id(
+            session, data.pop("user_agent")
+        )
+
+        metric = models.Metric(**data)
+        session.add(metric)
         await session.commit()
     except SQLAlchemyError:
         await session.rollback()
+        # Ids resolved in the rolled back transaction may not exist
+        dimension_service.clear_cache()
         raise
     await session.refresh(metric)
 
+    _feed_ingest_consumers(project_id, metric)
+
     return metric
 
 
+def _feed_ingest_consumers(project_id: int, metric: models.Metric) -> None:
+    """Hand a stored metric to the per-worker in-memory consumers."""
+    live_window.registry.record(
+        project_id,
+        metric.timestamp,
+        metric.response_time_us,
+        metric.response_status_code,
+        metric.url_path_id,
+        metric.method,
+    )
+    live_stream.hub.record(
+        project_id, metric.response_time_us, metric.response_status_code
+    )
+    alerting.engine.record(
+        project_id,
+        metric.url_path_id,
+        metric.method,
+        metric.response_time_us,
+        metric.response_status_code,
+    )
+
+
 async def get_metrics(
     session: AsyncSession, project_id: int, params: schemas.MetricParams
-) -> Sequence[models.Metric]:
-    query = select(models.Metric).order_by(models.Metric.timestamp.desc())
+) -> list[schemas.MetricRow]:
+    """
+    Raw metrics, newest first. Selected as plain rows (no ORM entities) with
+    the dimensions joined in, ready for `schemas.MetricRowList`.
+    """
+    metric = models.Metric
+    query = (
+        select(
+            models.URLPath.value.label("url_path"),
+            metric.method,
+            metric.response_status_code,
+            (cast(metric.response_time_us, Float) / US_PER_MS).label(
+                "response_time_ms"
+            ),
+            models.UserAgent.value.label("user_agent"),
+            metric.id,
+            metric.timestamp,
+            metric.ip_hash,
+        )
+        .join(models.URLPath, models.URLPath.id == metric.url_path_id)
+        .outerjoin(models.UserAgent, models.UserAgent.id == metric.user_agent_id)
+        .order_by(metric.timestamp.desc())
+    )
     query = _apply_time_range_filter(query, project_id, params)
     query = _apply_pagination(query, params)
-    result = await session.execute(query)
-    return result.scalars().all()
+    result = await query_guard.execute(session, query, "list")
+    return [dict(row) for row in result.mappings()]
 
 
-async def get_metrics_summary(
-    session: AsyncSession, project_id: int, params: schemas.MetricQuery
-) -> schemas.MetricSummaryResponse:
+async def get_data_watermark(
+    session: AsyncSession, project_id: int
+) -> tuple[datetime | None, datetime | None]:
+    """Oldest and newest metric timestamps of a project (two index lookups)."""
     query = select(
-        func.count(models.Metric.id).label("request_count"),
-        func.avg(models.Metric.response_time_ms).label("avg_response_time_ms"),
-        _error_count_expr().label("error_count"),
-        func.max(models.Metric.response_time_ms).label("slowest_request_ms"),
-        func.min(models.Metric.response_time_ms).label("fastest_request_ms"),
+        func.min(models.Metric.timestamp), func.max(models.Metric.timestamp)
+    ).where(models.Metric.project_id == project_id)
+    first, last = (await session.execute(query)).one()
+    return (
+        _as_utc(first) if first is not None else None,
+        _as_utc(last) if last is not None else None,
     )
-    result = (
-        await session.execute(_apply_time_range_filter(query, project_id, params))
-    ).first()
 
-    if not result or result.request_count == 0:
+
+async def get_metrics_summary(
+    session: AsyncSession,
+    project_id: int,
+    params: schemas.MetricQuery,
+    compare_to: schemas.CompareTo | None = None,
+    sampling: schemas.SamplingParams | None = None,
+) -> schemas.MetricSummaryResponse:
+    if compare_to is not None:
+        previous_params = _comparison_params(params, compare_to)
+        sampling = await _sampling_for(
+            session, project_id, [params, previous_params], sampling
+        )
+        result, previous = await _get_summary_rows(
+            session, project_id, [params, previous_params], sampling
+        )
+        stats = _summary_stats(result, params)
+        previous_stats = _summary_stats(previous, previous_params)
         return schemas.MetricSummaryResponse(
+            **stats,
+            comparison=schemas.MetricSummaryComparison(
+                compare_to=compare_to,
+                start_date=previous_params.start_date,
+                end_date=previous_params.end_date,
+                previous=previous_stats,
+                delta=_delta(stats, previous_stats),
+            ),
+            approximation=_approximation(result, sampling),
+        )
+
+    # The live window is exact and cheaper than any sample
+    window = _live_window(project_id, params)
+    if window is not None:
+        result = window.summary(to_us(params.start_date), to_us(params.end_date))
+        sampling = None
+    else:
+        sampling = await _sampling_for(session, project_id, [params], sampling)
+        [result] = await _get_summary_rows(session, project_id, [params], sampling)
+
+    return schemas.MetricSummaryResponse(
+        **_summary_stats(result, params),
+        approximation=_approximation(result, sampling),
+    )
+
+
+def _summary_stats(result: dict | None, params: schemas.MetricParams) -> dict:
+    if not result or not result["request_count"]:
+        return dict(
             request_count=0,
             error_count=0,
             avg_response_time_ms=0,
@@ -75,21 +209,123 @@ async def get_metrics_summary(
 
     duration_in_minutes = (params.end_date - params.start_date).total_seconds() / 60
     duration_in_minutes = max(duration_in_minutes, 1)  # Ensure at least 1 minute
-    error_count = int(result.error_count or 0)
+    request_count = result["request_count"]
+    error_count = int(result["error_count"] or 0)
 
-    return schemas.MetricSummaryResponse(
-        request_count=result.request_count,
-        avg_response_time_ms=round(result.avg_response_time_ms or 0, 2),
+    return dict(
+        request_count=request_count,
+        avg_response_time_ms=round(result["avg_response_time_ms"] or 0, 2),
         requests_per_minute=round(
-            result.request_count / duration_in_minutes
-            if duration_in_minutes > 0
-            else 0,
+            request_count / duration_in_minutes if duration_in_minutes > 0 else 0,
             2,
         ),
         error_count=error_count,
-        error_rate=round(error_count / result.request_count * 100, 2),
-        slowest_request_ms=round(result.slowest_request_ms or 0, 2),
-        fastest_request_ms=round(result.fastest_request_ms or 0, 2),
+        error_rate=round(error_count / request_count * 100, 2),
+        slowest_request_ms=round(result["slowest_request_ms"] or 0, 2),
+        fastest_request_ms=round(result["fastest_request_ms"] or 0, 2),
+    )
+
+
+async def _get_summary_rows(
+    session: AsyncSession,
+    project_id: int,
+    periods: list[schemas.MetricParams],
+    sampling: schemas.SamplingParams | None = None,
+) -> list[dict | None]:
+    """Summary aggregates of each period."""
+    if not settings.ROLLUPS_ENABLED:
+        return await _get_raw_summary_rows(session, project_id, periods, sampling)
+
+    # Like the raw path, one statement reads the metrics of every period (the
+    # edges the rollups don't cover) and one reads their rollups
+    plans = await rollup_service.plan_periods(session, periods)
+    rows: list[list[dict]] = [[] for _ in periods]
+    raw_periods = [(i, raw) for i, (_, raws) in enumerate(plans) for raw in raws]
+    if raw_periods:
+        raw_rows = await _get_raw_summary_rows(
+            session, project_id, [raw for _, raw in raw_periods], sampling
+        )
+        for (i, _), row in zip(raw_periods, raw_rows):
+            if row:
+                rows[i].append(row)
+    segments = [segments for segments, _ in plans]
+    if any(segments):
+        row = await rollup_service.get_summary_row(
+            session,
+            project_id,
+            segments,
+            _dimension_filters(periods[0], models.MetricRollup),
+        )
+        for i, stats in enumerate(_split_periods(row, len(periods))):
+            rows[i].append(stats)
+    return [_merge_rows(r, key=lambda row: None).get(None) for r in rows]
+
+
+async def _get_raw_summary_rows(
+    session: AsyncSession,
+    project_id: int,
+    periods: list[schemas.MetricParams],
+    sampling: schemas.SamplingParams | None = None,
+) -> list[dict | None]:
+    """Summary aggregates of each period, all computed by a single statement."""
+    shape = _QueryShape.of(periods, sampling)
+    query = _summary_statement(shape)
+    values = _bind_values(shape, project_id, periods, sampling)
+    row = (await query_guard.execute(session, query, "summary", values)).first()
+    results: list[dict | None] = (
+        [
+            _scale_sample(result, sampling)
+            for result in _split_periods(dict(row._mapping), len(periods))
+        ]
+        if row
+        else [None] * len(periods)
+    )
+
+    for i, period in enumerate(periods):
+        if archive_service.reaches_archive(period):
+            rows = [results[i]] if results[i] else []
+            rows += await archive_service.get_summary(project_id, period)
+            results[i] = _merge_rows(rows, key=lambda row: None).get(None)
+
+    return results
+
+
+async def get_account_metrics_summary(
+    session: AsyncSession,
+    projects: Sequence[models.Project],
+    params: schemas.MetricQuery,
+) -> schemas.MetricAccountSummaryResponse:
+    """Summary of several projects, computed by one query grouped by project."""
+    project_ids = [project.id for project in projects]
+    rows: dict[int, dict] = {}
+    if project_ids:
+        query = select(models.Metric.project_id, *_stats_columns(1))
+        query = _apply_time_range_filter(query, project_ids, params)
+        query = query.group_by(models.Metric.project_id)
+        for row in (await query_guard.execute(session, query, "account_summary")).all():
+            [rows[row.project_id]] = _split_periods(dict(row._mapping), 1)
+
+    if archive_service.reaches_archive(params):
+        for project_id in project_ids:
+            archived = await archive_service.get_summary(project_id, params)
+            merged = _merge_rows(
+                [rows[project_id], *archived] if project_id in rows else archived,
+                key=lambda row: None,
+            )
+            if None in merged:
+                rows[project_id] = merged[None]
+
+    total = _merge_rows(list(rows.values()), key=lambda row: None).get(None)
+    return schemas.MetricAccountSummaryResponse(
+        **_summary_stats(total, params),
+        projects=[
+            schemas.MetricProjectSummary(
+                project_key=project.project_key,
+                name=project.name,
+                **_summary_stats(rows.get(project.id), params),
+            )
+            for project in projects
+        ],
     )
 
 
@@ -98,116 +334,923 @@ async def get_metrics_time_series(
     project_id: int,
     params: schemas.MetricQuery,
     granularity: schemas.TimeGranularity = schemas.TimeGranularity.MINUTE,
+    sampling: schemas.SamplingParams | None = None,
 ) -> list[schemas.MetricTimeSeriesPointResponse]:
-    # Group by granularity. Handling different dialects.
-    dialect = session.bind.dialect.name if session.bind else "postgresql"
-    if dialect == "sqlite":
-        # SQLite: use strftime to group
-        formats = {
-            schemas.TimeGranularity.MINUTE: "%Y-%m-%dT%H:%M:00",
-            schemas.TimeGranularity.HOUR: "%Y-%m-%dT%H:00:00",
-            schemas.TimeGranularity.DAY: "%Y-%m-%dT00:00:00",
-        }
-        timestamp = func.strftime(formats[granularity], models.Metric.timestamp)
+    _check_granularity(params, granularity)
+    window = _live_window(project_id, params)
+    if window is not None:
+        rows = window.time_series(
+            to_us(params.start_date), to_us(params.end_date), granularity.value
+        )
+        rows = _paginate(rows, params)
+        sampling = None
     else:
-        # Default/PostgreSQL: use date_trunc
-        timestamp = func.date_trunc(granularity.value, models.Metric.timestamp)
+        sampling = await _sampling_for(session, project_id, [params], sampling)
+        try:
+            rows = await _get_time_series_rows(
+                session, project_id, params, granularity, sampling
+            )
+        except query_guard.RowBudgetExceeded as e:
+            if settings.ROLLUPS_ENABLED:
+                await _suggest_rollup_granularity(session, params, granularity, e)
+            raise
+
+    return [
+        schemas.MetricTimeSeriesPointResponse(
+            timestamp=row["timestamp"],
+            request_count=row["request_count"],
+            avg_response_time_ms=round(row["avg_response_time_ms"] or 0, 2),
+            error_count=int(row["error_count"] or 0),
+            approximation=_approximation(row, sampling),
+        )
+        for row in rows
+    ]
+
+
+async def _get_time_series_rows(
+    session: AsyncSession,
+    project_id: int,
+    params: schemas.MetricQuery,
+    granularity: schemas.TimeGranularity,
+    sampling: schemas.SamplingParams | None = None,
+) -> list[dict]:
+    segments, raw_periods = [], [params]
+    if settings.ROLLUPS_ENABLED:
+        segments, raw_periods = await rollup_service.plan(session, params, granularity)
+    if not segments:
+        return await _get_raw_time_series_rows(
+            session, project_id, params, granularity, sampling
+        )
+
+    rows = []
+    for raw_period in raw_periods:
+        rows += await _get_raw_time_series_rows(
+            session, project_id, raw_period, granularity, sampling, paginate=False
+        )
+    for row in await rollup_service.get_time_series_rows(
+        session,
+        project_id,
+        segments,
+        _dimension_filters(params, models.MetricRollup),
+        granularity,
+    ):
+        rows.append({**row, "timestamp": _as_utc(row["timestamp"])})
+    merged = _merge_rows(rows, key=lambda row: row["timestamp"])
+    return _paginate([merged[ts] for ts in sorted(merged)], params)
+
+
+async def _get_raw_time_series_rows(
+    session: AsyncSession,
+    project_id: int,
+    params: schemas.MetricQuery,
+    granularity: schemas.TimeGranularity,
+    sampling: schemas.SamplingParams | None = None,
+    paginate: bool = True,
+) -> list[dict]:
+    reaches_archive = archive_service.reaches_archive(params)
+    shape = _QueryShape.of(
+        [params],
+        sampling,
+        paginate=paginate and not reaches_archive,
+        granularity=granularity,
+        dialect=_dialect(session),
+    )
+    query = _time_series_statement(shape)
+    values = _bind_values(shape, project_id, [params], sampling)
+
+    result = await query_guard.execute(session, query, "time_series", values)
+    rows = [_scale_sample(dict(row._mapping), sampling) for row in result.all()]
+    for row in rows:
+        row["timestamp"] = _as_utc(row["timestamp"])
+
+    if reaches_archive:
+        for row in await archive_service.get_time_series(
+            project_id, params, granularity
+        ):
+            rows.append({**row, "timestamp": _as_utc(row["timestamp"])})
+        merged = _merge_rows(rows, key=lambda row: row["timestamp"])
+        rows = [merged[ts] for ts in sorted(merged)]
+        if paginate:
+            rows = _paginate(rows, params)
+
+    return rows
+
+
+async def get_metrics_histogram(
+    session: AsyncSession, project_id: int, params: schemas.MetricQuery
+) -> list[schemas.MetricLatencyBucketResponse]:
+    """Request count per (non-empty) fixed latency bucket."""
+    bucket = models.Metric.latency_bucket
+    query = select(bucket, func.count(models.Metric.id).label("request_count"))
+    query = _apply_time_range_filter(query, project_id, params)
+    query = query.group_by(bucket)
+
+    counts: Counter[int] = Counter()
+    for row in (await query_guard.execute(session, query, "histogram")).all():
+        counts[row.latency_bucket] += row.request_count
+    if archive_service.reaches_archive(params):
+        for row in await archive_service.get_histogram(project_id, params):
+            counts[row["latency_bucket"]] += row["request_count"]
+
+    return [
+        _latency_bucket_response(schemas.MetricLatencyBucketResponse, b, count)
+        for b, count in sorted(counts.items())
+    ]
+
+
+async def get_metrics_heatmap(
+    session: AsyncSession,
+    project_id: int,
+    params: schemas.MetricQuery,
+    granularity: schemas.TimeGranularity = schemas.TimeGranularity.HOUR,
+) -> list[schemas.MetricHeatmapCellResponse]:
+    """Request count per (time bucket, latency bucket), ordered by time."""
+    _check_granularity(params, granularity)
+    timestamp = _time_bucket(_dialect(session), granularity)
+    bucket = models.Metric.latency_bucket
+    reaches_archive = archive_service.reaches_archive(params)
 
     query = select(
         timestamp.label("timestamp"),
+        bucket,
         func.count(models.Metric.id).label("request_count"),
-        func.avg(models.Metric.response_time_ms).label("avg_response_time_ms"),
-        _error_count_expr().label("error_count"),
     )
     query = _apply_time_range_filter(query, project_id, params)
-    query = query.group_by(timestamp).order_by(timestamp)
-    query = _apply_pagination(query, params)
+    query = query.group_by(timestamp, bucket).order_by(timestamp, bucket)
+    if not reaches_archive:
+        query = _apply_pagination(query, params)
 
-    results = (await session.execute(query)).all()
-
-    metrics_time_series = []
-    for row in results:
-        ts = row.timestamp
-        if isinstance(ts, str):
-            ts = datetime.fromisoformat(ts)
-        if ts.tzinfo is None:
-            ts = ts.replace(tzinfo=timezone.utc)
-
-        metrics_time_series.append(
-            schemas.MetricTimeSeriesPointResponse(
-                timestamp=ts,
-                request_count=row.request_count,
-                avg_response_time_ms=round(row.avg_response_time_ms or 0, 2),
-                error_count=int(row.error_count or 0),
-            )
+    counts: Counter[tuple[datetime, int]] = Counter()
+    for row in (await query_guard.execute(session, query, "heatmap")).all():
+        counts[_as_utc(row.timestamp), row.latency_bucket] += row.request_count
+    if reaches_archive:
+        for row in await archive_service.get_heatmap(project_id, params, granularity):
+            key = (_as_utc(row["timestamp"]), row["latency_bucket"])
+            counts[key] += row["request_count"]
+
+    cells = sorted(counts.items())
+    if reaches_archive:
+        cells = _paginate(cells, params)
+    return [
+        _latency_bucket_response(
+            schemas.MetricHeatmapCellResponse, b, count, timestamp=ts
         )
+        for (ts, b), count in cells
+    ]
 
-    return metrics_time_series
+
+def _latency_bucket_response(response_cls, bucket: int, count: int, **extra):
+    lower_ms, upper_ms = latency_buckets.bucket_range_ms(bucket)
+    return response_cls(
+        bucket=bucket,
+        lower_ms=lower_ms,
+        upper_ms=upper_ms,
+        request_count=count,
+        **extra,
+    )
 
 
 async def get_metrics_endpoints_stats(
-    session: AsyncSession, project_id: int, params: schemas.MetricQuery
+    session: AsyncSession,
+    project_id: int,
+    params: schemas.MetricQuery,
+    compare_to: schemas.CompareTo | None = None,
+    sampling: schemas.SamplingParams | None = None,
 ) -> list[schemas.MetricEndpointStatsResponse]:
-    query = select(
-        models.Metric.url_path,
-        models.Metric.method,
-        func.count(models.Metric.id).label("request_count"),
-        func.avg(models.Metric.response_time_ms).label("avg_response_time_ms"),
-        _error_count_expr().label("error_count"),
-        func.max(models.Metric.response_time_ms).label("slowest_request_ms"),
-        func.min(models.Metric.response_time_ms).label("fastest_request_ms"),
-    )
-    query = _apply_time_range_filter(query, project_id, params)
-    query = query.group_by(models.Metric.url_path, models.Metric.method)
-    query = _apply_pagination(query, params)
+    periods = [params]
+    if compare_to is not None:
+        periods.append(_comparison_params(params, compare_to))
+    sampling = await _sampling_for(session, project_id, periods, sampling)
 
-    results = (await session.execute(query)).all()
+    if settings.ROLLUPS_ENABLED:
+        merged = await _get_routed_endpoint_rows(session, project_id, periods, sampling)
+        current = _paginate(list(merged[0].values()), params)
+    else:
+        merged = await _get_raw_endpoint_rows(session, project_id, periods, sampling)
+        current = list(merged[0].values())
+        if archive_service.reaches_archive(params):
+            current = _paginate(current, params)
 
     metrics_endpoint_stats = []
-    for row in results:
-        error_count = int(row.error_count or 0)
+    for row in current:
+        endpoint_stats = _endpoint_stats(row)
+        comparison = None
+        if compare_to is not None:
+            previous = _endpoint_stats(
+                merged[1].get((row["url_path"], row["method"]), {"request_count": 0})
+            )
+            comparison = schemas.MetricEndpointComparison(
+                compare_to=compare_to,
+                previous=previous,
+                delta=_delta(endpoint_stats, previous),
+            )
         metrics_endpoint_stats.append(
             schemas.MetricEndpointStatsResponse(
-                url_path=row.url_path,
-                method=row.method,
-                request_count=row.request_count,
-                avg_response_time_ms=round(row.avg_response_time_ms or 0, 2),
-                error_count=error_count,
-                error_rate=round(error_count / row.request_count * 100, 2)
-                if row.request_count > 0
-                else 0,
-                slowest_request_ms=round(row.slowest_request_ms or 0, 2),
-                fastest_request_ms=round(row.fastest_request_ms or 0, 2),
+                url_path=row["url_path"],
+                method=row["method"],
+                comparison=comparison,
+                approximation=_approximation(row, sampling),
+                **endpoint_stats,
             )
         )
 
     return metrics_endpoint_stats
 
 
-async def cleanup_old_metrics(session: AsyncSession, retention_days: int = 90) -> int:
-    """Delete metrics older than a certain number of days."""
+async def _get_routed_endpoint_rows(
+    session: AsyncSession,
+    project_id: int,
+    periods: list[schemas.MetricParams],
+    sampling: schemas.SamplingParams | None,
+) -> list[dict]:
+    """
+    Endpoint rows of each period, from the rollups where they cover it. As in
+    `_get_summary_rows`, one statement reads the metrics and one the rollups.
+    """
+    plans = await rollup_service.plan_periods(session, periods)
+    rows: list[list[dict]] = [[] for _ in periods]
+    raw_periods = [(i, raw) for i, (_, raws) in enumerate(plans) for raw in raws]
+    if raw_periods:
+        raw_rows = await _get_raw_endpoint_rows(
+            session,
+            project_id,
+            [raw for _, raw in raw_periods],
+            sampling,
+            paginate=False,
+        )
+        for (i, _), endpoints in zip(raw_periods, raw_rows):
+            rows[i] += endpoints.values()
+    segments = [segments for segments, _ in plans]
+    if any(segments):
+        for row in await rollup_service.get_endpoint_rows(
+            session,
+            project_id,
+            segments,
+            _dimension_filters(periods[0], models.MetricRollup),
+        ):
+            endpoint = {"url_path": row["url_path"], "method": row["method"]}
+            for i, stats in enumerate(_split_periods(row, len(periods))):
+                rows[i].append({**endpoint, **stats})
+    return [
+        _merge_rows(r, key=lambda row: (row["url_path"], row["method"])) for r in rows
+    ]
+
+
+async def _get_raw_endpoint_rows(
+    session: AsyncSession,
+    project_id: int,
+    periods: list[schemas.MetricParams],
+    sampling: schemas.SamplingParams | None,
+    paginate: bool = True,
+) -> list[dict]:
+    """
+    Endpoint rows of each period keyed by (path, method), computed by a single
+    statement. Only paginated in SQL when the archive is not involved.
+    """
+    reaches_archive = archive_service.reaches_archive(periods[0])
+    shape = _QueryShape.of(periods, sampling, paginate=paginate and not reaches_archive)
+    query = _endpoints_statement(shape)
+    values = _bind_values(shape, project_id, periods, sampling)
+
+    per_period: list[list[dict]] = [[] for _ in periods]
+    for row in (await query_guard.execute(session, query, "endpoints", values)).all():
+        row = dict(row._mapping)
+        endpoint = {"url_path": row["url_path"], "method": row["method"]}
+        for i, stats_row in enumerate(_split_periods(row, len(periods))):
+            per_period[i].append({**endpoint, **_scale_sample(stats_row, sampling)})
+
+    merged = []
+    for period, rows in zip(periods, per_period):
+        if archive_service.reaches_archive(period):
+            for row in await archive_service.get_endpoints_stats(project_id, period):
+                rows.append({**row, "method": HTTPMethod(row["method"])})
+        merged.append(
+            _merge_rows(rows, key=lambda row: (row["url_path"], row["method"]))
+        )
+    return merged
+
+
+def _endpoint_stats(row: dict) -> dict:
+    request_count = row["request_count"]
+    error_count = int(row.get("error_count") or 0)
+    return dict(
+        request_count=request_count,
+        avg_response_time_ms=round(row.get("avg_response_time_ms") or 0, 2),
+        error_count=error_count,
+        error_rate=round(error_count / request_count * 100, 2)
+        if request_count > 0
+        else 0,
+        slowest_request_ms=round(row.get("slowest_request_ms") or 0, 2),
+        fastest_request_ms=round(row.get("fastest_request_ms") or 0, 2),
+    )
+
+
+async def cleanup_old_metrics(
+    session: AsyncSession, retention_days: int = settings.METRICS_RETENTION_DAYS
+) -> int:
+    """
+    Delete metrics older than a certain number of days.
+
+    When an archive is configured the rows are written to it first, so they
+    remain queryable after leaving Postgres.
+    """
     cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    if archive_service.is_enabled():
+        # Deletes exactly the rows it wrote
+        return await archive_service.archive_metrics(session, cutoff)
+
     stmt = delete(models.Metric).where(models.Metric.timestamp < cutoff)
     result = await session.execute(stmt)
     await session.commit()
     return result.rowcount  # type: ignore
 
 
-def _apply_time_range_filter(query, project_id: int, params: schemas.MetricQuery):
+def _comparison_params(
+    params: schemas.MetricParams, compare_to: schemas.CompareTo
+) -> schemas.MetricParams:
+    """The window `params` is compared against, shifted back in time."""
+    if compare_to == schemas.CompareTo.PREVIOUS_PERIOD:
+        # end_date is inclusive (hh:mm:59.999999)
+        shift = params.end_date - params.start_date + timedelta(microseconds=1)
+    elif compare_to == schemas.CompareTo.PREVIOUS_DAY:
+        shift = timedelta(days=1)
+    else:
+        shift = timedelta(weeks=1)
+    return params.model_copy(
+        update={
+            "start_date": params.start_date - shift,
+            "end_date": params.end_date - shift,
+        }
+    )
+
+
+def _spanning(periods: list[schemas.MetricParams]) -> schemas.MetricParams:
+    """Smallest range covering every period."""
+    return periods[0].model_copy(
+        update={
+            "start_date": min(period.start_date for period in periods),
+            "end_date": max(period.end_date for period in periods),
+        }
+    )
+
+
+def _is_contiguous(periods: list[schemas.MetricParams]) -> bool:
+    """
+    Whether the periods leave no gap, so their spanning range holds no row
+    outside of them (`previous_period`, or overlapping windows).
+    """
+    ordered = sorted(periods, key=lambda period: period.start_date)
+    covered_until = ordered[0].end_date
+    for period in ordered[1:]:
+        # end_date is inclusive
+        if period.start_date > covered_until + timedelta(microseconds=1):
+            return False
+        covered_until = max(covered_until, period.end_date)
+    return True
+
+
+@dataclass(frozen=True)
+class _QueryShape:
+    """
+    Everything the SQL of a raw summary / time-series / endpoint query depends
+    on. Dates, project and filter values are bound parameters, so each shape
+    is built and compiled once (`functools.cache`, then SQLAlchemy's compiled
+    cache), and its SQL text stays the same across requests, which lets
+    asyncpg reuse the prepared statement of each pooled connection.
+    """
+
+    periods: int = 1
+    # Scan the spanning range, or each period only (see `_bound_range_filters`)
+    contiguous: bool = True
+    method: bool = False
+    status_code: bool = False
+    status_class: bool = False
+    url_path: Literal["path", "template"] | None = None
+    sample_method: str | None = None
+    paginate: bool = False
+    granularity: schemas.TimeGranularity | None = None
+    dialect: str = "postgresql"
+
+    @classmethod
+    def of(
+        cls,
+        periods: list[schemas.MetricParams],
+        sampling: schemas.SamplingParams | None = None,
+        **kwargs,
+    ) -> "_QueryShape":
+        # Compared periods are copies of the first one, with the same filters
+        params = periods[0]
+        url_path = None
+        if params.url_path is not None:
+            url_path = "template" if params.url_path_template else "path"
+        return cls(
+            periods=len(periods),
+            contiguous=_is_contiguous(periods),
+            method=params.method is not None,
+            status_code=params.status_code is not None,
+            status_class=params.status_class is not None,
+            url_path=url_path,
+            sample_method=settings.APPROXIMATE_SAMPLE_METHOD.lower()
+            if _is_sampled(sampling)
+            else None,
+            **kwargs,
+        )
+
+
+def _bind_values(
+    shape: _QueryShape,
+    project_id: int,
+    periods: list[schemas.MetricParams],
+    sampling: schemas.SamplingParams | None = None,
+) -> dict:
+    """Parameter values of the statement of `shape` for these periods."""
+    values = {"project_id": project_id, **_dimension_values(periods[0])}
+    if shape.contiguous:
+        span = _spanning(periods)
+        values["start"], values["end"] = span.start_date, span.end_date
+    if shape.periods > 1:
+        for i, period in enumerate(periods):
+            values[f"p{i}_start"] = period.start_date
+            values[f"p{i}_end"] = period.end_date
+    if shape.paginate:
+        values["offset"] = (periods[0].page - 1) * periods[0].page_size
+        values["limit"] = periods[0].page_size
+    if shape.sample_method is not None:
+        values["sample_percent"] = sampling.sample_percent
+    return values
+
+
+def _bound_range_filters(shape: _QueryShape) -> list:
+    """
+    `_apply_time_range_filter` with `project_id`, `start` and `end` bound.
+
+    Periods with a gap between them (`previous_week` of a one-day range) are
+    matched with one range per period instead, so the scan skips the gap.
+    """
+    if shape.contiguous:
+        timestamp_filters = [
+            models.Metric.timestamp >= bindparam("start"),
+            models.Metric.timestamp <= bindparam("end"),
+        ]
+    else:
+        timestamp_filters = [or_(*(_in_period(i) for i in range(shape.periods)))]
+    return [
+        models.Metric.project_id == bindparam("project_id"),
+        *timestamp_filters,
+        *_bound_dimension_filters(shape),
+    ]
+
+
+def _bound_pagination(query):
+    """`_apply_pagination` with `offset` and `limit` bound."""
+    return query.offset(bindparam("offset", type_=Integer)).limit(
+        bindparam("limit", type_=Integer)
+    )
+
+
+@functools.cache
+def _summary_statement(shape: _QueryShape):
+    query = select(
+        *_stats_columns(shape.periods, with_stddev=shape.sample_method is not None)
+    )
+    query = query.where(*_bound_range_filters(shape))
+    return _sample(query, shape.sample_method)
+
+
+@functools.cache
+def _time_series_statement(shape: _QueryShape):
+    timestamp = _time_bucket(shape.dialect, shape.granularity)
+    query = select(
+        timestamp.label("timestamp"),
+        func.count(models.Metric.id).label("request_count"),
+        _ms(func.avg(models.Metric.response_time_us)).label("avg_response_time_ms"),
+        _error_count_expr().label("error_count"),
+    )
+    if shape.sample_method is not None:
+        query = query.add_columns(
+            _ms(func.stddev_samp(models.Metric.response_time_us)).label(
+                "response_time_stddev_ms"
+            )
+        )
+    query = query.where(*_bound_range_filters(shape))
+    query = query.group_by(timestamp).order_by(timestamp)
+    if shape.paginate:
+        query = _bound_pagination(query)
+    return _sample(query, shape.sample_method)
+
+
+@functools.cache
+def _endpoints_statement(shape: _QueryShape):
+    stats = select(
+        models.Metric.url_path_id,
+        models.Metric.method,
+        *_stats_columns(shape.periods, with_stddev=shape.sample_method is not None),
+    )
+    stats = stats.where(*_bound_range_filters(shape))
+    stats = stats.group_by(models.Metric.url_path_id, models.Metric.method)
+    if shape.periods > 1 and shape.paginate:
+        # Only list endpoints hit during the requested period (unpaginated
+        # callers drop the others themselves)
+        stats = stats.having(func.count(models.Metric.id).filter(_in_period(0)) > 0)
+    if shape.paginate:
+        stats = _bound_pagination(stats)
+    stats = _sample(stats, shape.sample_method).subquery()
+
+    # Aggregate on ids, then join the (few) paths back for display
+    return select(
+        models.URLPath.value.label("url_path"),
+        stats.c.method,
+        *[c for c in stats.c if c.name not in ("url_path_id", "method")],
+    ).join(stats, models.URLPath.id == stats.c.url_path_id)
+
+
+def _in_period(i: int):
+    """Whether a row is in period `i` (bound as `p<i>_start` / `p<i>_end`)."""
+    return models.Metric.timestamp.between(
+        bindparam(f"p{i}_start"), bindparam(f"p{i}_end")
+    )
+
+
+def _stats_columns(period_count: int, with_stddev: bool = False) -> list:
+    """
+    Aggregate columns for each period, prefixed `p<i>_`. With several periods
+    each aggregate is restricted to its own range (conditional aggregation), so
+    a single scan over the spanning range computes all of them.
+    """
+    columns = []
+    for i in range(period_count):
+
+        def agg(expr, i=i):
+            return expr.filter(_in_period(i)) if period_count > 1 else expr
+
+        columns += [
+            agg(func.count(models.Metric.id)).label(f"p{i}_request_count"),
+            _ms(agg(func.avg(models.Metric.response_time_us))).label(
+                f"p{i}_avg_response_time_ms"
+            ),
+            agg(_error_count_expr()).label(f"p{i}_error_count"),
+            _ms(agg(func.max(models.Metric.response_time_us))).label(
+                f"p{i}_slowest_request_ms"
+            ),
+            _ms(agg(func.min(models.Metric.response_time_us))).label(
+                f"p{i}_fastest_request_ms"
+            ),
+        ]
+        if with_stddev:
+            columns.append(
+                _ms(agg(func.stddev_samp(models.Metric.response_time_us))).label(
+                    f"p{i}_response_time_stddev_ms"
+                )
+            )
+    return columns
+
+
+def _split_periods(row: dict, count: int) -> list[dict]:
+    """Split a row of `_stats_columns` into one stats dict per period."""
+    return [
+        {
+            key.removeprefix(f"p{i}_"): value
+            for key, value in row.items()
+            if key.startswith(f"p{i}_")
+        }
+        for i in range(count)
+    ]
+
+
+def _delta(current: dict, previous: dict) -> schemas.MetricStatsDelta:
+    return schemas.MetricStatsDelta(
+        **{
+            field: round(current[field] - previous[field], 2)
+            for field in schemas.MetricStatsDelta.model_fields
+        }
+    )
+
+
+def _is_sampled(sampling: schemas.SamplingParams | None) -> bool:
+    return sampling is not None and sampling.fraction is not None
+
+
+async def _sampling_for(
+    session: AsyncSession,
+    project_id: int,
+    periods: list[schemas.MetricParams],
+    sampling: schemas.SamplingParams | None,
+) -> schemas.SamplingParams | None:
+    """
+    `sampling`, or None when the range is small enough to read exactly.
+
+    `TABLESAMPLE` applies to the whole table before the range filters, so on
+    a range the planner expects to hold fewer than `APPROXIMATE_MIN_ROWS`
+    rows the index scan of the exact query is both cheaper and exact.
+    """
+    if not _is_sampled(sampling) or _dialect(session) != "postgresql":
+        return sampling
+    shape = _QueryShape.of(periods)
+    cost = await query_guard.estimate(
+        session, _summary_statement(shape), _bind_values(shape, project_id, periods)
+    )
+    if cost["estimated_rows"] < settings.APPROXIMATE_MIN_ROWS:
+        return None
+    return sampling
+
+
+def _sample(query, method: str | None):
+    """
+    Read `metrics` through `TABLESAMPLE <method>(:sample_percent)` for
+    approximate queries. Every reference to the table in `query` is rewritten
+    to the sampled alias.
+    """
+    if method is None:
+        return query
+    sampled = tablesample(
+        models.Metric.__table__,
+        getattr(func, method)(
+            bindparam("sample_percent", type_=Float, literal_execute=True)
+        ),
+        name="metrics_sample",
+    )
+    return ClauseAdapter(sampled).traverse(query)
+
+
+def _scale_sample(row: dict, sampling: schemas.SamplingParams | None) -> dict:
+    """Turn the aggregates of a sample into estimates for the whole range."""
+    if not _is_sampled(sampling):
+        return row
+    sampled_requests = row["request_count"]
+    sampled_errors = int(row["error_count"] or 0)
+    return {
+        **row,
+        "request_count": round(sampled_requests / sampling.fraction),
+        "error_count": round(sampled_errors / sampling.fraction),
+        "sampled_requests": sampled_requests,
+        "sampled_errors": sampled_errors,
+    }
+
+
+def _approximation(
+    row: dict | None, sampling: schemas.SamplingParams | None
+) -> schemas.MetricApproximation | None:
+    """
+    95% margins of error of the estimates in a (possibly merged) row. Archived
+    rows are read exactly, so only the sampled share of the row adds error.
+    """
+    if not _is_sampled(sampling):
+        return None
+    row = row or {}
+    if settings.APPROXIMATE_SAMPLE_METHOD == "SYSTEM":
+        return schemas.MetricApproximation(
+            sample_percent=sampling.sample_percent,
+            sampled_requests=row.get("sampled_requests", 0),
+            margin_of_error=None,
+        )
+    fraction = sampling.fraction
+    n = row.get("sampled_requests", 0)
+    errors = row.get("sampled_errors", 0)
+    total = row.get("request_count") or 0
+    share = min(n / fraction / total, 1) if total else 0
+    stddev = row.get("response_time_stddev_ms")
+
+    avg_margin = None
+    if n > 1 and stddev is not None:
+        avg_margin = round(Z_95 * stddev / math.sqrt(n) * share, 2)
+    error_rate_margin = None
+    if n > 0:
+        rate = errors / n
+        error_rate_margin = round(
+            Z_95 * math.sqrt(rate * (1 - rate) / n) * 100 * share, 2
+        )
+
+    return schemas.MetricApproximation(
+        sample_percent=sampling.sample_percent,
+        sampled_requests=n,
+        margin_of_error=schemas.MetricMarginOfError(
+            request_count=round(Z_95 * math.sqrt(n * (1 - fraction)) / fraction, 2),
+            error_count=round(Z_95 * math.sqrt(errors * (1 - fraction)) / fraction, 2),
+            avg_response_time_ms=avg_margin,
+            error_rate=error_rate_margin,
+        ),
+    )
+
+
+def _dialect(session: AsyncSession) -> str:
+    return session.bind.dialect.name if session.bind else "postgresql"
+
+
+def _time_bucket(dialect: str, granularity: schemas.TimeGranularity):
+    """Expression truncating `timestamp` to `granularity`, per dialect."""
+    if dialect == "sqlite":
+        # SQLite: use strftime to group
+        formats = {
+            schemas.TimeGranularity.MINUTE: "%Y-%m-%dT%H:%M:00",
+            schemas.TimeGranularity.HOUR: "%Y-%m-%dT%H:00:00",
+            schemas.TimeGranularity.DAY: "%Y-%m-%dT00:00:00",
+        }
+        return func.strftime(formats[granularity], models.Metric.timestamp)
+    # Default/PostgreSQL: use date_trunc
+    return func.date_trunc(granularity.value, models.Metric.timestamp)
+
+
+async def _suggest_rollup_granularity(
+    session: AsyncSession,
+    params: schemas.MetricParams,
+    granularity: schemas.TimeGranularity,
+    error: query_guard.RowBudgetExceeded,
+) -> None:
+    """
+    Point a time series over budget at the granularity the rollups answer:
+    a finer one reads the range they don't cover from raw metrics.
+    """
+    finest = await rollup_service.finest_covering_level(session, params, granularity)
+    if finest is None:
+        return
+    error.details["granularity"] = granularity
+    error.details["finest"] = finest
+    error.details["suggestions"].insert(0, f"Use '{finest}' or a coarser granularity")
+
+
+def _check_granularity(
+    params: schemas.MetricParams, granularity: schemas.TimeGranularity
+) -> None:
+    """Long ranges are hour / day aligned and can't be split any finer."""
+    if granularity.duration < params.resolution.duration:
+        raise APIError(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            message=f"Use '{params.resolution}' or a coarser granularity for "
+            f"date ranges of this length",
+            details={"granularity": granularity, "finest": params.resolution},
+        )
+
+
+def _live_window(
+    project_id: int, params: schemas.MetricParams
+) -> live_window.LiveWindow | None:
+    # Filtered drill-downs are left to SQL
+    if params.has_dimension_filters:
+        return None
+    return live_window.registry.lookup(project_id, params.start_date)
+
+
+def _apply_time_range_filter(
+    query, project_id: int | list[int], params: schemas.MetricQuery
+):
     """Apply common project_id and time range filters."""
+    if isinstance(project_id, list):
+        # A single array parameter: `project_id = ANY($1)`
+        project_filter = models.Metric.project_id == any_(
+            bindparam("project_ids", project_id, type_=ARRAY(Integer))
+        )
+    else:
+        project_filter = models.Metric.project_id == project_id
     return query.filter(
-        models.Metric.project_id == project_id,
+        project_filter,
         models.Metric.timestamp >= params.start_date,
         models.Metric.timestamp <= params.end_date,
+        *_dimension_filters(params),
     )
 
 
+def _dimension_filters(
+    params: schemas.MetricParams,
+    model: type[models.Metric] | type[models.MetricRollup] = models.Metric,
+) -> list:
+    """`_bound_dimension_filters` of `params`, with its values filled in."""
+    values = _dimension_values(params)
+
+    def fill(bind) -> None:
+        if bind.key in values:
+            bind.value = values[bind.key]
+            bind.required = False
+
+    return [
+        cloned_traverse(expr, {}, {"bindparam": fill})
+        for expr in _bound_dimension_filters(_QueryShape.of([params]), model)
+    ]
+
+
+def _bound_dimension_filters(
+    shape: "_QueryShape",
+    model: type[models.Metric] | type[models.MetricRollup] = models.Metric,
+) -> list:
+    """
+    Optional method / status / path predicates, on `metrics` or on the
+    rollups, with the values of `_dimension_values` left as parameters.
+    Status classes become plain range checks (4xx/5xx can use the partial
+    error index) and the path filter is resolved against the small
+    `url_paths` dictionary, so the scan only compares integer ids.
+    """
+    filters = []
+    if shape.method:
+        filters.append(model.method == bindparam("method"))
+    if shape.status_code:
+        filters.append(model.response_status_code == bindparam("status_code"))
+    if shape.status_class:
+        # Inlined so the planner can match the partial index predicate
+        filters += [
+            model.response_status_code
+            >= bindparam("status_low", type_=Integer, literal_execute=True),
+            model.response_status_code
+            < bindparam("status_high", type_=Integer, literal_execute=True),
+        ]
+    if shape.url_path is not None:
+        # `LIKE 'prefix%'` with the prefix escaped, as `startswith(autoescape=True)`
+        path_prefix = models.URLPath.value.like(bindparam("url_path_like"), escape="/")
+        if shape.url_path == "template":
+            path_match = and_(
+                path_prefix,
+                models.URLPath.value.regexp_match(bindparam("url_path_regex")),
+            )
+        else:
+            path_match = or_(models.URLPath.value == bindparam("url_path"), path_prefix)
+        filters.append(
+            model.url_path_id.in_(select(models.URLPath.id).where(path_match))
+        )
+    return filters
+
+
+def _dimension_values(params: schemas.MetricParams) -> dict:
+    """Parameter values of `_bound_dimension_filters`."""
+    values = {}
+    if params.method is not None:
+        values["method"] = params.method
+    if params.status_code is not None:
+        values["status_code"] = params.status_code
+    if params.status_class is not None:
+        values["status_low"], values["status_high"] = params.status_class.status_range
+    if params.url_path is not None:
+        if template := params.url_path_template:
+            prefix, values["url_path_regex"] = template
+        else:
+            prefix = params.url_path.rstrip("/") + "/"
+            values["url_path"] = params.url_path
+        values["url_path_like"] = _escape_like(prefix) + "%"
+    return values
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
 def _apply_pagination(query, params: schemas.MetricParams):
     """Apply common pagination (offset/limit) filters."""
     offset = (params.page - 1) * params.page_size
     return query.offset(offset).limit(params.page_size)
 
 
+def _paginate(rows: list, params: schemas.MetricParams) -> list:
+    """Python-side equivalent of `_apply_pagination` for merged results."""
+    offset = (params.page - 1) * params.page_size
+    return rows[offset : offset + params.page_size]
+
+
+def _merge_rows(rows: list[dict], key: Callable[[dict], Hashable]) -> dict:
+    """
+    Combine aggregate rows sharing the same `key` (e.g. the same bucket coming
+    from both Postgres and the archive) into a single row.
+    """
+    merged: dict[Hashable, dict] = {}
+    for row in rows:
+        count = row["request_count"]
+        if not count:
+            continue
+
+        current = merged.get(key(row))
+        if current is None:
+            merged[key(row)] = dict(row)
+            continue
+
+        total = current["request_count"] + count
+        current["avg_response_time_ms"] = (
+            current["avg_response_time_ms"] * current["request_count"]
+            + row["avg_response_time_ms"] * count
+        ) / total
+        current["request_count"] = total
+        current["error_count"] = (current["error_count"] or 0) + (
+            row["error_count"] or 0
+        )
+        if "slowest_request_ms" in row:
+            current["slowest_request_ms"] = max(
+                current["slowest_request_ms"], row["slowest_request_ms"]
+            )
+            current["fastest_request_ms"] = min(
+                current["fastest_request_ms"], row["fastest_request_ms"]
+            )
+
+    return merged
+
+
+def _as_utc(ts: datetime | str) -> datetime:
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def _ms(expr):
+    """Scale an aggregate over `response_time_us` back to milliseconds."""
+    return expr / US_PER_MS
+
+
 def _error_count_expr():
     """Common expression for counting errors (status >= 400)."""
     return func.sum(case((models.Metric.response_status_code >= 400, 1), else_=0))
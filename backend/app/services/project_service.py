@@ -2,7 +2,7 @@ import secrets
 from typing import Sequence
 
 from fastapi import status
-from sqlalchemy import select, true
+from sqlalchemy import and_, select, true
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -38,15 +38,25 @@ async def create_user_project(
     return project
 
 
-async def get_user_project_by_key(
+async def get_user_and_project(
     user_id: int, project_key: str, session: AsyncSession
-):
-    statement = select(models.Project).where(
-        models.Project.user_id == user_id,
-        models.Project.project_key == project_key,
+) -> tuple[models.User | None, models.Project | None]:
+    """The user and their project `project_key` (None if missing), in one query."""
+    statement = (
+        select(models.User, models.Project)
+        .outerjoin(
+            models.Project,
+            and_(
+                models.Project.user_id == models.User.id,
+                models.Project.project_key == project_key,
+            ),
+        )
+        .where(models.User.id == user_id)
     )
-    result = await session.execute(statement)
-    return result.scalar_one_or_none()
+    row = (await session.execute(statement)).one_or_none()
+    if row is None:
+        return None, None
+    return row.User, row.Project
 
 
 async def get_user_projects(
@@ -70,6 +80,30 @@ async def get_user_projects(
     return result.scalars().all()
 
 
+async def get_user_projects_by_keys(
+    user_id: int, project_keys: list[str] | None, session: AsyncSession
+) -> Sequence[models.Project]:
+    """The user's projects with the given keys, or all of them when None."""
+    statement = (
+        select(models.Project)
+        .where(models.Project.user_id == user_id)
+        .order_by(models.Project.id)
+    )
+    if project_keys is not None:
+        statement = statement.where(models.Project.project_key.in_(project_keys))
+
+    projects = (await session.execute(statement)).scalars().all()
+    if project_keys is not None:
+        missing = set(project_keys) - {project.project_key for project in projects}
+        if missing:
+            raise APIError(
+                status_code=status.HTTP_404_NOT_FOUND,
+                message="Project not found",
+                details={"project_keys": sorted(missing)},
+            )
+    return projects
+
+
 async def update_user_project(
     project: models.Project,
     update_data: schemas.ProjectUpdate,
@@ -99,6 +133,47 @@ async def update_user_project(
     return project
 
 
+async def set_project_limits(
+    project_key: str,
+    limits: schemas.ProjectLimits,
+    session: AsyncSession,
+) -> models.Project:
+    """Operator-only: sets the given overrides of `project_key` (`None` resets)."""
+    project = (
+        await session.execute(
+            select(models.Project).where(models.Project.project_key == project_key)
+        )
+    ).scalar_one_or_none()
+    if project is None:
+        raise APIError(
+            status_code=status.HTTP_404_NOT_FOUND, message="Project not found"
+        )
+
+    update_dict = limits.model_dump(exclude_unset=True)
+    soft = (
+        update_dict.get("metric_quota_soft", project.metric_quota_soft)
+        or settings.METRIC_QUOTA_SOFT
+    )
+    hard = (
+        update_dict.get("metric_quota_hard", project.metric_quota_hard)
+        or settings.METRIC_QUOTA_HARD
+    )
+    if soft is not None and hard is not None and soft > hard:
+        raise APIError(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            message="Soft quota is above the hard quota",
+            details={"metric_quota_soft": soft, "metric_quota_hard": hard},
+        )
+
+    for key, value in update_dict.items():
+        setattr(project, key, value)
+
+    await session.commit()
+    await session.refresh(project)
+
+    return project
+
+
 async def delete_user_project(
     project: models.Project,
     session: AsyncSession,
@@ -0,0 +1,450 @@
+"""
+Minute / hour / day rollups of the metrics table.
+
+`refresh_rollups` builds minute buckets from `metrics`, hour buckets from
+minute buckets and day buckets from hour buckets, only ever processing whole
+buckets that can no longer change. `plan` splits a query range into the
+whole buckets each level already covers (coarsest first) and the remainder
+that has to come from raw data, so a year-long range reads a few hundred
+day rows instead of every request.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Float, and_, cast, delete, false, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.core import db, query_guard
+from app.core.config import settings
+from app.models.metric import US_PER_MS
+
+logger = logging.getLogger(__name__)
+
+MINUTE = schemas.TimeGranularity.MINUTE
+HOUR = schemas.TimeGranularity.HOUR
+DAY = schemas.TimeGranularity.DAY
+
+# Finest first; every level is built from the previous one
+LEVELS = [MINUTE, HOUR, DAY]
+
+# Range (re)built per statement while catching up
+CHUNKS = {MINUTE: timedelta(hours=1), HOUR: timedelta(days=1), DAY: timedelta(days=31)}
+
+# Advisory lock key serializing refreshes across workers
+LOCK_ID = 0x726F6C6C  # "roll"
+
+
+@dataclass(frozen=True)
+class Segment:
+    """`[start, end)` answered from `granularity` rollups (None: raw data)."""
+
+    granularity: schemas.TimeGranularity | None
+    start: datetime
+    end: datetime
+
+
+def retention(level: schemas.TimeGranularity) -> timedelta:
+    days = {
+        MINUTE: settings.ROLLUP_MINUTE_RETENTION_DAYS,
+        HOUR: settings.ROLLUP_HOUR_RETENTION_DAYS,
+        DAY: settings.ROLLUP_DAY_RETENTION_DAYS,
+    }[level]
+    return timedelta(days=days)
+
+
+async def get_coverage(
+    session: AsyncSession,
+) -> dict[schemas.TimeGranularity, tuple[datetime, datetime]]:
+    """The `[start, end)` range each level can currently answer."""
+    now = datetime.now(timezone.utc)
+    coverage = {}
+    for state in (await session.execute(select(models.MetricRollupState))).scalars():
+        level = state.granularity
+        start = max(state.rolled_from, level.ceil(now - retention(level)))
+        if start < state.rolled_up_to:
+            coverage[level] = (start, state.rolled_up_to)
+    return coverage
+
+
+async def finest_covering_level(
+    session: AsyncSession,
+    params: schemas.MetricParams,
+    granularity: schemas.TimeGranularity,
+) -> schemas.TimeGranularity | None:
+    """
+    Finest level coarser than `granularity` whose rollups reach back to the
+    start of the range, so a time series at that level reads (almost) no raw
+    metrics.
+    """
+    coverage = await get_coverage(session)
+    for level in LEVELS:
+        if (
+            level.duration > granularity.duration
+            and level in coverage
+            and coverage[level][0] <= params.start_date
+        ):
+            return level
+    return None
+
+
+async def plan(
+    session: AsyncSession,
+    params: schemas.MetricParams,
+    granularity: schemas.TimeGranularity | None = None,
+) -> tuple[list[Segment], list[schemas.MetricParams]]:
+    """
+    Split the range of `params` into rolled-up segments and the raw ranges
+    left over. Levels coarser than `granularity` are not used.
+    """
+    [planned] = await plan_periods(session, [params], granularity)
+    return planned
+
+
+async def plan_periods(
+    session: AsyncSession,
+    periods: list[schemas.MetricParams],
+    granularity: schemas.TimeGranularity | None = None,
+) -> list[tuple[list[Segment], list[schemas.MetricParams]]]:
+    """`plan` of each period, reading the coverage once."""
+    coverage = await get_coverage(session)
+    levels = [
+        (level, *coverage[level])
+        for level in reversed(LEVELS)
+        if level in coverage
+        and (granularity is None or level.duration <= granularity.duration)
+    ]
+    return [_plan(params, levels) for params in periods]
+
+
+def _plan(
+    params: schemas.MetricParams,
+    levels: list[tuple[schemas.TimeGranularity, datetime, datetime]],
+) -> tuple[list[Segment], list[schemas.MetricParams]]:
+    end = params.end_date + timedelta(microseconds=1)
+    segments = split(params.start_date, end, levels)
+
+    rolled_up = [segment for segment in segments if segment.granularity is not None]
+    raw = [
+        params.model_copy(
+            update={
+                "start_date": segment.start,
+                "end_date": segment.end - timedelta(microseconds=1),
+            }
+        )
+        for segment in segments
+        if segment.granularity is None
+    ]
+    return rolled_up, raw
+
+
+def split(
+    start: datetime,
+    end: datetime,
+    levels: list[tuple[schemas.TimeGranularity, datetime, datetime]],
+) -> list[Segment]:
+    """
+    Cover `[start, end)` with the whole buckets of the first level that fit
+    inside its coverage, and the edges recursively with the finer levels.
+    """
+    if start >= end:
+        return []
+    if not levels:
+        return [Segment(None, start, end)]
+
+    level, covered_from, covered_to = levels[0]
+    low = max(level.ceil(start), covered_from)
+    high = min(level.floor(end), covered_to)
+    if low >= high:
+        return split(start, end, levels[1:])
+    return [
+        *split(start, low, levels[1:]),
+        Segment(level, low, high),
+        *split(high, end, levels[1:]),
+    ]
+
+
+async def get_summary_row(
+    session: AsyncSession,
+    project_id: int,
+    periods: list[list[Segment]],
+    filters: list,
+) -> dict:
+    """
+    Summary aggregates of the segments of each period, prefixed `p<i>_` like
+    `metric_service._stats_columns`, computed by a single statement.
+    """
+    query = select(*_period_stats_columns(periods)).where(
+        *_in_segments(project_id, [s for segments in periods for s in segments]),
+        *filters,
+    )
+    result = await query_guard.execute(session, query, "summary")
+    return dict(result.one()._mapping)
+
+
+async def get_time_series_rows(
+    session: AsyncSession,
+    project_id: int,
+    segments: list[Segment],
+    filters: list,
+    granularity: schemas.TimeGranularity,
+) -> list[dict]:
+    timestamp = func.date_trunc(granularity.value, models.MetricRollup.bucket)
+    query = (
+        select(timestamp.label("timestamp"), *_stats_columns())
+        .where(*_in_segments(project_id, segments), *filters)
+        .group_by(timestamp)
+    )
+    result = await query_guard.execute(session, query, "time_series")
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def get_endpoint_rows(
+    session: AsyncSession,
+    project_id: int,
+    periods: list[list[Segment]],
+    filters: list,
+) -> list[dict]:
+    """Endpoint aggregates of each period (`p<i>_` prefixed), in one statement."""
+    rollup = models.MetricRollup
+    stats = (
+        select(rollup.url_path_id, rollup.method, *_period_stats_columns(periods))
+        .where(
+            *_in_segments(project_id, [s for segments in periods for s in segments]),
+            *filters,
+        )
+        .group_by(rollup.url_path_id, rollup.method)
+        .subquery()
+    )
+    query = select(
+        models.URLPath.value.label("url_path"),
+        *[c for c in stats.c if c.name != "url_path_id"],
+    ).join(stats, models.URLPath.id == stats.c.url_path_id)
+    result = await query_guard.execute(session, query, "endpoints")
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def refresh_rollups(session: AsyncSession, now: datetime | None = None) -> None:
+    """Roll up every whole bucket that can no longer change, then expire old ones."""
+    now = now or datetime.now(timezone.utc)
+    settled = now - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+
+    source_state = None
+    for level in LEVELS:
+        target = level.floor(settled)
+        if source_state is not None:
+            target = min(target, level.floor(source_state.rolled_up_to))
+        retained_from = level.ceil(now - retention(level))
+
+        state = await session.get(models.MetricRollupState, level)
+        if state is None:
+            start = await _first_bucket(session, level, source_state)
+            if start is None:
+                break
+            state = models.MetricRollupState(
+                granularity=level, rolled_from=start, rolled_up_to=start
+            )
+            session.add(state)
+        if state.rolled_up_to < retained_from:
+            # Keep the covered range contiguous after a long pause
+            state.rolled_from = state.rolled_up_to = retained_from
+
+        while state.rolled_up_to < target:
+            chunk_end = min(state.rolled_up_to + CHUNKS[level], target)
+            await session.execute(
+                _rollup_statement(level, state.rolled_up_to, chunk_end)
+            )
+            state.rolled_up_to = chunk_end
+            await session.commit()
+
+        await session.execute(
+            delete(models.MetricRollup).where(
+                models.MetricRollup.granularity == level,
+                models.MetricRollup.bucket < retained_from,
+            )
+        )
+        await session.commit()
+        source_state = state
+
+
+async def try_lock(session: AsyncSession) -> bool:
+    """
+    Take the rollup lock until the transaction of `session` ends (or its
+    connection drops). False while another worker holds it.
+    """
+    return await session.scalar(select(func.pg_try_advisory_xact_lock(LOCK_ID)))
+
+
+async def run_rollups() -> None:
+    """
+    Keep the rollups up to date, every `ROLLUP_INTERVAL_SECONDS`. Every worker
+    runs this loop; the advisory lock lets one of them refresh at a time and
+    the others skip their turn.
+    """
+    while True:
+        start = time.monotonic()
+        try:
+            sessions = db.session_factory("analytics")
+            # `refresh_rollups` commits as it goes, the lock has its own
+            # transaction spanning the whole run
+            async with sessions() as lock_session, sessions() as session:
+                if await try_lock(lock_session):
+                    await refresh_rollups(session)
+                    logger.info(
+                        "Metric rollups refreshed",
+                        extra={
+                            "duration_ms": round((time.monotonic() - start) * 1000, 2)
+                        },
+                    )
+        except Exception:
+            logger.exception("Metric rollup failed")
+        await asyncio.sleep(settings.ROLLUP_INTERVAL_SECONDS)
+
+
+async def _first_bucket(
+    session: AsyncSession,
+    level: schemas.TimeGranularity,
+    source_state: models.MetricRollupState | None,
+) -> datetime | None:
+    """Where a level starts rolling up: its source's first whole bucket."""
+    if source_state is not None:
+        return level.ceil(source_state.rolled_from)
+    first = (await session.execute(select(func.min(models.Metric.timestamp)))).scalar()
+    return level.floor(first) if first is not None else None
+
+
+def _rollup_statement(level: schemas.TimeGranularity, start: datetime, end: datetime):
+    """Upsert the `level` buckets of `[start, end)` from the level below."""
+    rollup = models.MetricRollup
+    if level == MINUTE:
+        metric = models.Metric
+        bucket = func.date_trunc(level.value, metric.timestamp)
+        dimensions = [
+            metric.project_id,
+            metric.url_path_id,
+            metric.method,
+            metric.response_status_code,
+        ]
+        source = select(
+            bucket,
+            *dimensions,
+            func.count(metric.id),
+            func.sum(metric.response_time_us),
+            func.min(metric.response_time_us),
+            func.max(metric.response_time_us),
+        ).where(metric.timestamp >= start, metric.timestamp < end)
+    else:
+        finer = LEVELS[LEVELS.index(level) - 1]
+        bucket = func.date_trunc(level.value, rollup.bucket)
+        dimensions = [
+            rollup.project_id,
+            rollup.url_path_id,
+            rollup.method,
+            rollup.response_status_code,
+        ]
+        source = select(
+            bucket,
+            *dimensions,
+            func.sum(rollup.request_count),
+            func.sum(rollup.response_time_sum_us),
+            func.min(rollup.response_time_min_us),
+            func.max(rollup.response_time_max_us),
+        ).where(
+            rollup.granularity == finer,
+            rollup.bucket >= start,
+            rollup.bucket < end,
+        )
+    source = source.add_columns(literal(level, rollup.granularity.type))
+    source = source.group_by(bucket, *dimensions)
+
+    values = [
+        "request_count",
+        "response_time_sum_us",
+        "response_time_min_us",
+        "response_time_max_us",
+    ]
+    stmt = insert(rollup).from_select(
+        [
+            "bucket",
+            "project_id",
+            "url_path_id",
+            "method",
+            "response_status_code",
+            *values,
+            "granularity",
+        ],
+        source,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[c.name for c in rollup.__table__.primary_key],
+        set_={name: stmt.excluded[name] for name in values},
+    )
+
+
+def _stats_columns(prefix: str = "", where=None) -> list:
+    """
+    Same aggregates as `metric_service._stats_columns`, from rollup rows,
+    restricted to the rows matching `where` when given.
+    """
+    rollup = models.MetricRollup
+
+    def agg(expr, condition=where):
+        return expr.filter(condition) if condition is not None else expr
+
+    request_count = agg(func.sum(rollup.request_count))
+    is_error = rollup.response_status_code >= 400
+    return [
+        request_count.label(f"{prefix}request_count"),
+        (
+            cast(agg(func.sum(rollup.response_time_sum_us)), Float)
+            / request_count
+            / US_PER_MS
+        ).label(f"{prefix}avg_response_time_ms"),
+        func.coalesce(
+            agg(
+                func.sum(rollup.request_count),
+                and_(where, is_error) if where is not None else is_error,
+            ),
+            0,
+        ).label(f"{prefix}error_count"),
+        (agg(func.max(rollup.response_time_max_us)) / US_PER_MS).label(
+            f"{prefix}slowest_request_ms"
+        ),
+        (agg(func.min(rollup.response_time_min_us)) / US_PER_MS).label(
+            f"{prefix}fastest_request_ms"
+        ),
+    ]
+
+
+def _period_stats_columns(periods: list[list[Segment]]) -> list:
+    """`_stats_columns` of each period, restricted to its own segments."""
+    if len(periods) == 1:
+        return _stats_columns("p0_")
+    return [
+        column
+        for i, segments in enumerate(periods)
+        for column in _stats_columns(
+            f"p{i}_", or_(*map(_in_segment, segments)) if segments else false()
+        )
+    ]
+
+
+def _in_segment(segment: Segment):
+    rollup = models.MetricRollup
+    return and_(
+        rollup.granularity == segment.granularity,
+        rollup.bucket >= segment.start,
+        rollup.bucket < segment.end,
+    )
+
+
+def _in_segments(project_id: int, segments: list[Segment]) -> list:
+    return [
+        models.MetricRollup.project_id == project_id,
+        or_(*map(_in_segment, segments)),
+    ]
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+
+from sqlalchemy import BigInteger, Date, Integer, column, select, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.core import db, quotas
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def flush_usage(session: AsyncSession) -> None:
+    """Add this worker's pending counts to `project_usage`, read back totals."""
+    pending = quotas.usage.drain()
+    if not pending:
+        return
+
+    counts = values(
+        column("project_id", Integer),
+        column("period", Date),
+        column("metric_count", BigInteger),
+        name="counts",
+    ).data([(project_id, period, n) for (project_id, period), n in pending.items()])
+    usage = models.ProjectUsage
+    # Joined with `projects` to skip projects deleted in the meantime
+    stmt = insert(usage).from_select(
+        ["project_id", "period", "metric_count"],
+        select(counts.c.project_id, counts.c.period, counts.c.metric_count).join(
+            models.Project, models.Project.id == counts.c.project_id
+        ),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[usage.project_id, usage.period],
+        set_={"metric_count": usage.metric_count + stmt.excluded.metric_count},
+    ).returning(usage.project_id, usage.period, usage.metric_count)
+
+    try:
+        rows = (await session.execute(stmt)).all()
+        await session.commit()
+    except Exception:
+        quotas.usage.restore(pending)
+        raise
+    quotas.usage.update_totals(
+        {(row.project_id, row.period): row.metric_count for row in rows}
+    )
+
+
+async def run_usage_flush() -> None:
+    """Flush the usage counters every `USAGE_FLUSH_SECONDS`."""
+    while True:
+        await asyncio.sleep(settings.USAGE_FLUSH_SECONDS)
+        try:
+            async with db.session_factory("ingest")() as session:
+                await flush_usage(session)
+        except Exception:
+            logger.exception("Usage flush failed")
+
+
+async def get_usage(
+    session: AsyncSession, project: models.Project
+) -> schemas.ProjectUsageResponse:
+    """Usage of the current month, including this worker's unflushed counts."""
+    period = quotas.current_period()
+    stmt = select(models.ProjectUsage.metric_count).where(
+        models.ProjectUsage.project_id == project.id,
+        models.ProjectUsage.period == period,
+    )
+    flushed = (await session.execute(stmt)).scalar() or 0
+    quota = quotas.project_quota(project)
+    return schemas.ProjectUsageResponse(
+        period_start=period,
+        reset_at=quotas.period_end(period),
+        metric_count=flushed + quotas.usage.pending(project.id, period),
+        soft_limit=quota.soft,
+        hard_limit=quota.hard,
+    )
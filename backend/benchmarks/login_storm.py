@@ -0,0 +1,153 @@
+"""
+`/track` latency while the same worker handles a storm of logins.
+
+Runs the app in-process (one event loop, like one uvicorn worker) against the
+database configured in `.env`. A scratch user, project and API key are created
+and removed afterwards. `--logins` clients log in back to back while a single
+client sends `/track` requests; the `/track` latency percentiles are reported
+with Argon2 / zxcvbn run inline on the event loop (the previous behaviour) and
+in the bounded password pool.
+
+    PYTHONPATH=. uv run python benchmarks/login_storm.py --seconds 10 --logins 8
+"""
+
+import argparse
+import asyncio
+import secrets
+import statistics
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete
+
+from app import models
+from app.core import db, security
+from app.core.config import settings
+from app.main import app
+
+PASSWORD = "Storm-Benchmark-Password-1!"
+
+
+async def create_fixtures() -> tuple[models.User, models.Project, str]:
+    suffix = secrets.token_hex(4)
+    plain_key, key_prefix, key_hash = security.generate_api_key()
+    async with db.AsyncSessionLocal() as session:
+        user = models.User(
+            email=f"storm-{suffix}@example.com",
+            hashed_password=security.hash_password(PASSWORD),
+        )
+        project = models.Project(name="Login storm", project_key=f"storm-{suffix}")
+        project.owner = user
+        session.add(
+            models.APIKey(
+                name="storm",
+                key_hash=key_hash,
+                key_prefix=key_prefix,
+                project=project,
+            )
+        )
+        await session.commit()
+        return user, project, plain_key
+
+
+async def drop_fixtures(user: models.User, project: models.Project) -> None:
+    async with db.AsyncSessionLocal() as session:
+        await session.execute(
+            delete(models.Metric).where(models.Metric.project_id == project.id)
+        )
+        await session.execute(
+            delete(models.APIKey).where(models.APIKey.project_id == project.id)
+        )
+        await session.execute(
+            delete(models.Project).where(models.Project.id == project.id)
+        )
+        await session.execute(delete(models.User).where(models.User.id == user.id))
+        await session.commit()
+
+
+async def storm(
+    client: AsyncClient, email: str, api_key: str, seconds: float, logins: int
+) -> dict:
+    deadline = time.monotonic() + seconds
+    latencies: list[float] = []
+    login_count = 0
+    rejected = 0
+
+    async def login_loop():
+        nonlocal login_count, rejected
+        while time.monotonic() < deadline:
+            response = await client.post(
+                "/api/v1/auth/login", json={"email": email, "password": PASSWORD}
+            )
+            login_count += 1
+            rejected += response.status_code == 503
+
+    async def track_loop():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/v1/track/",
+                headers={"X-API-Key": api_key},
+                json={
+                    "url_path": "/orders",
+                    "method": "POST",
+                    "response_status_code": 201,
+                    "response_time_ms": 12.0,
+                },
+            )
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(track_loop(), *[login_loop() for _ in range(logins)])
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "track_requests": len(latencies),
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "max_ms": max(latencies) * 1000,
+        "logins": login_count,
+        "rejected": rejected,
+    }
+
+
+async def main(seconds: float, logins: int) -> None:
+    settings.RATE_LIMIT_ENABLED = False
+    user, project, api_key = await create_fixtures()
+    pooled_run = security.password_executor.run
+
+    async def inline_run(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    results = {}
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://localhost"
+        ) as client:
+            for mode, run in [("inline", inline_run), ("pool", pooled_run)]:
+                security.password_executor.run = run
+                results[mode] = await storm(
+                    client, user.email, api_key, seconds, logins
+                )
+    finally:
+        security.password_executor.run = pooled_run
+        await drop_fixtures(user, project)
+        await db.dispose_engines()
+
+    print(f"{logins} login clients + 1 /track client, {seconds:.0f}s per mode")
+    print(
+        f"{'mode':<8}{'track req':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        f"{'logins':>8}{'503s':>6}"
+    )
+    for mode, r in results.items():
+        print(
+            f"{mode:<8}{r['track_requests']:>10}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+            f"{r['max_ms']:>9.1f}{r['logins']:>8}{r['rejected']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--logins", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.logins))
@@ -0,0 +1,114 @@
+"""
+Serialization cost of a full page of raw metrics (`GET /metrics/`).
+
+Compares the previous response path (ORM `Metric` entities validated into
+`MetricResponse` with `from_attributes`, dumped to JSON-able Python and encoded
+with `json.dumps`, as FastAPI does for a `response_model`) with the current one
+(plain rows encoded straight to bytes by `schemas.MetricRowList`). Both
+produce the same JSON; the database fetch is not included.
+
+    PYTHONPATH=. uv run python benchmarks/metric_list_serialization.py --rows 10000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from http import HTTPMethod
+
+from pydantic import TypeAdapter
+
+from app import models, schemas
+
+PATHS = [f"/api/v1/resource-{i}/items" for i in range(200)]
+USER_AGENTS = [
+    f"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    f"Chrome/{100 + i}.0.0.0 Safari/537.36"
+    for i in range(50)
+]
+METHODS = [HTTPMethod.GET, HTTPMethod.POST, HTTPMethod.PUT, HTTPMethod.DELETE]
+STATUSES = [200, 200, 200, 201, 204, 400, 404, 500]
+
+
+def generate_rows(count: int) -> list[schemas.MetricRow]:
+    rng = random.Random(42)
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    return [
+        {
+            "url_path": rng.choice(PATHS),
+            "method": rng.choice(METHODS),
+            "response_status_code": rng.choice(STATUSES),
+            "response_time_ms": round(rng.lognormvariate(4, 1) * 1000) / 1000.0,
+            "user_agent": rng.choice(USER_AGENTS),
+            "id": i + 1,
+            "timestamp": start + timedelta(milliseconds=i * 10),
+            "ip_hash": f"{rng.getrandbits(64):016x}",
+        }
+        for i in range(count)
+    ]
+
+
+def to_entities(rows: list[schemas.MetricRow]) -> list[models.Metric]:
+    paths = {path: models.URLPath(value=path) for path in PATHS}
+    agents = {agent: models.UserAgent(value=agent) for agent in USER_AGENTS}
+    return [
+        models.Metric(
+            id=row["id"],
+            url_path_entry=paths[row["url_path"]],
+            user_agent_entry=agents[row["user_agent"]],
+            method=row["method"],
+            response_status_code=row["response_status_code"],
+            response_time_us=round(row["response_time_ms"] * 1000),
+            timestamp=row["timestamp"],
+            ip_hash=row["ip_hash"],
+        )
+        for row in rows
+    ]
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(row_count: int, repeat: int) -> None:
+    rows = generate_rows(row_count)
+    entities = to_entities(rows)
+    response_list = TypeAdapter(list[schemas.MetricResponse])
+
+    def orm_models() -> bytes:
+        validated = response_list.validate_python(entities, from_attributes=True)
+        content = response_list.dump_python(validated, mode="json")
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+
+    def core_rows() -> bytes:
+        return schemas.MetricRowList.dump_json(rows)
+
+    assert json.loads(orm_models()) == json.loads(core_rows())
+
+    baseline = measure(orm_models, repeat)
+    current = measure(core_rows, repeat)
+    print(f"{row_count} rows, median of {repeat} runs")
+    print(f"{'path':<28}{'ms':>10}{'rows/s':>14}")
+    for name, elapsed in [
+        ("ORM + MetricResponse", baseline),
+        ("rows + TypeAdapter", current),
+    ]:
+        print(f"{name:<28}{elapsed * 1000:>10.1f}{row_count / elapsed:>14.0f}")
+    print(f"speedup: {baseline / current:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
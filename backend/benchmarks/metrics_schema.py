@@ -0,0 +1,215 @@
+"""
+Insert throughput and on-disk size of the `metrics` storage profiles.
+
+Creates one scratch table per profile inside a throwaway `bench` schema, inserts
+the same synthetic rows into each and reports rows/s plus heap and index size.
+
+    PYTHONPATH=. uv run python benchmarks/metrics_schema.py --rows 200000
+
+Profiles:
+    original    strings + float8/int4 + the 11 indexes of the initial migration
+    dictionary  url_path / user_agent replaced by dimension ids (same indexes)
+    compact     dimension ids + int4 microseconds + int2 status, 2 indexes + BRIN
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import settings
+
+PATHS = [f"/api/v1/resource-{i}/items" for i in range(200)]
+USER_AGENTS = [
+    f"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    f"Chrome/{100 + i}.0.0.0 Safari/537.36"
+    for i in range(50)
+]
+METHODS = ["GET", "POST", "PUT", "DELETE"]
+STATUSES = [200, 200, 200, 201, 204, 400, 404, 500]
+
+PROFILES: dict[str, list[str]] = {
+    "original": [
+        """CREATE TABLE bench.metrics_original (
+            id serial PRIMARY KEY,
+            project_id integer NOT NULL,
+            url_path varchar NOT NULL,
+            method varchar(10) NOT NULL,
+            response_status_code integer NOT NULL,
+            response_time_ms double precision NOT NULL,
+            timestamp timestamptz NOT NULL,
+            user_agent varchar,
+            ip_hash varchar
+        )""",
+        *[
+            f"CREATE INDEX ON bench.metrics_original ({cols})"
+            for cols in [
+                "project_id, method",
+                "project_id, response_status_code",
+                "project_id, timestamp",
+                "project_id, url_path",
+                "response_status_code, timestamp",
+                "method",
+                "project_id",
+                "response_status_code",
+                "timestamp",
+                "url_path",
+            ]
+        ],
+    ],
+    "dictionary": [
+        """CREATE TABLE bench.metrics_dictionary (
+            id serial PRIMARY KEY,
+            project_id integer NOT NULL,
+            url_path_id integer NOT NULL,
+            method varchar(10) NOT NULL,
+            response_status_code integer NOT NULL,
+            response_time_ms double precision NOT NULL,
+            timestamp timestamptz NOT NULL,
+            user_agent_id integer,
+            ip_hash varchar
+        )""",
+        *[
+            f"CREATE INDEX ON bench.metrics_dictionary ({cols})"
+            for cols in [
+                "project_id, method",
+                "project_id, response_status_code",
+                "project_id, timestamp",
+                "project_id, url_path_id",
+                "project_id, url_path_id, method",
+                "response_status_code, timestamp",
+                "method",
+                "project_id",
+                "response_status_code",
+                "timestamp",
+                "url_path_id",
+            ]
+        ],
+    ],
+    "compact": [
+        """CREATE TABLE bench.metrics_compact (
+            id serial PRIMARY KEY,
+            project_id integer NOT NULL,
+            url_path_id integer NOT NULL,
+            method varchar(10) NOT NULL,
+            response_status_code smallint NOT NULL,
+            response_time_us integer NOT NULL,
+            timestamp timestamptz NOT NULL,
+            user_agent_id integer,
+            ip_hash varchar
+        )""",
+        "CREATE INDEX ON bench.metrics_compact (project_id, timestamp)",
+        "CREATE INDEX ON bench.metrics_compact USING brin (timestamp)",
+    ],
+}
+
+INSERTS = {
+    "original": """INSERT INTO bench.metrics_original
+        (project_id, url_path, method, response_status_code, response_time_ms,
+         timestamp, user_agent, ip_hash)
+        VALUES (:project_id, :url_path, :method, :status, :time_ms,
+                :timestamp, :user_agent, :ip_hash)""",
+    "dictionary": """INSERT INTO bench.metrics_dictionary
+        (project_id, url_path_id, method, response_status_code, response_time_ms,
+         timestamp, user_agent_id, ip_hash)
+        VALUES (:project_id, :url_path_id, :method, :status, :time_ms,
+                :timestamp, :user_agent_id, :ip_hash)""",
+    "compact": """INSERT INTO bench.metrics_compact
+        (project_id, url_path_id, method, response_status_code, response_time_us,
+         timestamp, user_agent_id, ip_hash)
+        VALUES (:project_id, :url_path_id, :method, :status, :time_us,
+                :timestamp, :user_agent_id, :ip_hash)""",
+}
+
+
+def generate_rows(count: int) -> list[dict]:
+    rng = random.Random(42)
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    rows = []
+    for i in range(count):
+        path_id = rng.randrange(len(PATHS))
+        agent_id = rng.randrange(len(USER_AGENTS))
+        time_ms = round(rng.lognormvariate(4, 1), 3)
+        rows.append(
+            {
+                "project_id": rng.randint(1, 20),
+                "url_path": PATHS[path_id],
+                "url_path_id": path_id + 1,
+                "method": rng.choice(METHODS),
+                "status": rng.choice(STATUSES),
+                "time_ms": time_ms,
+                "time_us": round(time_ms * 1000),
+                "timestamp": start + timedelta(milliseconds=i * 10),
+                "user_agent": USER_AGENTS[agent_id],
+                "user_agent_id": agent_id + 1,
+                "ip_hash": f"{rng.getrandbits(64):016x}",
+            }
+        )
+    return rows
+
+
+async def run_profile(
+    conn: AsyncConnection, profile: str, rows: list[dict], batch_size: int
+) -> dict:
+    for ddl in PROFILES[profile]:
+        await conn.execute(text(ddl))
+
+    insert = text(INSERTS[profile])
+    started = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        await conn.execute(insert, rows[offset : offset + batch_size])
+    elapsed = time.perf_counter() - started
+
+    table = f"bench.metrics_{profile}"
+    sizes = (
+        await conn.execute(
+            text("SELECT pg_table_size(:t) AS heap, pg_indexes_size(:t) AS indexes"),
+            {"t": table},
+        )
+    ).one()
+    return {
+        "profile": profile,
+        "rows_per_second": len(rows) / elapsed,
+        "heap_mb": sizes.heap / 2**20,
+        "index_mb": sizes.indexes / 2**20,
+    }
+
+
+async def main(row_count: int, batch_size: int) -> None:
+    engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    rows = generate_rows(row_count)
+    results = []
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS bench CASCADE"))
+            await conn.execute(text("CREATE SCHEMA bench"))
+            await conn.commit()
+            for profile in PROFILES:
+                results.append(await run_profile(conn, profile, rows, batch_size))
+                await conn.commit()
+            await conn.execute(text("DROP SCHEMA bench CASCADE"))
+            await conn.commit()
+    finally:
+        await engine.dispose()
+
+    print(f"{row_count} rows, batches of {batch_size}")
+    print(
+        f"{'profile':<12}{'rows/s':>12}{'heap MB':>10}{'index MB':>10}{'total MB':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['profile']:<12}{r['rows_per_second']:>12.0f}{r['heap_mb']:>10.1f}"
+            f"{r['index_mb']:>10.1f}{r['heap_mb'] + r['index_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch_size))
@@ -0,0 +1,111 @@
+"""
+Python-side cost of preparing the raw summary, time-series and endpoint queries.
+
+Compares rebuilding the `select()` tree on every call, as the services used
+to, with reusing the statement built once per query shape
+(`metric_service._QueryShape`). Both then go through what SQLAlchemy does
+before handing a statement to asyncpg: cache key, compiled cache lookup and
+parameter processing. The database round trip is not included.
+
+    PYTHONPATH=. uv run python benchmarks/query_build.py --repeat 2000
+"""
+
+import argparse
+import functools
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+
+from app import schemas
+from app.services import metric_service
+
+DIALECT = PGDialect_asyncpg()
+
+
+def make_params() -> schemas.MetricQuery:
+    end = datetime.now(timezone.utc).replace(second=59, microsecond=999999)
+    return schemas.MetricQuery(
+        start_date=end - timedelta(hours=6),
+        end_date=end,
+        method="GET",
+        status_class="5xx",
+        url_path="/users/{id}/orders",
+    )
+
+
+def queries():
+    params = make_params()
+    previous = metric_service._comparison_params(
+        params, schemas.CompareTo.PREVIOUS_PERIOD
+    )
+    granularity = schemas.TimeGranularity.MINUTE
+    return {
+        "summary": (metric_service._summary_statement, [params], {}),
+        "summary (compare)": (
+            metric_service._summary_statement,
+            [params, previous],
+            {},
+        ),
+        "time series": (
+            metric_service._time_series_statement,
+            [params],
+            {"paginate": True, "granularity": granularity},
+        ),
+        "endpoints (compare)": (
+            metric_service._endpoints_statement,
+            [params, previous],
+            {"paginate": True},
+        ),
+    }
+
+
+def prepare(build, periods, shape_kwargs, compiled_cache: dict) -> None:
+    """What one call does in Python before the statement reaches the driver."""
+    shape = metric_service._QueryShape.of(periods, **shape_kwargs)
+    statement = build(shape)
+    values = metric_service._bind_values(shape, 1, periods)
+    compiled, extracted, _, _ = statement._compile_w_cache(
+        DIALECT, compiled_cache=compiled_cache, column_keys=[]
+    )
+    compiled.construct_params(values, extracted_parameters=extracted)
+
+
+def measure(fn, repeat: int) -> float:
+    fn()  # Warm the caches
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(repeat: int) -> None:
+    print(f"median of {repeat} runs, µs per query")
+    print(f"{'query':<22}{'rebuilt':>10}{'cached':>10}{'speedup':>10}")
+    for name, (build, periods, shape_kwargs) in queries().items():
+        compiled_cache: dict = {}
+        # Arguments bound now, not looked up in the loop when called
+        rebuilt = measure(
+            functools.partial(
+                prepare, build.__wrapped__, periods, shape_kwargs, compiled_cache
+            ),
+            repeat,
+        )
+        cached = measure(
+            functools.partial(prepare, build, periods, shape_kwargs, compiled_cache),
+            repeat,
+        )
+        print(
+            f"{name:<22}{rebuilt * 1e6:>10.1f}{cached * 1e6:>10.1f}"
+            f"{rebuilt / cached:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeat)
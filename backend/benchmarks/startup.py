@@ -0,0 +1,124 @@
+"""
+Cold start of one API worker against the database configured in `.env`.
+
+Measures, in fresh processes, the import time of `app.main` and the time from
+spawning `uvicorn` to the first `200` from `/health/live` (lifespan included),
+with `DB_CREATE_ALL` on (tables checked / created at every boot) and off
+(schema trusted to Alembic). Exits with status 1 when the median import time
+or the median time-to-first-200 without `create_all` is over its budget
+(`IMPORT_BUDGET_MS`, `READY_BUDGET_MS`); the `startup` CI job runs it.
+
+    PYTHONPATH=. uv run python benchmarks/startup.py --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Medians measured on one vCPU with bytecode compiled (import about 1.25 s,
+# first 200 about 1.75 s) plus 30%, so a regression of a few hundred ms fails
+IMPORT_BUDGET_MS = 1600
+READY_BUDGET_MS = 2300
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time() -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_first_200(create_all: bool, timeout: float = 60.0) -> float:
+    port = free_port()
+    env = {**os.environ, "DB_CREATE_ALL": str(create_all).lower()}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+            try:
+                url = f"http://localhost:{port}/health/live"
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except urllib.error.HTTPError as e:
+                # Up, but refusing the request (e.g. `TRUSTED_HOSTS`)
+                raise RuntimeError(f"/health/live answered {e.code}") from e
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"No 200 within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def median_ms(fn, runs: int) -> float:
+    return statistics.median(fn() for _ in range(runs)) * 1000
+
+
+def main(runs: int, import_budget_ms: float, ready_budget_ms: float) -> int:
+    imported = median_ms(import_time, runs)
+    with_create_all = median_ms(lambda: time_to_first_200(True), runs)
+    trusted = median_ms(lambda: time_to_first_200(False), runs)
+
+    print(f"median of {runs} runs")
+    print(f"{'measure':<36}{'ms':>10}{'budget':>10}")
+    rows = [
+        ("import app.main", imported, import_budget_ms),
+        ("first 200, DB_CREATE_ALL=true", with_create_all, None),
+        ("first 200, DB_CREATE_ALL=false", trusted, ready_budget_ms),
+    ]
+    over = False
+    for name, elapsed, budget in rows:
+        mark = ""
+        if budget is not None and elapsed > budget:
+            mark, over = "  over budget", True
+        budget_text = f"{budget:.0f}" if budget is not None else "-"
+        print(f"{name:<36}{elapsed:>10.0f}{budget_text:>10}{mark}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--ready-budget-ms", type=float, default=READY_BUDGET_MS)
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.import_budget_ms, args.ready_budget_ms))
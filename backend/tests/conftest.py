@@ -77,6 +77,29 @@ async def db_session(engine):
             await transaction.rollback()
 
 
+@pytest.fixture(autouse=True)
+def reset_worker_state():
+    """Drop per-worker in-memory state that may refer to rolled back rows."""
+    from app.core import (
+        alerting,
+        api_key_filter,
+        live_stream,
+        live_window,
+        quotas,
+        rate_limiter,
+    )
+    from app.services import dimension_service
+
+    dimension_service.clear_cache()
+    live_window.registry.clear()
+    live_stream.hub.clear()
+    alerting.engine.clear()
+    rate_limiter.limiter.clear()
+    rate_limiter.limiter.store.clear()
+    api_key_filter.key_filter.clear()
+    quotas.usage.clear()
+
+
 @pytest_asyncio.fixture
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create a test client that uses the test database."""
@@ -101,6 +101,7 @@ async def create_metric(
     ip_hash: str | None = None,
 ):
     from app import models
+    from app.services import dimension_service
 
     if isinstance(method, str):
         method = HTTPMethod(method)
@@ -115,12 +116,12 @@ async def create_metric(
 
     metric = models.Metric(
         project_id=project.id,
-        url_path=url_path,
+        url_path_id=await dimension_service.get_url_path_id(session, url_path),
         method=method,
         response_status_code=response_status_code,
         response_time_ms=response_time_ms,
         timestamp=timestamp,
-        user_agent=user_agent,
+        user_agent_id=await dimension_service.get_user_agent_id(session, user_agent),
         ip_hash=ip_hash,
     )
     session.add(metric)
@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from tests.factories import create_metric, create_project, create_user
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def projects_with_data(db_session, test_user):
+    base_time = datetime.now(timezone.utc).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+    shop = await create_project(
+        db_session, user=test_user, name="Shop", project_key="shop-key"
+    )
+    blog = await create_project(
+        db_session, user=test_user, name="Blog", project_key="blog-key"
+    )
+    idle = await create_project(
+        db_session, user=test_user, name="Idle", project_key="idle-key"
+    )
+
+    for status_code, response_time_ms in ((200, 10.0), (500, 30.0)):
+        await create_metric(
+            db_session,
+            project=shop,
+            response_status_code=status_code,
+            response_time_ms=response_time_ms,
+            timestamp=base_time,
+        )
+    await create_metric(
+        db_session, project=blog, response_time_ms=80.0, timestamp=base_time
+    )
+
+    # Someone else's project is never included
+    other_user = await create_user(db_session, email="other@example.com")
+    other = await create_project(
+        db_session, user=other_user, name="Other", project_key="other-key"
+    )
+    await create_metric(db_session, project=other, timestamp=base_time)
+
+    return shop, blog, idle
+
+
+async def test_account_summary_all_projects(
+    client: AsyncClient, auth_headers, projects_with_data
+):
+    response = await client.get("/api/v1/metrics/summary", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["request_count"] == 3
+    assert data["error_count"] == 1
+    assert data["avg_response_time_ms"] == 40.0
+    assert data["slowest_request_ms"] == 80.0
+
+    breakdown = {p["project_key"]: p for p in data["projects"]}
+    assert set(breakdown) == {"shop-key", "blog-key", "idle-key"}
+    assert breakdown["shop-key"]["request_count"] == 2
+    assert breakdown["shop-key"]["error_rate"] == 50.0
+    assert breakdown["blog-key"]["avg_response_time_ms"] == 80.0
+    assert breakdown["idle-key"]["request_count"] == 0
+
+
+async def test_account_summary_selected_projects(
+    client: AsyncClient, auth_headers, projects_with_data
+):
+    response = await client.get(
+        "/api/v1/metrics/summary",
+        headers=auth_headers,
+        params={"projects": "shop-key,idle-key"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["request_count"] == 2
+    assert [p["name"] for p in data["projects"]] == ["Shop", "Idle"]
+
+
+async def test_account_summary_unknown_project(
+    client: AsyncClient, auth_headers, projects_with_data
+):
+    response = await client.get(
+        "/api/v1/metrics/summary",
+        headers=auth_headers,
+        params={"projects": ["shop-key", "other-key"]},
+    )
+    assert response.status_code == 404
+    assert response.json()["details"] == {"project_keys": ["other-key"]}
@@ -0,0 +1,415 @@
+import asyncio
+import os
+import socket
+from http import HTTPMethod
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+from app import models, schemas
+from app.core import alerting
+from tests.factories import create_api_key
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    now = 1000.0
+
+    @classmethod
+    def time(cls) -> float:
+        return cls.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    FakeClock.now = 1000.0
+    monkeypatch.setattr(alerting, "time", FakeClock)
+    return FakeClock
+
+
+def make_rule(**overrides) -> models.AlertRule:
+    fields = dict(
+        id=1,
+        project_id=10,
+        name="Orders failing",
+        metric=schemas.AlertMetric.ERROR_RATE,
+        operator=schemas.AlertOperator.GT,
+        threshold=5.0,
+        window_seconds=60,
+        url_path_id=7,
+        method=HTTPMethod.POST,
+        webhook_url=None,
+        is_active=True,
+    )
+    return models.AlertRule(**(fields | overrides))
+
+
+async def test_rule_fires_and_resolves_on_sliding_window(clock):
+    engine = alerting.AlertEngine(alerting.AlertNotifier(workers=1, queue_size=10))
+    engine.upsert(make_rule())
+
+    for i in range(10):
+        clock.now = 1030 + i
+        engine.record(10, 7, HTTPMethod.POST, 20_000, 500 if i == 0 else 200)
+        # Other endpoints, methods and projects are not counted
+        engine.record(10, 7, HTTPMethod.GET, 20_000, 500)
+        engine.record(10, 8, HTTPMethod.POST, 20_000, 500)
+        engine.record(11, 7, HTTPMethod.POST, 20_000, 500)
+
+    # Still warming up: the rule has not seen a full window yet
+    assert engine.evaluate(now=1040) == []
+
+    [event] = engine.evaluate(now=1060)
+    assert event.status == schemas.AlertStatus.FIRING
+    assert event.value == 10.0
+    assert engine.notifier.queue.qsize() == 1
+
+    assert engine.evaluate(now=1061) == []
+
+    # The 1030-1039 buckets have left the 60 second window
+    [event] = engine.evaluate(now=1100)
+    assert event.status == schemas.AlertStatus.RESOLVED
+    assert event.value is None
+    window = engine.rules[1]
+    assert window.total_requests == 0
+    assert window.total_errors == 0
+
+
+async def test_rule_window_expires_buckets_incrementally(clock):
+    window = alerting.RuleWindow(
+        make_rule(metric=schemas.AlertMetric.AVG_RESPONSE_TIME_MS), now_second=0
+    )
+    for second in range(120):
+        window.add(second, 1_000 * (second + 1), False)
+        window.advance(second)
+
+    # Only the last 60 seconds (61..120 ms) remain
+    assert window.total_requests == 60
+    assert window.value() == pytest.approx(90.5)
+
+
+async def test_engine_upsert_keeps_state_of_unchanged_rules(clock):
+    engine = alerting.AlertEngine(alerting.AlertNotifier(workers=1, queue_size=10))
+    engine.upsert(make_rule())
+    engine.record(10, 7, HTTPMethod.POST, 1_000, 500)
+
+    engine.load([make_rule()])
+    assert engine.rules[1].total_requests == 1
+
+    engine.load([make_rule(threshold=10.0)])
+    assert engine.rules[1].total_requests == 0
+
+    engine.load([make_rule(is_active=False)])
+    assert engine.rules == {}
+    assert engine.by_project == {}
+
+
+async def test_notifier_delivers_from_bounded_queue(monkeypatch):
+    delivered = []
+
+    async def deliver(event, webhook_url):
+        delivered.append((event.rule_id, webhook_url))
+
+    notifier = alerting.AlertNotifier(workers=2, queue_size=2)
+    monkeypatch.setattr(notifier, "deliver", deliver)
+    event = schemas.AlertEvent(
+        rule_id=1,
+        project_id=10,
+        name="Orders failing",
+        status=schemas.AlertStatus.FIRING,
+        metric=schemas.AlertMetric.ERROR_RATE,
+        operator=schemas.AlertOperator.GT,
+        threshold=5,
+        value=10,
+        timestamp="2026-01-31T10:00:00Z",
+    )
+
+    for _ in range(3):
+        notifier.notify(event, "https://hooks.example.com")
+    assert notifier.queue.qsize() == 2  # third event dropped
+
+    await notifier.start()
+    try:
+        await asyncio.wait_for(notifier.queue.join(), timeout=1)
+    finally:
+        await notifier.stop()
+    assert delivered == [(1, "https://hooks.example.com")] * 2
+
+
+class FakeSharedCounts:
+    """The Redis side of `alerting.SharedAlertCounts`, shared by fake workers."""
+
+    def __init__(self, store: dict):
+        self.store = store
+        self.store.setdefault("counts", {})
+        self.store.setdefault("firing", set())
+
+    async def lead(self) -> bool:
+        return self.store.setdefault("leader", self) is self
+
+    async def push(self, counts):
+        for second, rules in counts.items():
+            for rule_id, values in rules.items():
+                stored = self.store["counts"].setdefault((second, rule_id), [0, 0, 0])
+                for i, value in enumerate(values):
+                    stored[i] += value
+
+    async def pull(self, seconds):
+        return [
+            {
+                rule_id: values
+                for (stored_second, rule_id), values in self.store["counts"].items()
+                if stored_second == second
+            }
+            for second in seconds
+        ]
+
+    async def firing(self):
+        return set(self.store["firing"])
+
+    async def set_firing(self, events):
+        for event in events:
+            if event.status == schemas.AlertStatus.FIRING:
+                self.store["firing"].add(event.rule_id)
+            else:
+                self.store["firing"].discard(event.rule_id)
+
+
+async def test_workers_share_counts_and_one_evaluates(clock):
+    store = {}
+    workers = [
+        alerting.AlertEngine(
+            alerting.AlertNotifier(workers=1, queue_size=10), FakeSharedCounts(store)
+        )
+        for _ in range(4)
+    ]
+    for engine in workers:
+        engine.upsert(make_rule(metric=schemas.AlertMetric.REQUEST_COUNT))
+
+    for second in range(1000, 1070):
+        clock.now = second
+        for engine in workers:
+            engine.record(10, 7, HTTPMethod.POST, 1_000, 200)
+        events = [await engine.tick(second + 0.5) for engine in workers]
+
+    leader, *followers = workers
+    # 4 requests a second, merged 2 seconds behind: 58 seconds of the window
+    assert leader.rules[1].total_requests == 4 * 58
+    assert all(engine.rules[1].total_requests == 0 for engine in followers)
+
+    # Only the leader evaluates: one notification, not one per worker
+    assert events == [[], [], [], []]
+    assert leader.notifier.queue.qsize() == 1
+    assert all(engine.notifier.queue.empty() for engine in followers)
+    assert store["firing"] == {1}
+
+
+async def test_new_leader_keeps_firing_state(clock):
+    store = {}
+    first, second = (
+        alerting.AlertEngine(
+            alerting.AlertNotifier(workers=1, queue_size=10), FakeSharedCounts(store)
+        )
+        for _ in range(2)
+    )
+    for engine in (first, second):
+        engine.upsert(make_rule(metric=schemas.AlertMetric.REQUEST_COUNT))
+
+    for now in range(1000, 1070):
+        clock.now = now
+        second.record(10, 7, HTTPMethod.POST, 1_000, 200)
+        await first.tick(now)
+        await second.tick(now)
+    assert first.notifier.queue.qsize() == 1
+
+    # The leader died: the other worker takes over with full windows and
+    # doesn't repeat the firing event
+    store["leader"] = second.shared
+    for now in range(1070, 1075):
+        clock.now = now
+        second.record(10, 7, HTTPMethod.POST, 1_000, 200)
+        assert await second.tick(now) == []
+    assert second.rules[1].firing
+    assert second.rules[1].total_requests == 58
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_REDIS_URL"), reason="TEST_REDIS_URL is not set"
+)
+async def test_shared_counts_in_redis():
+    shared = alerting.SharedAlertCounts(os.environ["TEST_REDIS_URL"])
+    other = alerting.SharedAlertCounts(os.environ["TEST_REDIS_URL"])
+    second = 1_000_000_000 + int.from_bytes(os.urandom(3))
+    try:
+        await shared.push({second: {1: [2, 1, 300]}})
+        await other.push({second: {1: [1, 0, 100], 2: [5, 5, 500]}})
+        assert await shared.pull(range(second, second + 2)) == [
+            {1: [3, 1, 400], 2: [5, 5, 500]},
+            {},
+        ]
+        assert await shared.lead() != await other.lead()
+    finally:
+        await shared.client.delete(
+            alerting.COUNTS_KEY.format(second=second), alerting.LEADER_KEY
+        )
+        await shared.close()
+        await other.close()
+
+
+def make_event() -> schemas.AlertEvent:
+    return schemas.AlertEvent(
+        rule_id=1,
+        project_id=10,
+        name="Orders failing",
+        status=schemas.AlertStatus.FIRING,
+        metric=schemas.AlertMetric.ERROR_RATE,
+        operator=schemas.AlertOperator.GT,
+        threshold=5,
+        value=10,
+        timestamp="2026-01-31T10:00:00Z",
+    )
+
+
+async def test_notifier_posts_to_the_resolved_address(monkeypatch):
+    requests = []
+
+    async def getaddrinfo(host, port, **kwargs):
+        assert (host, port) == ("hooks.example.com", 443)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.215.14", port))]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+    notifier = alerting.AlertNotifier(workers=1, queue_size=1)
+    notifier._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: requests.append(request) or httpx.Response(204)
+        )
+    )
+    try:
+        await notifier.deliver(make_event(), "https://hooks.example.com/alerts")
+    finally:
+        await notifier._client.aclose()
+
+    [request] = requests
+    assert request.url == "https://93.184.215.14/alerts"
+    assert request.headers["Host"] == "hooks.example.com"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"
+
+
+@pytest.mark.parametrize(
+    "addresses",
+    [["127.0.0.1"], ["93.184.215.14", "169.254.169.254"], ["::ffff:10.0.0.1"]],
+)
+async def test_notifier_refuses_hosts_resolving_to_private_addresses(
+    monkeypatch, addresses
+):
+    async def getaddrinfo(host, port, **kwargs):
+        return [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", (a, port)) for a in addresses
+        ]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+    notifier = alerting.AlertNotifier(workers=1, queue_size=1)
+    await notifier.start()
+    try:
+        with pytest.raises(ValueError, match="non-public"):
+            await notifier.deliver(make_event(), "https://rebind.example.com/alerts")
+    finally:
+        await notifier.stop()
+
+
+@pytest.mark.parametrize(
+    "webhook_url",
+    [
+        "http://localhost:8000/hook",
+        "http://127.0.0.1/hook",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://10.0.0.5/hook",
+        "http://192.168.1.1/hook",
+        "http://[::1]/hook",
+        "http://[fe80::1]/hook",
+    ],
+)
+async def test_webhook_url_must_be_public(
+    client: AsyncClient, auth_headers, project, webhook_url
+):
+    base_url = f"/api/v1/projects/{project.project_key}/alert-rules"
+    response = await client.post(
+        f"{base_url}/",
+        headers=auth_headers,
+        json={
+            "name": "Orders failing",
+            "metric": "error_rate",
+            "operator": "gt",
+            "threshold": 5,
+            "webhook_url": webhook_url,
+        },
+    )
+    assert response.status_code == 422
+
+    response = await client.post(
+        f"{base_url}/",
+        headers=auth_headers,
+        json={"name": "Ok", "metric": "error_rate", "operator": "gt", "threshold": 5},
+    )
+    response = await client.patch(
+        f"{base_url}/{response.json()['id']}",
+        headers=auth_headers,
+        json={"webhook_url": webhook_url},
+    )
+    assert response.status_code == 422
+
+
+async def test_alert_rule_crud(client: AsyncClient, auth_headers, db_session, project):
+    base_url = f"/api/v1/projects/{project.project_key}/alert-rules"
+
+    response = await client.post(
+        f"{base_url}/",
+        headers=auth_headers,
+        json={
+            "name": "Orders failing",
+            "metric": "error_rate",
+            "operator": "gt",
+            "threshold": 5,
+            "url_path": "/orders/",
+            "method": "POST",
+            "webhook_url": "https://hooks.example.com/alerts",
+        },
+    )
+    assert response.status_code == 201
+    rule = response.json()
+    assert rule["url_path"] == "/orders"
+    assert rule["window_seconds"] == 300
+    assert rule["webhook_url"] == "https://hooks.example.com/alerts"
+    assert rule["id"] in alerting.engine.rules
+
+    # Ingested metrics feed the rule's window
+    _, plain_key = await create_api_key(db_session, project=project)
+    response = await client.post(
+        "/api/v1/track/",
+        headers={"X-API-Key": plain_key},
+        json={
+            "url_path": "/orders",
+            "method": "POST",
+            "response_status_code": 500,
+            "response_time_ms": 12.0,
+        },
+    )
+    assert response.status_code == 200
+    assert alerting.engine.rules[rule["id"]].total_errors == 1
+
+    response = await client.get(f"{base_url}/", headers=auth_headers)
+    assert [r["id"] for r in response.json()] == [rule["id"]]
+
+    response = await client.patch(
+        f"{base_url}/{rule['id']}", headers=auth_headers, json={"is_active": False}
+    )
+    assert response.status_code == 200
+    assert response.json()["is_active"] is False
+    assert rule["id"] not in alerting.engine.rules
+
+    response = await client.delete(f"{base_url}/{rule['id']}", headers=auth_headers)
+    assert response.status_code == 204
+    response = await client.get(f"{base_url}/{rule['id']}", headers=auth_headers)
+    assert response.status_code == 404
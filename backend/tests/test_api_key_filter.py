@@ -0,0 +1,127 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.core import api_key_filter, security
+from app.core.api_key_filter import BloomFilter, key_filter
+from app.core.config import settings
+from app.services import api_key_service
+from tests.factories import create_api_key
+
+pytestmark = pytest.mark.asyncio
+
+METRIC = {
+    "url_path": "/orders",
+    "method": "GET",
+    "response_status_code": 200,
+    "response_time_ms": 10.0,
+}
+
+
+async def track(client: AsyncClient, db_session, api_key: str) -> tuple[int, int]:
+    """POST /track, returning the status code and the number of statements."""
+    statements = []
+    engine = db_session.bind.sync_engine
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = await client.post(
+            "/api/v1/track/", headers={"X-API-Key": api_key}, json=METRIC
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return response.status_code, len(statements)
+
+
+async def test_bloom_filter():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    for i in range(1_000):
+        bloom.add(f"sk_live_{i}")
+
+    assert all(f"sk_live_{i}" in bloom for i in range(1_000))
+    false_positives = sum(f"sk_test_{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+async def test_unknown_prefix_rejected_once(
+    client: AsyncClient, auth_headers, db_session, project
+):
+    await api_key_service.refresh_key_filter(db_session, rebuild=True)
+    assert await track(client, db_session, "unknown_prefix_key") == (401, 1)
+    assert await track(client, db_session, "unknown_prefix_key") == (401, 0)
+
+    # Keys created on this worker are usable before the next refresh
+    response = await client.post(
+        f"/api/v1/projects/{project.project_key}/api-keys/",
+        headers=auth_headers,
+        json={"name": "New"},
+    )
+    assert response.status_code == 201
+    status_code, _ = await track(client, db_session, response.json()["key"])
+    assert status_code == 200
+
+
+async def test_rejected_key_cached(client: AsyncClient, db_session, project):
+    _, plain_key = await create_api_key(db_session, project=project)
+    wrong_key = plain_key[:-4] + "xxxx"
+
+    status_code, statements = await track(client, db_session, wrong_key)
+    assert (status_code, statements) == (401, 1)
+    assert await track(client, db_session, wrong_key) == (401, 0)
+
+    # The valid key with the same prefix is unaffected
+    status_code, _ = await track(client, db_session, plain_key)
+    assert status_code == 200
+
+
+async def test_key_from_another_worker_accepted_before_refresh(
+    client: AsyncClient, db_session, project
+):
+    await api_key_service.refresh_key_filter(db_session, rebuild=True)
+    _, plain_key = await create_api_key(
+        db_session, project=project, plain_key="pk_other_1234567890abcdef"
+    )
+    key_prefix = plain_key[: settings.API_KEY_LOOKUP_PREFIX_LENGTH]
+    assert not key_filter.may_exist(key_prefix)
+
+    status_code, _ = await track(client, db_session, plain_key)
+    assert status_code == 200
+    assert key_filter.may_exist(key_prefix)
+
+
+async def test_unknown_prefixes_past_miss_budget(
+    client: AsyncClient, db_session, project, monkeypatch
+):
+    _, plain_key = await create_api_key(db_session, project=project)
+    await api_key_service.refresh_key_filter(db_session, rebuild=True)
+    monkeypatch.setattr(key_filter, "misses", settings.API_KEY_FILTER_MISS_CONCURRENCY)
+
+    # Rejected in memory, and not remembered
+    assert await track(client, db_session, "unknown_prefix_key") == (401, 0)
+    assert not key_filter.is_rejected(security.hash_api_key("unknown_prefix_key"))
+    # Known prefixes are still looked up
+    status_code, _ = await track(client, db_session, plain_key)
+    assert status_code == 200
+
+    monkeypatch.setattr(key_filter, "misses", 0)
+    assert await track(client, db_session, "unknown_prefix_key") == (401, 1)
+
+
+async def test_refresh_picks_up_new_keys(db_session, project, monkeypatch):
+    await api_key_service.refresh_key_filter(db_session, rebuild=True)
+    assert not key_filter.may_exist("pk_other")
+
+    # Created by another worker
+    await create_api_key(db_session, project=project, plain_key="pk_other_1234567890")
+    assert not key_filter.may_exist("pk_other")
+    await api_key_service.refresh_key_filter(db_session)
+    assert key_filter.may_exist("pk_other")
+
+    # A filter that is no longer refreshed stops rejecting
+    assert not key_filter.may_exist("pk_unseen")
+    clock = api_key_filter.time.monotonic() + 3600
+    monkeypatch.setattr(api_key_filter.time, "monotonic", lambda: clock)
+    assert key_filter.may_exist("pk_unseen")
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app import schemas
+from app.services import metric_service
+from tests.factories import create_metric
+
+
+@pytest.fixture(autouse=True)
+def sample_any_range(monkeypatch):
+    # The test ranges hold a handful of rows, far below the exact fallback
+    monkeypatch.setattr(metric_service.settings, "APPROXIMATE_MIN_ROWS", 0)
+
+
+@pytest_asyncio.fixture
+async def sampled_data(db_session, project):
+    base_time = datetime.now(timezone.utc).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    ) - timedelta(days=1)
+    for i in range(6):
+        await create_metric(
+            db_session,
+            project=project,
+            url_path="/orders" if i % 2 else "/users",
+            response_status_code=500 if i == 0 else 200,
+            response_time_ms=10.0 * (i + 1),
+            timestamp=base_time + timedelta(minutes=i),
+        )
+    return {
+        "start_date": (base_time - timedelta(hours=1)).isoformat(),
+        "end_date": (base_time + timedelta(hours=1)).isoformat(),
+    }
+
+
+def test_sample_estimates_and_margins():
+    sampling = schemas.SamplingParams(accuracy="approximate", sample_percent=10)
+    row = metric_service._scale_sample(
+        {
+            "request_count": 100,
+            "error_count": 10,
+            "avg_response_time_ms": 50.0,
+            "response_time_stddev_ms": 20.0,
+        },
+        sampling,
+    )
+    assert row["request_count"] == 1000
+    assert row["error_count"] == 100
+
+    margin = metric_service._approximation(row, sampling).margin_of_error
+    assert margin.request_count == pytest.approx(1.96 * (100 * 0.9) ** 0.5 / 0.1, 0.01)
+    assert margin.avg_response_time_ms == pytest.approx(1.96 * 20 / 10, 0.01)
+    assert margin.error_rate == pytest.approx(1.96 * 3, 0.01)
+
+    # An exact part (e.g. archived rows) dilutes the sampling error of averages
+    row["request_count"] += 1000
+    margin = metric_service._approximation(row, sampling).margin_of_error
+    assert margin.avg_response_time_ms == pytest.approx(1.96 * 20 / 10 / 2, 0.01)
+
+    assert metric_service._approximation(row, schemas.SamplingParams()) is None
+
+
+@pytest.mark.asyncio
+async def test_approximate_summary(
+    client: AsyncClient, auth_headers, project, sampled_data
+):
+    url = f"/api/v1/projects/{project.project_key}/metrics/summary"
+    exact = (await client.get(url, headers=auth_headers, params=sampled_data)).json()
+    assert "approximation" not in exact
+
+    response = await client.get(
+        url,
+        headers=auth_headers,
+        params=sampled_data
+        | {
+            "accuracy": "approximate",
+            "sample_percent": 100,
+            "compare_to": "previous_day",
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    approximation = data.pop("approximation")
+    assert approximation["sample_percent"] == 100
+    assert approximation["sampled_requests"] == 6
+    assert approximation["margin_of_error"]["request_count"] == 0
+    assert data.pop("comparison")["previous"]["request_count"] == 0
+    assert data == exact
+
+
+@pytest.mark.asyncio
+async def test_approximate_endpoints_and_time_series(
+    client: AsyncClient, auth_headers, project, sampled_data
+):
+    base_url = f"/api/v1/projects/{project.project_key}/metrics"
+    params = sampled_data | {"accuracy": "approximate", "sample_percent": 100}
+
+    response = await client.get(
+        f"{base_url}/endpoints", headers=auth_headers, params=params
+    )
+    assert response.status_code == 200
+    endpoints = response.json()
+    assert sorted(e["approximation"]["sampled_requests"] for e in endpoints) == [3, 3]
+
+    response = await client.get(
+        f"{base_url}/time-series", headers=auth_headers, params=params
+    )
+    assert response.status_code == 200
+    points = response.json()
+    assert len(points) == 6
+    assert all(p["approximation"]["sampled_requests"] == 1 for p in points)
+
+    response = await client.get(
+        f"{base_url}/time-series", headers=auth_headers, params=sampled_data
+    )
+    assert all("approximation" not in p for p in response.json())
+
+
+@pytest.mark.asyncio
+async def test_approximate_sample_percent_bounds(
+    client: AsyncClient, auth_headers, project
+):
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/summary",
+        headers=auth_headers,
+        params={"accuracy": "approximate", "sample_percent": 0},
+    )
+    assert response.status_code == 422
+
+
+def test_system_sampling_reports_no_margins(monkeypatch):
+    monkeypatch.setattr(metric_service.settings, "APPROXIMATE_SAMPLE_METHOD", "SYSTEM")
+    sampling = schemas.SamplingParams(accuracy="approximate", sample_percent=10)
+    row = metric_service._scale_sample(
+        {"request_count": 100, "error_count": 10, "response_time_stddev_ms": 20.0},
+        sampling,
+    )
+    approximation = metric_service._approximation(row, sampling)
+    assert approximation.sampled_requests == 100
+    assert approximation.margin_of_error is None
+
+
+@pytest.mark.asyncio
+async def test_small_range_is_read_exactly(
+    client: AsyncClient, auth_headers, project, sampled_data, monkeypatch
+):
+    monkeypatch.setattr(metric_service.settings, "APPROXIMATE_MIN_ROWS", 1_000)
+    base_url = f"/api/v1/projects/{project.project_key}/metrics"
+    params = sampled_data | {"accuracy": "approximate", "sample_percent": 1}
+
+    for path in ("summary", "endpoints", "time-series"):
+        response = await client.get(
+            f"{base_url}/{path}", headers=auth_headers, params=params
+        )
+        assert response.status_code == 200
+        assert "approximation" not in response.text
+
+    response = await client.get(
+        f"{base_url}/summary", headers=auth_headers, params=params
+    )
+    assert response.json()["request_count"] == 6
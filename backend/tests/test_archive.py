@@ -0,0 +1,259 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app import schemas
+from tests.factories import create_metric
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def archive_path(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ARCHIVE_PATH", str(tmp_path))
+    return tmp_path
+
+
+@pytest_asyncio.fixture
+async def old_day(db_session, project):
+    """Two metrics 100 days ago (archivable) and one from today (hot)."""
+    day = (datetime.now(timezone.utc) - timedelta(days=100)).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+    await create_metric(
+        db_session,
+        project=project,
+        url_path="/orders",
+        method="POST",
+        response_status_code=201,
+        response_time_ms=40.0,
+        timestamp=day,
+    )
+    await create_metric(
+        db_session,
+        project=project,
+        url_path="/orders",
+        method="POST",
+        response_status_code=500,
+        response_time_ms=80.0,
+        timestamp=day + timedelta(minutes=5),
+    )
+    await create_metric(db_session, project=project, url_path="/orders")
+    return day
+
+
+async def test_cleanup_archives_before_deleting(
+    db_session, project, archive_path, old_day
+):
+    from app import models
+    from app.services.metric_service import cleanup_old_metrics
+
+    deleted_count = await cleanup_old_metrics(db_session, retention_days=90)
+    assert deleted_count == 2
+
+    partition = (
+        archive_path
+        / "metrics"
+        / f"project_id={project.id}"
+        / f"day={old_day.date().isoformat()}"
+    )
+    assert len(list(partition.glob("*.parquet"))) == 1
+
+    result = await db_session.execute(
+        select(models.Metric).where(models.Metric.project_id == project.id)
+    )
+    assert len(result.scalars().all()) == 1
+
+
+async def test_rerun_after_failed_delete_does_not_duplicate(
+    db_session, project, archive_path, old_day, monkeypatch
+):
+    from app.core.config import settings
+    from app.services import archive_service
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=90)
+    monkeypatch.setattr(settings, "ARCHIVE_BATCH_SIZE", 1)
+
+    async def crash(session, ids):
+        raise OSError("connection lost")
+
+    # The first batch is written, its delete never commits
+    with monkeypatch.context() as patch:
+        patch.setattr(archive_service, "_delete_batch", crash)
+        with pytest.raises(OSError):
+            await archive_service.archive_metrics(db_session, cutoff)
+
+    assert await archive_service.archive_metrics(db_session, cutoff) == 2
+    params = schemas.MetricQuery(
+        start_date=old_day - timedelta(hours=1), end_date=old_day + timedelta(hours=1)
+    )
+    [summary] = await archive_service.get_summary(project.id, params)
+    assert summary["request_count"] == 2
+
+
+async def test_rerun_keeps_batch_deleted_before_crash(
+    db_session, project, archive_path, old_day, monkeypatch
+):
+    from app.services import archive_service
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=90)
+
+    def crash():
+        raise OSError("disk full")
+
+    # The rows are moved, then the pending marker can't be cleared
+    with monkeypatch.context() as patch:
+        patch.setattr(archive_service, "_clear_pending", crash)
+        with pytest.raises(OSError):
+            await archive_service.archive_metrics(db_session, cutoff)
+
+    assert await archive_service.archive_metrics(db_session, cutoff) == 0
+    params = schemas.MetricQuery(
+        start_date=old_day - timedelta(hours=1), end_date=old_day + timedelta(hours=1)
+    )
+    [summary] = await archive_service.get_summary(project.id, params)
+    assert summary["request_count"] == 2
+
+
+async def test_late_row_is_archived_by_next_run(
+    db_session, project, archive_path, old_day
+):
+    from app import models
+    from app.services import archive_service
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=90)
+    [first_id, _] = (
+        await db_session.scalars(
+            select(models.Metric.id)
+            .where(models.Metric.timestamp < cutoff)
+            .order_by(models.Metric.id)
+        )
+    ).all()
+    assert await archive_service.archive_metrics(db_session, cutoff) == 2
+
+    # Committed after the run, with an id below the rows it moved
+    late = await create_metric(db_session, project=project, timestamp=old_day)
+    await db_session.execute(
+        update(models.Metric).where(models.Metric.id == late.id).values(id=first_id)
+    )
+    assert await archive_service.archive_metrics(db_session, cutoff) == 1
+
+    params = schemas.MetricQuery(
+        start_date=old_day - timedelta(hours=1), end_date=old_day + timedelta(hours=1)
+    )
+    [summary] = await archive_service.get_summary(project.id, params)
+    assert summary["request_count"] == 3
+
+
+async def test_archived_range_is_queryable(
+    client: AsyncClient, auth_headers, db_session, project, archive_path, old_day
+):
+    from app.services.metric_service import cleanup_old_metrics
+
+    await cleanup_old_metrics(db_session, retention_days=90)
+
+    params = {
+        "start_date": (old_day - timedelta(hours=1)).isoformat(),
+        "end_date": (old_day + timedelta(hours=1)).isoformat(),
+    }
+    base_url = f"/api/v1/projects/{project.project_key}/metrics"
+
+    response = await client.get(
+        f"{base_url}/summary", headers=auth_headers, params=params
+    )
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["request_count"] == 2
+    assert summary["error_count"] == 1
+    assert summary["avg_response_time_ms"] == 60.0
+    assert summary["slowest_request_ms"] == 80.0
+
+    response = await client.get(
+        f"{base_url}/endpoints", headers=auth_headers, params=params
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "url_path": "/orders",
+            "method": "POST",
+            "request_count": 2,
+            "avg_response_time_ms": 60.0,
+            "error_count": 1,
+            "error_rate": 50.0,
+            "slowest_request_ms": 80.0,
+            "fastest_request_ms": 40.0,
+        }
+    ]
+
+    response = await client.get(
+        f"{base_url}/time-series",
+        headers=auth_headers,
+        params={**params, "granularity": "hour"},
+    )
+    assert response.status_code == 200
+    points = response.json()
+    assert len(points) == 1
+    assert points[0]["request_count"] == 2
+    assert datetime.fromisoformat(points[0]["timestamp"]) == old_day
+
+
+async def test_archived_range_honours_filters(
+    client: AsyncClient, auth_headers, db_session, project, archive_path, old_day
+):
+    from app.services.metric_service import cleanup_old_metrics
+
+    await cleanup_old_metrics(db_session, retention_days=90)
+
+    params = {
+        "start_date": (old_day - timedelta(hours=1)).isoformat(),
+        "end_date": (old_day + timedelta(hours=1)).isoformat(),
+        "url_path": "/orders",
+        "status_class": "5xx",
+    }
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/summary",
+        headers=auth_headers,
+        params=params,
+    )
+    assert response.json()["request_count"] == 1
+
+    params["url_path"] = "/order"
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/summary",
+        headers=auth_headers,
+        params=params,
+    )
+    assert response.json()["request_count"] == 0
+
+
+async def test_archived_latency_histogram(
+    client: AsyncClient, auth_headers, db_session, project, archive_path, old_day
+):
+    from app.core import latency_buckets
+    from app.services.metric_service import cleanup_old_metrics
+
+    await cleanup_old_metrics(db_session, retention_days=90)
+
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/histogram",
+        headers=auth_headers,
+        params={
+            "start_date": (old_day - timedelta(hours=1)).isoformat(),
+            "end_date": (old_day + timedelta(hours=1)).isoformat(),
+        },
+    )
+    assert response.status_code == 200
+    assert [(b["bucket"], b["request_count"]) for b in response.json()] == sorted(
+        [
+            (latency_buckets.bucket_for(40_000), 1),
+            (latency_buckets.bucket_for(80_000), 1),
+        ]
+    )
@@ -1,3 +1,6 @@
+import asyncio
+import threading
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy import select
@@ -63,3 +66,66 @@ async def test_login_invalid_credentials(client: AsyncClient, test_user):
     )
     assert response.status_code == 401
     assert "Incorrect email or password" in response.json()["error"]
+
+
+async def test_register_weak_password(client: AsyncClient):
+    response = await client.post(
+        "/api/v1/auth/register",
+        json={"email": "weak@example.com", "password": "password"},
+    )
+    assert response.status_code == 422
+    [error] = response.json()["details"]
+    assert error["field"] == ["body", "password"]
+    assert "Password is too weak" in error["message"]
+
+
+async def test_password_hashing_runs_off_the_event_loop(
+    client: AsyncClient, test_user, monkeypatch
+):
+    from app.core import security
+
+    calls = []
+    verify_password = security.verify_password
+
+    def verify_in_pool(*args):
+        calls.append(threading.current_thread().name)
+        return verify_password(*args)
+
+    monkeypatch.setattr(security, "verify_password", verify_in_pool)
+
+    # Unknown users go through the same pool (dummy hash, constant time)
+    for email in (test_user.email, "nobody@example.com"):
+        response = await client.post(
+            "/api/v1/auth/login", json={"email": email, "password": "WrongPassword"}
+        )
+        assert response.status_code == 401
+    assert len(calls) == 2
+    assert all(name.startswith("password") for name in calls)
+
+
+async def test_saturated_password_pool_rejects_fast(
+    client: AsyncClient, test_user, monkeypatch
+):
+    from app.core import executor, security
+
+    pool = executor.BoundedExecutor("password", workers=1, queue_size=1)
+    monkeypatch.setattr(security, "password_executor", pool)
+    release = threading.Event()
+    monkeypatch.setattr(
+        security, "verify_password", lambda *args: (release.wait(5), None)
+    )
+
+    login = {"email": test_user.email, "password": "Password123!"}
+    blocked = [
+        asyncio.create_task(client.post("/api/v1/auth/login", json=login))
+        for _ in range(2)
+    ]
+    while pool.pending < 2:
+        await asyncio.sleep(0.01)
+
+    response = await client.post("/api/v1/auth/login", json=login)
+    assert response.status_code == 503
+
+    release.set()
+    assert [r.status_code for r in await asyncio.gather(*blocked)] == [200, 200]
+    assert pool.pending == 0
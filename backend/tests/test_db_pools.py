@@ -0,0 +1,108 @@
+import pytest
+from fastapi import Request
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import db
+from app.core.config import Settings
+from tests.factories import create_api_key
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_routes_use_their_pool(
+    client: AsyncClient, auth_headers, db_session, project
+):
+    from app.dependencies import get_db
+    from app.main import app
+
+    pools = []
+
+    async def override_get_db(request: Request):
+        pools.append(getattr(request.state, "db_pool", "default"))
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    _, plain_key = await create_api_key(db_session, project=project)
+
+    response = await client.post(
+        "/api/v1/track/",
+        headers={"X-API-Key": plain_key},
+        json={
+            "url_path": "/orders",
+            "method": "GET",
+            "response_status_code": 200,
+            "response_time_ms": 10.0,
+        },
+    )
+    assert response.status_code == 200
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/summary",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    response = await client.get("/api/v1/projects/", headers=auth_headers)
+    assert response.status_code == 200
+
+    # One session per request, shared by all its dependencies
+    assert pools == ["ingest", "analytics", "default"]
+
+
+async def test_pool_records_waits_and_timeouts(engine):
+    timed = create_async_engine(
+        engine.url,
+        poolclass=db.TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        async with timed.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(PoolTimeoutError):
+                async with timed.connect():
+                    pass
+        stats = timed.pool.stats
+        assert stats.checkouts == 2
+        assert stats.timeouts == 1
+        assert stats.wait_seconds_max >= 0.05
+    finally:
+        await timed.dispose()
+
+
+async def test_pool_timeout_is_503(client: AsyncClient, auth_headers):
+    from app.dependencies import get_db
+    from app.main import app
+
+    async def exhausted_get_db():
+        raise PoolTimeoutError("QueuePool limit reached")
+        yield
+
+    app.dependency_overrides[get_db] = exhausted_get_db
+    response = await client.get("/api/v1/projects/", headers=auth_headers)
+    assert response.status_code == 503
+
+
+async def test_pool_stats():
+    stats = db.pool_stats()
+    assert {"default", "ingest", "analytics"} <= stats.keys()
+    assert stats["analytics"]["size"] == 3
+    assert set(stats["ingest"]) == {
+        "size",
+        "checked_out",
+        "overflow",
+        "checkouts",
+        "timeouts",
+        "avg_wait_ms",
+        "max_wait_ms",
+    }
+
+
+async def test_default_pools_fit_four_workers():
+    pools = Settings.model_fields["DB_POOLS"].default.values()
+    per_worker = sum(pool.pool_size + pool.max_overflow for pool in pools)
+    # Dockerfile's 4 workers, under `max_connections=100` minus the 3
+    # superuser slots, with some left for migrations and admin sessions
+    assert 4 * per_worker <= 97 - 10
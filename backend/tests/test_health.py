@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.core import alerting, db, probes
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def prober(engine, monkeypatch):
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # The app's own engines don't point at the test database
+    monkeypatch.setattr(db, "ping", ping)
+    prober = probes.HealthProber()
+    monkeypatch.setattr(probes, "prober", prober)
+    monkeypatch.setattr("app.health.prober", prober)
+    await prober.check()
+    return prober
+
+
+async def test_health_reads_cached_probes(client: AsyncClient, prober, monkeypatch):
+    async def unreachable():
+        raise AssertionError("/health must not query the database")
+
+    monkeypatch.setattr(db, "ping", unreachable)
+    response = await client.get("/health")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "online"
+    assert body["database_probe"]["healthy"] is True
+
+    # The next probe sees the failure
+    await prober.check()
+    assert not prober.database.ok
+    response = await client.get("/health")
+    assert response.json()["database_status"] == "unhealthy"
+
+
+async def test_live(client: AsyncClient):
+    response = await client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+async def test_ready(client: AsyncClient, prober):
+    response = await client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["checks"] == {
+        "database": True,
+        "ingest_pool": True,
+        "default_pool": True,
+        "alert_queue": True,
+    }
+
+
+async def test_ready_without_redis(client: AsyncClient, prober):
+    # The rate limiter fails open: an unreachable Redis shows in /health only
+    prober.redis = probes.Probe(healthy=False)
+    response = await client.get("/health/ready")
+    assert response.status_code == 200
+    assert "redis" not in response.json()["checks"]
+
+    response = await client.get("/health")
+    assert response.json()["redis_probe"]["healthy"] is False
+
+
+async def test_not_ready_on_stale_probe(client: AsyncClient, prober):
+    prober.database.checked_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"] is False
+
+
+async def test_not_ready_on_exhausted_pool(client: AsyncClient, prober, monkeypatch):
+    monkeypatch.setattr(db, "pool_exhausted", lambda name: name == "ingest")
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["ingest_pool"] is False
+
+
+async def test_not_ready_on_saturated_alert_queue(
+    client: AsyncClient, prober, monkeypatch
+):
+    notifier = alerting.AlertNotifier(workers=1, queue_size=10)
+    monkeypatch.setattr(alerting.engine, "notifier", notifier)
+    for _ in range(9):
+        notifier.queue.put_nowait(None)
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["alert_queue"] is False
+
+
+async def test_pool_exhausted(engine):
+    assert not db.pool_exhausted("ingest")
+    # Unknown workloads use the default pool
+    assert not db.pool_exhausted("reports")
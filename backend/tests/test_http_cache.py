@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.core import http_cache
+from app.services import metric_service
+from tests.factories import create_metric
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_closed_range_is_immutable_and_revalidated(
+    client: AsyncClient, auth_headers, db_session, project, monkeypatch
+):
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    await create_metric(db_session, project=project, timestamp=yesterday)
+    url = f"/api/v1/projects/{project.project_key}/metrics/summary"
+    params = {
+        "start_date": (yesterday - timedelta(hours=1)).isoformat(),
+        "end_date": (yesterday + timedelta(hours=1)).isoformat(),
+    }
+
+    response = await client.get(url, headers=auth_headers, params=params)
+    assert response.status_code == 200
+    assert response.json()["request_count"] == 1
+    etag = response.headers["ETag"]
+    assert "immutable" in response.headers["Cache-Control"]
+    assert response.headers["Last-Modified"]
+
+    # Revalidation neither queries nor serializes
+    async def fail(*args, **kwargs):
+        raise AssertionError("summary recomputed")
+
+    monkeypatch.setattr(metric_service, "get_metrics_summary", fail)
+    response = await client.get(
+        url, headers={**auth_headers, "If-None-Match": etag}, params=params
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # New metrics after the end of the range don't change it
+    await create_metric(db_session, project=project)
+    response = await client.get(
+        url, headers={**auth_headers, "If-None-Match": f"W/{etag}"}, params=params
+    )
+    assert response.status_code == 304
+
+    # Other parameters are another resource
+    response = await client.get(
+        f"{url[: -len('summary')]}endpoints",
+        headers={**auth_headers, "If-None-Match": etag},
+        params=params,
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+async def test_open_range_changes_with_new_data(
+    client: AsyncClient, auth_headers, db_session, project
+):
+    url = f"/api/v1/projects/{project.project_key}/metrics/time-series"
+    await create_metric(db_session, project=project)
+
+    response = await client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    etag = response.headers["ETag"]
+
+    response = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    await create_metric(db_session, project=project)
+    response = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+async def test_if_modified_since():
+    last_modified = datetime(2026, 1, 31, 10, 0, tzinfo=timezone.utc)
+    validators = http_cache.Validators('"abc"', last_modified, immutable=True)
+
+    class FakeRequest:
+        def __init__(self, **headers):
+            self.headers = headers
+
+    assert http_cache.is_fresh(
+        FakeRequest(**{"If-Modified-Since": "Sat, 31 Jan 2026 10:00:00 GMT"}),
+        validators,
+    )
+    assert not http_cache.is_fresh(
+        FakeRequest(**{"If-Modified-Since": "Sat, 31 Jan 2026 09:59:59 GMT"}),
+        validators,
+    )
+    assert not http_cache.is_fresh(
+        FakeRequest(**{"If-Modified-Since": "bogus"}), validators
+    )
+    # If-None-Match takes precedence
+    assert not http_cache.is_fresh(
+        FakeRequest(
+            **{
+                "If-None-Match": '"other"',
+                "If-Modified-Since": "Sat, 31 Jan 2026 10:00:00 GMT",
+            }
+        ),
+        validators,
+    )
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.core import latency_buckets
+from tests.factories import create_metric
+
+
+def test_bucket_boundaries():
+    assert latency_buckets.bucket_for(0) == 0
+    assert latency_buckets.bucket_for(99) == 0
+    assert latency_buckets.bucket_for(100) == 1
+    assert latency_buckets.bucket_for(10**9) == latency_buckets.BUCKET_COUNT - 1
+
+    # Every bucket is ~19% wider than the previous one
+    for bucket in range(2, latency_buckets.BUCKET_COUNT - 1):
+        lower, upper = latency_buckets.bucket_range_ms(bucket)
+        assert upper / lower == pytest.approx(2**0.25, rel=0.01)
+        assert latency_buckets.bucket_for(round(lower * 1000)) == bucket
+
+    assert latency_buckets.bucket_range_ms(0) == (0.0, 0.1)
+    assert latency_buckets.bucket_range_ms(latency_buckets.BUCKET_COUNT - 1)[1] is None
+
+
+@pytest_asyncio.fixture
+async def latency_data(db_session, project):
+    base_time = datetime.now(timezone.utc).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    ) - timedelta(days=1)
+    for hour, response_time_ms in [(0, 10.0), (0, 10.5), (0, 250.0), (1, 10.0)]:
+        await create_metric(
+            db_session,
+            project=project,
+            response_time_ms=response_time_ms,
+            timestamp=base_time + timedelta(hours=hour, minutes=5),
+        )
+    return base_time
+
+
+@pytest.mark.asyncio
+async def test_latency_histogram(
+    client: AsyncClient, auth_headers, project, latency_data
+):
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/histogram",
+        headers=auth_headers,
+        params={"start_date": (latency_data - timedelta(hours=1)).isoformat()},
+    )
+    assert response.status_code == 200
+    buckets = response.json()
+    assert [b["request_count"] for b in buckets] == [3, 1]
+    assert buckets[0]["bucket"] == latency_buckets.bucket_for(10_000)
+    assert buckets[0]["lower_ms"] <= 10.0 < buckets[0]["upper_ms"]
+    assert buckets[1]["lower_ms"] <= 250.0 < buckets[1]["upper_ms"]
+
+
+@pytest.mark.asyncio
+async def test_latency_heatmap(
+    client: AsyncClient, auth_headers, project, latency_data
+):
+    url = f"/api/v1/projects/{project.project_key}/metrics/heatmap"
+    params = {"start_date": (latency_data - timedelta(hours=1)).isoformat()}
+    response = await client.get(url, headers=auth_headers, params=params)
+    assert response.status_code == 200
+    cells = response.json()
+    assert [
+        (datetime.fromisoformat(c["timestamp"]), c["request_count"]) for c in cells
+    ] == [
+        (latency_data, 2),
+        (latency_data, 1),
+        (latency_data + timedelta(hours=1), 1),
+    ]
+    assert cells[0]["bucket"] < cells[1]["bucket"]
+
+    response = await client.get(
+        url, headers=auth_headers, params=params | {"granularity": "day"}
+    )
+    assert sum(c["request_count"] for c in response.json()) == 4
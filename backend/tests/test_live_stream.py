@@ -0,0 +1,126 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.core import live_stream
+from tests.factories import create_api_key
+
+pytestmark = pytest.mark.asyncio
+
+NOW = datetime(2026, 1, 31, 10, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    # Keep the ticker out of the way, tests flush buckets explicitly
+    monkeypatch.setattr(live_stream, "TICK_SECONDS", 3600)
+    return live_stream.LiveStreamHub()
+
+
+def parse(message: str) -> dict:
+    event, data = message.strip().split("\n")
+    assert event == "event: metrics"
+    return json.loads(data.removeprefix("data: "))
+
+
+async def test_frame_is_computed_once_for_all_subscribers(hub):
+    async with hub.subscribe(1) as first, hub.subscribe(1) as second:
+        assert len(hub.streams) == 1
+        for response_time_us, status_code in ((10_000, 200), (30_000, 500)):
+            hub.record(1, response_time_us, status_code)
+        hub.record(2, 99_000, 200)  # no subscriber, ignored
+
+        hub.streams[1].flush(NOW)
+        message = first.get_nowait()
+        assert second.get_nowait() is message
+        assert parse(message) == {
+            "timestamp": "2026-01-31T10:00:00Z",
+            "request_count": 2,
+            "error_count": 1,
+            "avg_response_time_ms": 20.0,
+            "p95_response_time_ms": 29.0,
+        }
+
+        # Next second starts from an empty bucket
+        hub.streams[1].flush(NOW)
+        assert parse(first.get_nowait())["request_count"] == 0
+
+    assert hub.streams == {}
+
+
+async def test_slow_subscriber_drops_oldest_frames(hub):
+    async with hub.subscribe(1) as frames:
+        stream = hub.streams[1]
+        for _ in range(live_stream.SUBSCRIBER_QUEUE_SIZE):
+            stream.flush(NOW)
+        stream.record(5_000, 200)
+        stream.flush(NOW)
+
+        assert frames.qsize() == live_stream.SUBSCRIBER_QUEUE_SIZE
+        messages = [frames.get_nowait() for _ in range(frames.qsize())]
+        assert parse(messages[-1])["request_count"] == 1
+
+
+async def test_ticker_pushes_frames(monkeypatch):
+    monkeypatch.setattr(live_stream, "TICK_SECONDS", 0.05)
+    hub = live_stream.LiveStreamHub()
+    async with hub.subscribe(1) as frames:
+        task = hub.streams[1].task
+        hub.record(1, 1_000, 200)
+        frame = parse(await asyncio.wait_for(frames.get(), timeout=1))
+        assert frame["request_count"] == 1
+
+    await asyncio.sleep(0)
+    assert task.cancelled()
+
+
+async def test_frame_is_stamped_with_start_of_closed_second():
+    tick = NOW + timedelta(seconds=1, microseconds=300)
+    assert live_stream._closed_bucket_start(tick) == NOW
+
+
+async def test_tracked_metrics_reach_live_stream(
+    client: AsyncClient, db_session, project, hub, monkeypatch
+):
+    monkeypatch.setattr(live_stream, "hub", hub)
+    _, plain_key = await create_api_key(db_session, project=project)
+
+    async with hub.subscribe(project.id) as frames:
+        response = await client.post(
+            "/api/v1/track/",
+            headers={"X-API-Key": plain_key},
+            json={
+                "url_path": "/deploy",
+                "method": "GET",
+                "response_status_code": 502,
+                "response_time_ms": 12.5,
+            },
+        )
+        assert response.status_code == 200
+
+        hub.streams[project.id].flush(NOW)
+        frame = parse(frames.get_nowait())
+        assert frame["request_count"] == 1
+        assert frame["error_count"] == 1
+        assert frame["p95_response_time_ms"] == 12.5
+
+
+async def test_live_stream_unknown_project(client: AsyncClient, auth_headers):
+    response = await client.get(
+        "/api/v1/projects/missing/metrics/live", headers=auth_headers
+    )
+    assert response.status_code == 404
+
+
+async def test_live_stream_disabled_by_default(
+    client: AsyncClient, auth_headers, project
+):
+    # Per-worker aggregates would only cover part of the traffic
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/live", headers=auth_headers
+    )
+    assert response.status_code == 404
+    assert response.json()["error"] == "Live stream is not enabled"
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, timezone
+from http import HTTPMethod
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.live_window import LiveWindow, LiveWindowRegistry, from_us, to_us
+from tests.factories import create_api_key, create_metric
+
+MINUTE_US = 60_000_000
+
+
+@pytest.fixture
+def live_window_enabled(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LIVE_WINDOW_ENABLED", True)
+
+
+def test_window_summary_and_time_series():
+    window = LiveWindow(capacity=8, covered_since_us=0)
+    base = 1_000 * MINUTE_US
+    window.append(base, 10_000, 200, 1, HTTPMethod.GET)
+    window.append(base + 1, 30_000, 500, 1, HTTPMethod.GET)
+    window.append(base + MINUTE_US, 20_000, 200, 2, HTTPMethod.POST)
+
+    summary = window.summary(base, base + 2 * MINUTE_US)
+    assert summary == {
+        "request_count": 3,
+        "avg_response_time_ms": 20.0,
+        "error_count": 1,
+        "slowest_request_ms": 30.0,
+        "fastest_request_ms": 10.0,
+    }
+    assert window.summary(base + 2 * MINUTE_US, base + 3 * MINUTE_US) == {
+        "request_count": 0
+    }
+    assert window.percentiles(base, base + 2 * MINUTE_US, (50, 100)) == [20.0, 30.0]
+
+    points = window.time_series(base, base + 2 * MINUTE_US, "minute")
+    assert [point["timestamp"] for point in points] == [
+        from_us(base),
+        from_us(base + MINUTE_US),
+    ]
+    assert [point["request_count"] for point in points] == [2, 1]
+    assert [point["avg_response_time_ms"] for point in points] == [20.0, 20.0]
+    assert [point["error_count"] for point in points] == [1, 0]
+
+
+def test_window_wraparound_shrinks_coverage():
+    window = LiveWindow(capacity=2, covered_since_us=0)
+    for ts in (100, 200, 300):
+        window.append(ts, 1_000, 200, 1, HTTPMethod.GET)
+
+    assert len(window) == 2
+    assert window.summary(0, 1_000)["request_count"] == 2
+    assert window.covers(101)
+    assert not window.covers(100)
+
+
+def test_registry_falls_back_outside_window(live_window_enabled):
+    now = datetime.now(timezone.utc)
+    registry = LiveWindowRegistry()
+    registry.started_at_us = to_us(now - timedelta(hours=1))
+
+    # No metrics ingested yet: an empty window answers for the project
+    window = registry.lookup(1, now - timedelta(minutes=1))
+    assert window is not None and len(window) == 0
+
+    registry.record(1, now, 1_000, 200, 1, HTTPMethod.GET)
+    assert len(registry.lookup(1, now - timedelta(minutes=1))) == 1
+
+    # Older than LIVE_WINDOW_SECONDS: must go to SQL
+    assert registry.lookup(1, now - timedelta(minutes=30)) is None
+
+
+@pytest.mark.asyncio
+async def test_recent_summary_is_served_from_live_window(
+    client: AsyncClient,
+    auth_headers,
+    db_session,
+    project,
+    live_window_enabled,
+    monkeypatch,
+):
+    from app.core import live_window
+
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(
+        live_window.registry, "started_at_us", to_us(now - timedelta(hours=1))
+    )
+    _, plain_key = await create_api_key(db_session, project=project)
+
+    for status_code, response_time_ms in ((200, 10.0), (503, 30.0)):
+        response = await client.post(
+            "/api/v1/track/",
+            headers={"X-API-Key": plain_key},
+            json={
+                "url_path": "/live",
+                "method": "GET",
+                "response_status_code": status_code,
+                "response_time_ms": response_time_ms,
+            },
+        )
+        assert response.status_code == 200
+
+    # Written behind the window's back: only visible through SQL
+    await create_metric(db_session, project=project, url_path="/live")
+
+    params = {
+        "start_date": (now - timedelta(minutes=5)).isoformat(),
+        "end_date": (now + timedelta(minutes=1)).isoformat(),
+    }
+    base_url = f"/api/v1/projects/{project.project_key}/metrics"
+
+    response = await client.get(
+        f"{base_url}/summary", headers=auth_headers, params=params
+    )
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["request_count"] == 2
+    assert summary["error_count"] == 1
+    assert summary["avg_response_time_ms"] == 20.0
+
+    response = await client.get(
+        f"{base_url}/time-series", headers=auth_headers, params=params
+    )
+    assert response.status_code == 200
+    assert sum(point["request_count"] for point in response.json()) == 2
+
+    # A range starting before the window is answered by Postgres
+    params["start_date"] = (now - timedelta(hours=2)).isoformat()
+    response = await client.get(
+        f"{base_url}/summary", headers=auth_headers, params=params
+    )
+    assert response.json()["request_count"] == 3
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from tests.factories import create_metric
+
+pytestmark = pytest.mark.asyncio
+
+METRICS = [
+    ("/checkout", "GET", 200),
+    ("/checkout", "POST", 503),
+    ("/checkout/confirm", "POST", 500),
+    ("/checkouts", "GET", 404),
+    ("/users/1/orders", "GET", 200),
+    ("/users/2/orders", "GET", 500),
+    ("/users/2/profile", "GET", 200),
+]
+
+
+@pytest_asyncio.fixture
+async def filter_data(db_session, project):
+    base_time = datetime.now(timezone.utc).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+    for i, (url_path, method, status_code) in enumerate(METRICS):
+        await create_metric(
+            db_session,
+            project=project,
+            url_path=url_path,
+            method=method,
+            response_status_code=status_code,
+            timestamp=base_time + timedelta(minutes=i),
+        )
+    return f"/api/v1/projects/{project.project_key}/metrics"
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({"method": "POST"}, 2),
+        ({"status_code": 404}, 1),
+        ({"status_class": "5xx"}, 3),
+        ({"status_class": "2xx"}, 3),
+        ({"url_path": "/checkout"}, 3),
+        ({"url_path": "/checkout", "status_class": "5xx"}, 2),
+        ({"url_path": "/users/{id}/orders"}, 2),
+        ({"url_path": "/users/*/orders", "status_class": "5xx"}, 1),
+        ({"url_path": "/users/{id}/{section}"}, 3),
+        ({"url_path": "/"}, 7),
+    ],
+)
+async def test_summary_filters(
+    client: AsyncClient, auth_headers, filter_data, params, expected
+):
+    response = await client.get(
+        f"{filter_data}/summary", headers=auth_headers, params=params
+    )
+    assert response.status_code == 200
+    assert response.json()["request_count"] == expected
+
+
+async def test_filters_apply_to_every_query(
+    client: AsyncClient, auth_headers, filter_data
+):
+    params = {"url_path": "/checkout", "status_class": "5xx"}
+
+    response = await client.get(f"{filter_data}/", headers=auth_headers, params=params)
+    assert sorted(m["url_path"] for m in response.json()) == [
+        "/checkout",
+        "/checkout/confirm",
+    ]
+
+    response = await client.get(
+        f"{filter_data}/time-series", headers=auth_headers, params=params
+    )
+    assert sum(point["request_count"] for point in response.json()) == 2
+
+    response = await client.get(
+        f"{filter_data}/endpoints", headers=auth_headers, params=params
+    )
+    assert sorted((e["url_path"], e["method"]) for e in response.json()) == [
+        ("/checkout", "POST"),
+        ("/checkout/confirm", "POST"),
+    ]
+
+
+async def test_invalid_filters(client: AsyncClient, auth_headers, filter_data):
+    for params in ({"status_class": "6xx"}, {"status_code": 99}, {"url_path": "x"}):
+        response = await client.get(
+            f"{filter_data}/summary", headers=auth_headers, params=params
+        )
+        assert response.status_code == 422
+
+
+async def test_statements_are_built_once_per_shape(
+    client: AsyncClient, auth_headers, filter_data
+):
+    from app.services import metric_service
+
+    metric_service._summary_statement.cache_clear()
+    for params, expected in [
+        ({"url_path": "/checkout", "status_class": "5xx"}, 2),
+        ({"url_path": "/users", "status_class": "2xx"}, 2),
+        # LIKE wildcards in the path are matched literally
+        ({"url_path": "/check_ut", "status_class": "2xx"}, 0),
+    ]:
+        response = await client.get(
+            f"{filter_data}/summary", headers=auth_headers, params=params
+        )
+        assert response.json()["request_count"] == expected
+
+    cache = metric_service._summary_statement.cache_info()
+    assert (cache.misses, cache.hits) == (1, 2)
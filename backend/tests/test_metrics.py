@@ -154,3 +154,189 @@ async def test_metrics_pagination(client: AsyncClient, auth_headers, project_wit
     assert response.status_code == 200
     data = response.json()
     assert len(data) == 1
+
+
+async def test_list_metrics_rows(
+    client: AsyncClient, auth_headers, db_session, project
+):
+    timestamp = datetime(2026, 1, 31, 10, 0, tzinfo=timezone.utc)
+    await create_metric(
+        db_session,
+        project=project,
+        url_path="/orders",
+        method="POST",
+        response_status_code=201,
+        response_time_ms=45.3,
+        timestamp=timestamp,
+        user_agent="curl/8.0",
+        ip_hash="abc",
+    )
+    await create_metric(
+        db_session, project=project, timestamp=timestamp + timedelta(minutes=1)
+    )
+
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/",
+        headers=auth_headers,
+        params={
+            "start_date": timestamp.isoformat(),
+            "end_date": (timestamp + timedelta(hours=1)).isoformat(),
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    newest, oldest = response.json()
+    assert newest["user_agent"] is None
+    assert newest["url_path"] == "/"
+    assert oldest == {
+        "url_path": "/orders",
+        "method": "POST",
+        "response_status_code": 201,
+        "response_time_ms": 45.3,
+        "user_agent": "curl/8.0",
+        "id": oldest["id"],
+        "timestamp": "2026-01-31T10:00:00Z",
+        "ip_hash": "abc",
+    }
+
+
+async def test_summary_compare_to_previous_day(
+    client: AsyncClient, auth_headers, db_session, project_with_data
+):
+    base_time = datetime.now(timezone.utc).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+    await create_metric(
+        db_session,
+        project=project_with_data,
+        url_path="/users",
+        method="GET",
+        response_status_code=200,
+        response_time_ms=100.0,
+        timestamp=base_time - timedelta(days=1),
+    )
+
+    response = await client.get(
+        f"/api/v1/projects/{project_with_data.project_key}/metrics/summary",
+        headers=auth_headers,
+        params={
+            "start_date": base_time.isoformat(),
+            "end_date": (base_time + timedelta(hours=1)).isoformat(),
+            "compare_to": "previous_day",
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["request_count"] == 3
+
+    comparison = data["comparison"]
+    assert comparison["compare_to"] == "previous_day"
+    assert datetime.fromisoformat(comparison["start_date"]) == base_time - timedelta(
+        days=1
+    )
+    assert comparison["previous"]["request_count"] == 1
+    assert comparison["previous"]["error_rate"] == 0
+    assert comparison["delta"]["request_count"] == 2
+    assert comparison["delta"]["error_count"] == 1
+    assert comparison["delta"]["avg_response_time_ms"] == pytest.approx(133.33)
+
+
+async def test_compare_to_scans_only_the_periods(
+    client: AsyncClient, auth_headers, db_session, project_with_data
+):
+    from app import schemas
+    from app.services import metric_service
+
+    base_time = datetime.now(timezone.utc).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+    # Between yesterday's window and today's: in neither period
+    await create_metric(
+        db_session, project=project_with_data, timestamp=base_time - timedelta(hours=6)
+    )
+    params = schemas.MetricQuery(
+        start_date=base_time, end_date=base_time + timedelta(hours=1)
+    )
+
+    gap = metric_service._QueryShape.of(
+        [
+            params,
+            metric_service._comparison_params(params, schemas.CompareTo.PREVIOUS_DAY),
+        ]
+    )
+    sql = str(metric_service._summary_statement(gap))
+    assert not gap.contiguous
+    assert ":start" not in sql and " OR " in sql
+
+    adjacent = metric_service._QueryShape.of(
+        [
+            params,
+            metric_service._comparison_params(
+                params, schemas.CompareTo.PREVIOUS_PERIOD
+            ),
+        ]
+    )
+    assert adjacent.contiguous
+    assert ":start" in str(metric_service._summary_statement(adjacent))
+
+    response = await client.get(
+        f"/api/v1/projects/{project_with_data.project_key}/metrics/summary",
+        headers=auth_headers,
+        params={
+            "start_date": base_time.isoformat(),
+            "end_date": (base_time + timedelta(hours=1)).isoformat(),
+            "compare_to": "previous_day",
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["comparison"]["previous"]["request_count"] == 0
+
+
+async def test_endpoints_compare_to_previous_period(
+    client: AsyncClient, auth_headers, db_session, project_with_data
+):
+    base_time = datetime.now(timezone.utc).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+    await create_metric(
+        db_session,
+        project=project_with_data,
+        url_path="/users",
+        method="GET",
+        response_status_code=200,
+        response_time_ms=300.0,
+        timestamp=base_time - timedelta(minutes=30),
+    )
+
+    response = await client.get(
+        f"/api/v1/projects/{project_with_data.project_key}/metrics/endpoints",
+        headers=auth_headers,
+        params={
+            "start_date": base_time.isoformat(),
+            "end_date": (base_time + timedelta(minutes=59)).isoformat(),
+            "compare_to": "previous_period",
+        },
+    )
+    assert response.status_code == 200
+    data = {row["url_path"]: row for row in response.json()}
+    assert set(data) == {"/users", "/posts"}
+
+    users = data["/users"]["comparison"]
+    assert users["previous"]["request_count"] == 1
+    assert users["delta"]["request_count"] == 1
+    assert users["delta"]["avg_response_time_ms"] == -25.0
+    assert users["delta"]["error_rate"] == 50.0
+
+    posts = data["/posts"]["comparison"]
+    assert posts["previous"]["request_count"] == 0
+    assert posts["delta"]["request_count"] == 1
+
+
+async def test_compare_to_omitted_by_default(
+    client: AsyncClient, auth_headers, project_with_data
+):
+    response = await client.get(
+        f"/api/v1/projects/{project_with_data.project_key}/metrics/summary",
+        headers=auth_headers,
+    )
+    assert "comparison" not in response.json()
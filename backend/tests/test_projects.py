@@ -59,6 +59,42 @@ async def test_get_project_by_key(
     assert response.json()["name"] == "Single"
 
 
+async def test_project_and_user_resolved_in_one_query(
+    client: AsyncClient, auth_headers, test_user, db_session
+):
+    from sqlalchemy import event
+
+    from tests.factories import create_user
+
+    await create_project(
+        db_session, user=test_user, name="Single", project_key="single-key"
+    )
+    other_user = await create_user(db_session, email="other@example.com")
+    await create_project(
+        db_session, user=other_user, name="Other", project_key="other-key"
+    )
+    db_session.expunge_all()
+
+    statements = []
+    engine = db_session.bind.sync_engine
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = await client.get("/api/v1/projects/single-key", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+    # Another user's project is not found
+    response = await client.get("/api/v1/projects/other-key", headers=auth_headers)
+    assert response.status_code == 404
+    assert response.json()["error"] == "Project not found"
+
+
 async def test_update_project(client: AsyncClient, auth_headers, test_user, db_session):
     p = await create_project(
         db_session,
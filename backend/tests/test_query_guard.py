@@ -0,0 +1,82 @@
+import logging
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app import models
+from app.core import query_guard
+from app.core.config import settings
+from app.core.exceptions import APIError
+from tests.factories import create_metric
+
+
+@pytest.mark.asyncio
+async def test_queries_are_logged_with_their_cost(
+    db_session, project, monkeypatch, caplog
+):
+    monkeypatch.setattr(settings, "ANALYTICS_ROW_BUDGET", 1_000_000)
+    # Alembic's fileConfig() disables loggers created before the migrations ran
+    monkeypatch.setattr(query_guard.logger, "disabled", False)
+    await create_metric(db_session, project=project)
+
+    query = select(func.count(models.Metric.id)).where(
+        models.Metric.project_id == project.id
+    )
+    with caplog.at_level(logging.INFO, logger=query_guard.logger.name):
+        result = await query_guard.execute(db_session, query, "summary")
+    assert result.scalar_one() == 1
+
+    [record] = caplog.records
+    assert record.message == "Analytics query: summary"
+    assert record.query == "summary"
+    assert record.estimated_rows >= 1
+    assert record.estimated_cost > 0
+    assert record.duration_ms >= 0
+
+
+@pytest.mark.asyncio
+async def test_queries_above_row_budget_are_rejected(
+    client: AsyncClient, auth_headers, db_session, project, monkeypatch
+):
+    monkeypatch.setattr(settings, "ANALYTICS_ROW_BUDGET", 0)
+    await create_metric(db_session, project=project)
+
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/summary",
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+    details = response.json()["details"]
+    assert details["row_budget"] == 0
+    assert details["estimated_rows"] >= 1
+    assert "Use accuracy=approximate" in details["suggestions"]
+
+
+@pytest.mark.asyncio
+async def test_statement_timeout(db_session, monkeypatch):
+    monkeypatch.setitem(settings.ANALYTICS_STATEMENT_TIMEOUTS_MS, "summary", 10)
+
+    with pytest.raises(APIError) as exc_info:
+        await query_guard.execute(db_session, select(func.pg_sleep(1)), "summary")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.details["timeout_ms"] == 10
+
+
+def test_scanned_rows_sums_metric_scans():
+    plan = {
+        "Node Type": "Hash Join",
+        "Plan Rows": 10,
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "url_paths", "Plan Rows": 50},
+            {
+                "Node Type": "Append",
+                "Plan Rows": 300,
+                "Plans": [
+                    {"Relation Name": "metrics", "Plan Rows": 100},
+                    {"Relation Name": "metrics", "Plan Rows": 200},
+                ],
+            },
+        ],
+    }
+    assert query_guard._scanned_rows(plan) == 300
@@ -0,0 +1,166 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app import models, schemas
+from app.core import quotas
+from app.core.config import settings
+from app.core.exceptions import APIError
+from app.services import project_service, usage_service
+from tests.factories import create_api_key
+
+pytestmark = pytest.mark.asyncio
+
+METRIC = {
+    "url_path": "/orders",
+    "method": "GET",
+    "response_status_code": 200,
+    "response_time_ms": 10.0,
+}
+
+
+async def test_usage_counters():
+    counters = quotas.UsageCounters()
+    january, february = date(2026, 1, 1), date(2026, 2, 1)
+    counters.used(1, january)
+
+    counters.count(1, january)
+    counters.count(1, january, 2)
+    counters.count(2, january)
+    assert counters.used(1, january) == 3
+
+    pending = counters.drain()
+    assert pending == {(1, january): 3, (2, january): 1}
+    assert counters.used(1, january) == 0
+    counters.restore(pending)
+    assert counters.used(1, january) == 3
+
+    # Totals read back from the database replace what was flushed
+    counters.drain()
+    counters.update_totals({(1, january): 10})
+    counters.count(1, january)
+    assert counters.used(1, january) == 11
+
+    # A new month starts from zero
+    assert counters.used(1, february) == 0
+    assert quotas.period_end(date(2026, 12, 1)) == datetime(
+        2027, 1, 1, tzinfo=timezone.utc
+    )
+
+
+async def test_flush_usage(db_session, project):
+    period = quotas.current_period()
+    quotas.usage.count(project.id, period, 3)
+    # Deleted since
+    quotas.usage.count(project.id + 1000, period, 5)
+    await usage_service.flush_usage(db_session)
+
+    quotas.usage.count(project.id, period, 2)
+    await usage_service.flush_usage(db_session)
+
+    stmt = select(models.ProjectUsage.metric_count).where(
+        models.ProjectUsage.project_id == project.id
+    )
+    assert (await db_session.execute(stmt)).scalar_one() == 5
+    assert quotas.usage.used(project.id, period) == 5
+
+
+async def test_track_quota(client: AsyncClient, auth_headers, db_session, project):
+    project.metric_quota_soft = 1
+    project.metric_quota_hard = 2
+    await db_session.flush()
+    _, plain_key = await create_api_key(db_session, project=project)
+    headers = {"X-API-Key": plain_key}
+
+    response = await client.post("/api/v1/track/", headers=headers, json=METRIC)
+    assert response.status_code == 200
+    assert response.headers["X-Quota-Limit"] == "2"
+    assert response.headers["X-Quota-Remaining"] == "2"
+    assert "X-Quota-Warning" not in response.headers
+
+    response = await client.post("/api/v1/track/", headers=headers, json=METRIC)
+    assert response.status_code == 200
+    assert response.headers["X-Quota-Remaining"] == "1"
+    assert "X-Quota-Warning" in response.headers
+
+    response = await client.post("/api/v1/track/", headers=headers, json=METRIC)
+    assert response.status_code == 429
+    assert response.json()["error"] == "Monthly metric quota exceeded"
+    reset_at = quotas.period_end(quotas.current_period())
+    assert response.headers["X-Quota-Reset"] == str(int(reset_at.timestamp()))
+    assert int(response.headers["Retry-After"]) > 0
+
+    # Flushed and unflushed counts are both reported
+    await usage_service.flush_usage(db_session)
+    quotas.usage.count(project.id, quotas.current_period())
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/usage/", headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "period_start": quotas.current_period().isoformat(),
+        "reset_at": reset_at.isoformat().replace("+00:00", "Z"),
+        "metric_count": 3,
+        "soft_limit": 1,
+        "hard_limit": 2,
+    }
+
+
+async def test_owner_cannot_update_project_quota(
+    client: AsyncClient, auth_headers, db_session, project
+):
+    project.metric_quota_hard = 10
+    await db_session.commit()
+
+    response = await client.patch(
+        f"/api/v1/projects/{project.project_key}",
+        headers=auth_headers,
+        json={"metric_quota_soft": None, "metric_quota_hard": None},
+    )
+    assert response.status_code == 200
+    assert response.json()["metric_quota_hard"] == 10
+
+
+async def test_set_project_quota(client: AsyncClient, db_session, project):
+    limits = schemas.ProjectLimits(metric_quota_soft=1, metric_quota_hard=1)
+    await project_service.set_project_limits(project.project_key, limits, db_session)
+
+    _, plain_key = await create_api_key(db_session, project=project)
+    headers = {"X-API-Key": plain_key}
+    statuses = []
+    for _ in range(2):
+        response = await client.post("/api/v1/track/", headers=headers, json=METRIC)
+        statuses.append(response.status_code)
+    assert statuses == [200, 429]
+
+    # Back to the defaults (no quota)
+    limits = schemas.ProjectLimits(metric_quota_soft=None, metric_quota_hard=None)
+    project = await project_service.set_project_limits(
+        project.project_key, limits, db_session
+    )
+    assert project.metric_quota_hard is None
+    response = await client.post("/api/v1/track/", headers=headers, json=METRIC)
+    assert response.status_code == 200
+
+    with pytest.raises(ValidationError):
+        schemas.ProjectLimits(metric_quota_hard=0)
+
+
+async def test_soft_quota_above_hard_is_rejected(db_session, project, monkeypatch):
+    limits = schemas.ProjectLimits(metric_quota_soft=10, metric_quota_hard=5)
+    with pytest.raises(APIError, match="Soft quota is above the hard quota"):
+        await project_service.set_project_limits(
+            project.project_key, limits, db_session
+        )
+
+    # Against the default hard quota too
+    monkeypatch.setattr(settings, "METRIC_QUOTA_HARD", 5)
+    limits = schemas.ProjectLimits(metric_quota_soft=10)
+    with pytest.raises(APIError, match="Soft quota is above the hard quota"):
+        await project_service.set_project_limits(
+            project.project_key, limits, db_session
+        )
+    assert project.metric_quota_soft is None
@@ -0,0 +1,172 @@
+import os
+
+import pytest
+from httpx import AsyncClient
+from pydantic import ValidationError
+
+from app import schemas
+from app.core import rate_limiter
+from app.core.exceptions import APIError
+from app.core.rate_limiter import Limit, MemoryBuckets, RateLimiter, RedisBuckets
+from app.services import project_service
+from tests.factories import create_api_key
+
+pytestmark = pytest.mark.asyncio
+
+
+class CountingBuckets(MemoryBuckets):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def take(self, key, limit):
+        self.calls += 1
+        return await super().take(key, limit)
+
+
+async def test_bucket_allows_burst_then_refills(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock[0])
+    limiter = RateLimiter(MemoryBuckets(), local_keys=10)
+    limit = Limit(per_second=2, burst=3)
+
+    decisions = [await limiter.acquire("a", limit) for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[2].remaining == 0
+    assert decisions[3].retry_after == pytest.approx(0.5)
+
+    # Buckets are per key
+    assert (await limiter.acquire("b", limit)).allowed
+
+    clock[0] += 0.5
+    assert (await limiter.acquire("a", limit)).allowed
+    assert not (await limiter.acquire("a", limit)).allowed
+
+
+async def test_local_precheck_skips_store(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock[0])
+    store = CountingBuckets()
+    limiter = RateLimiter(store, local_keys=10)
+    limit = Limit(per_second=1, burst=1)
+
+    assert (await limiter.acquire("a", limit)).allowed
+    for _ in range(5):
+        assert not (await limiter.acquire("a", limit)).allowed
+    assert store.calls == 1
+
+    # Once the mirror has refilled, the store decides again
+    clock[0] += 1
+    assert (await limiter.acquire("a", limit)).allowed
+    assert store.calls == 2
+
+
+async def test_track_uses_project_limit(client: AsyncClient, db_session, project):
+    project.track_rate_limit_per_second = 0.5
+    project.track_rate_limit_burst = 2
+    await db_session.flush()
+    _, plain_key = await create_api_key(db_session, project=project)
+    metric = {
+        "url_path": "/orders",
+        "method": "GET",
+        "response_status_code": 200,
+        "response_time_ms": 10.0,
+    }
+
+    for remaining in ["1", "0"]:
+        response = await client.post(
+            "/api/v1/track/", headers={"X-API-Key": plain_key}, json=metric
+        )
+        assert response.status_code == 200
+        assert response.headers["X-RateLimit-Limit"] == "2"
+        assert response.headers["X-RateLimit-Remaining"] == remaining
+
+    response = await client.post(
+        "/api/v1/track/", headers={"X-API-Key": plain_key}, json=metric
+    )
+    assert response.status_code == 429
+    assert response.json()["error"] == "Rate limit exceeded"
+    assert response.headers["Retry-After"] == "2"
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+
+
+async def test_owner_cannot_update_project_limit(
+    client: AsyncClient, auth_headers, project
+):
+    response = await client.patch(
+        f"/api/v1/projects/{project.project_key}",
+        headers=auth_headers,
+        json={"track_rate_limit_per_second": 1000, "track_rate_limit_burst": 1000},
+    )
+    assert response.status_code == 200
+    assert response.json()["track_rate_limit_per_second"] is None
+    assert response.json()["track_rate_limit_burst"] is None
+
+
+async def test_set_project_limits(client: AsyncClient, db_session, project):
+    limits = schemas.ProjectLimits(
+        track_rate_limit_per_second=0.5, track_rate_limit_burst=1
+    )
+    await project_service.set_project_limits(project.project_key, limits, db_session)
+
+    _, plain_key = await create_api_key(db_session, project=project)
+    metric = {
+        "url_path": "/orders",
+        "method": "GET",
+        "response_status_code": 200,
+        "response_time_ms": 10.0,
+    }
+    statuses = []
+    for _ in range(2):
+        response = await client.post(
+            "/api/v1/track/", headers={"X-API-Key": plain_key}, json=metric
+        )
+        statuses.append(response.status_code)
+    assert statuses == [200, 429]
+
+    # Back to the defaults, only for the overrides given
+    limits = schemas.ProjectLimits(track_rate_limit_burst=None)
+    project = await project_service.set_project_limits(
+        project.project_key, limits, db_session
+    )
+    assert project.track_rate_limit_burst is None
+    assert project.track_rate_limit_per_second == 0.5
+
+    with pytest.raises(APIError, match="Project not found"):
+        await project_service.set_project_limits("missing", limits, db_session)
+    with pytest.raises(ValidationError):
+        schemas.ProjectLimits(track_rate_limit_per_second=0)
+
+
+async def test_track_limit_defaults(project, monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "TRACK_RATE_LIMIT_PER_SECOND", 7.0)
+    monkeypatch.setattr(rate_limiter.settings, "TRACK_RATE_LIMIT_BURST", 9)
+    assert rate_limiter.track_limit(project) == Limit(7.0, 9)
+
+    project.track_rate_limit_burst = 20
+    assert rate_limiter.track_limit(project) == Limit(7.0, 20)
+
+
+async def test_redis_unavailable_fails_open():
+    limiter = RateLimiter(RedisBuckets("redis://localhost:1"), local_keys=10)
+    try:
+        decision = await limiter.acquire("a", Limit(per_second=1, burst=1))
+    finally:
+        await limiter.store.close()
+    assert decision.allowed
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_REDIS_URL"), reason="TEST_REDIS_URL is not set"
+)
+async def test_redis_bucket():
+    store = RedisBuckets(os.environ["TEST_REDIS_URL"])
+    key = f"test:{os.urandom(4).hex()}"
+    limit = Limit(per_second=0.1, burst=2)
+    try:
+        results = [await store.take(key, limit) for _ in range(3)]
+    finally:
+        await store.client.delete(key)
+        await store.close()
+    assert [allowed for allowed, _ in results] == [True, True, False]
+    assert results[1][1] == pytest.approx(0, abs=0.01)
@@ -0,0 +1,244 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.core import query_guard
+from app.core.config import settings
+from app.services import rollup_service
+from tests.factories import create_metric
+
+pytestmark = pytest.mark.asyncio
+
+MINUTE = schemas.TimeGranularity.MINUTE
+HOUR = schemas.TimeGranularity.HOUR
+DAY = schemas.TimeGranularity.DAY
+
+
+def at(day: int, hour: int = 0, minute: int = 0) -> datetime:
+    return datetime(2026, 1, day, hour, minute, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def old_traffic(db_session, project):
+    """Metrics three days ago, to be rolled up, and a raw tail from right now."""
+    base_time = datetime.now(timezone.utc).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    ) - timedelta(days=3)
+    for i in range(6):
+        await create_metric(
+            db_session,
+            project=project,
+            url_path="/orders" if i % 2 else "/users",
+            method="POST" if i % 2 else "GET",
+            response_status_code=500 if i == 0 else 200,
+            response_time_ms=10.0 * (i + 1),
+            timestamp=base_time + timedelta(minutes=25 * i),
+        )
+    await create_metric(db_session, project=project, url_path="/orders")
+    now = datetime.now(timezone.utc)
+    return {
+        "start_date": (now - timedelta(days=10)).isoformat(),
+        "end_date": (now + timedelta(minutes=1)).isoformat(),
+    }
+
+
+async def test_split_uses_coarsest_covering_level():
+    levels = [
+        (DAY, at(1), at(10)),
+        (HOUR, at(1), at(10, 6)),
+        (MINUTE, at(1), at(10, 6, 30)),
+    ]
+    segments = rollup_service.split(at(2, 10, 15), at(10, 8), levels)
+
+    assert segments == [
+        rollup_service.Segment(MINUTE, at(2, 10, 15), at(2, 11)),
+        rollup_service.Segment(HOUR, at(2, 11), at(3)),
+        rollup_service.Segment(DAY, at(3), at(10)),
+        rollup_service.Segment(HOUR, at(10), at(10, 6)),
+        rollup_service.Segment(MINUTE, at(10, 6), at(10, 6, 30)),
+        rollup_service.Segment(None, at(10, 6, 30), at(10, 8)),
+    ]
+    # Without any rollups everything is raw
+    assert rollup_service.split(at(2), at(3), []) == [
+        rollup_service.Segment(None, at(2), at(3))
+    ]
+
+
+async def test_long_ranges_are_aligned(monkeypatch):
+    # Without rollups ranges keep the raw 60 day cap
+    with pytest.raises(ValidationError, match="60 days or less"):
+        schemas.MetricParams(start_date=at(1), end_date=at(1) + timedelta(days=61))
+
+    monkeypatch.setattr(settings, "ROLLUPS_ENABLED", True)
+    params = schemas.MetricParams(
+        start_date=at(1, 10, 15), end_date=at(1, 10, 15) + timedelta(days=90)
+    )
+    assert params.resolution == HOUR
+    assert params.start_date == at(1, 10)
+    assert params.end_date == at(1, 11) + timedelta(days=90, microseconds=-1)
+
+    params = schemas.MetricParams(
+        start_date=at(1, 10), end_date=at(1) + timedelta(days=900)
+    )
+    assert params.resolution == DAY
+    assert params.start_date == at(1)
+
+    with pytest.raises(ValidationError):
+        schemas.MetricParams(start_date=at(1), end_date=at(1) + timedelta(days=2000))
+
+
+async def test_refresh_rollups_levels(db_session, old_traffic):
+    now = datetime.now(timezone.utc)
+    await rollup_service.refresh_rollups(db_session, now)
+
+    coverage = await rollup_service.get_coverage(db_session)
+    assert set(coverage) == {MINUTE, HOUR, DAY}
+    settled = now - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    assert coverage[DAY][1] == DAY.floor(settled)
+    assert coverage[HOUR][1] == HOUR.floor(settled)
+    assert coverage[MINUTE][1] == MINUTE.floor(settled)
+
+    # Refreshing again is a no-op
+    await rollup_service.refresh_rollups(db_session, now)
+    assert await rollup_service.get_coverage(db_session) == coverage
+
+
+async def test_one_worker_refreshes_at_a_time(engine):
+    async with AsyncSession(engine) as first, AsyncSession(engine) as second:
+        assert await rollup_service.try_lock(first)
+        assert not await rollup_service.try_lock(second)
+        await first.rollback()
+        await second.rollback()
+        assert await rollup_service.try_lock(second)
+
+
+async def test_rolled_up_metrics_match_raw(
+    client: AsyncClient, auth_headers, db_session, project, old_traffic, monkeypatch
+):
+    base_url = f"/api/v1/projects/{project.project_key}/metrics"
+    queries = [
+        ("summary", old_traffic),
+        ("summary", {**old_traffic, "status_class": "5xx"}),
+        ("time-series", {**old_traffic, "granularity": "hour"}),
+        ("endpoints", {**old_traffic, "method": "POST"}),
+    ]
+
+    async def fetch():
+        responses = []
+        for path, params in queries:
+            response = await client.get(
+                f"{base_url}/{path}", headers=auth_headers, params=params
+            )
+            assert response.status_code == 200
+            responses.append(response.json())
+        return responses
+
+    raw = await fetch()
+    await rollup_service.refresh_rollups(db_session)
+    monkeypatch.setattr(settings, "ROLLUPS_ENABLED", True)
+
+    params = schemas.MetricParams.model_validate(old_traffic)
+    segments, raw_periods = await rollup_service.plan(db_session, params)
+    assert {segment.granularity for segment in segments} >= {DAY}
+    assert raw_periods
+
+    rolled_up = await fetch()
+    assert _approx_equal(rolled_up, raw), (rolled_up, raw)
+
+
+async def test_compare_to_reads_each_source_once(
+    client: AsyncClient, auth_headers, db_session, project, old_traffic, monkeypatch
+):
+    base_url = f"/api/v1/projects/{project.project_key}/metrics"
+    params = {**old_traffic, "compare_to": "previous_period"}
+
+    async def fetch():
+        responses = []
+        for path in ("summary", "endpoints"):
+            response = await client.get(
+                f"{base_url}/{path}", headers=auth_headers, params=params
+            )
+            assert response.status_code == 200
+            responses.append(response.json())
+        # Endpoints come in no particular order
+        responses[1].sort(key=lambda row: (row["url_path"], row["method"]))
+        return responses
+
+    raw = await fetch()
+    await rollup_service.refresh_rollups(db_session)
+    monkeypatch.setattr(settings, "ROLLUPS_ENABLED", True)
+
+    executed = []
+    execute = query_guard.execute
+
+    async def recording_execute(session, query, name, params=None):
+        executed.append(name)
+        return await execute(session, query, name, params)
+
+    monkeypatch.setattr(query_guard, "execute", recording_execute)
+    rolled_up = await fetch()
+    assert _approx_equal(rolled_up, raw), (rolled_up, raw)
+    # Raw edges of both periods, then their rollups
+    assert executed == ["summary", "summary", "endpoints", "endpoints"]
+
+
+async def test_over_budget_time_series_suggests_rolled_up_granularity(
+    client: AsyncClient, auth_headers, db_session, project, old_traffic, monkeypatch
+):
+    await rollup_service.refresh_rollups(db_session)
+    monkeypatch.setattr(settings, "ROLLUPS_ENABLED", True)
+    monkeypatch.setattr(settings, "ANALYTICS_ROW_BUDGET", 0)
+    # Minutes are only kept for the last day: the rest would be read raw
+    monkeypatch.setattr(settings, "ROLLUP_MINUTE_RETENTION_DAYS", 1)
+
+    now = datetime.now(timezone.utc)
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/time-series",
+        headers=auth_headers,
+        params={
+            "start_date": (now - timedelta(days=2)).isoformat(),
+            "end_date": now.isoformat(),
+            "granularity": "minute",
+        },
+    )
+    assert response.status_code == 422
+    details = response.json()["details"]
+    assert details["finest"] == "hour"
+    assert details["suggestions"][0] == "Use 'hour' or a coarser granularity"
+
+
+async def test_granularity_finer_than_resolution(
+    client: AsyncClient, auth_headers, project, monkeypatch
+):
+    monkeypatch.setattr(settings, "ROLLUPS_ENABLED", True)
+    now = datetime.now(timezone.utc)
+    response = await client.get(
+        f"/api/v1/projects/{project.project_key}/metrics/time-series",
+        headers=auth_headers,
+        params={
+            "start_date": (now - timedelta(days=100)).isoformat(),
+            "end_date": now.isoformat(),
+            "granularity": "minute",
+        },
+    )
+    assert response.status_code == 422
+    assert response.json()["details"]["finest"] == "hour"
+
+
+def _approx_equal(actual, expected) -> bool:
+    if isinstance(expected, dict):
+        return actual.keys() == expected.keys() and all(
+            _approx_equal(actual[k], v) for k, v in expected.items()
+        )
+    if isinstance(expected, list):
+        return len(actual) == len(expected) and all(
+            map(_approx_equal, actual, expected)
+        )
+    if isinstance(expected, float):
+        return actual == pytest.approx(expected)
+    return actual == expected
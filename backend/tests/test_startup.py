@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+# Only needed on first use, not to boot a worker
+DEFERRED_MODULES = ["zxcvbn", "pwdlib", "argon2"]
+
+
+def test_heavy_modules_are_imported_on_first_use():
+    code = (
+        "import sys, app.main; "
+        f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_password_hashing_imports_lazily():
+    from app.core import security
+
+    hashed = security.hash_password("correct horse battery staple")
+    assert security.verify_password("correct horse battery staple", hashed)[0]
+    assert security.get_password_hash() is security.get_password_hash()
@@ -87,3 +87,39 @@ async def test_track_metric_missing_key(client: AsyncClient):
     )
     assert response.status_code == 401
     assert "API key required" in response.json()["error"]
+
+
+async def test_track_metric_reuses_dimension_rows(
+    client: AsyncClient, db_session, api_key_and_project
+):
+    from app import models
+
+    plain_key, project = api_key_and_project
+
+    for status_code in (200, 500):
+        response = await client.post(
+            "/api/v1/track/",
+            headers={"X-API-Key": plain_key},
+            json={
+                "url_path": "/api/v1/orders",
+                "method": "POST",
+                "response_status_code": status_code,
+                "response_time_ms": 10,
+                "user_agent": "Shared Agent",
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["user_agent"] == "Shared Agent"
+
+    result = await db_session.execute(
+        select(models.Metric).where(models.Metric.project_id == project.id)
+    )
+    metrics = result.scalars().all()
+    assert len(metrics) == 2
+    assert metrics[0].url_path_id == metrics[1].url_path_id
+    assert metrics[0].user_agent_id == metrics[1].user_agent_id
+
+    paths = await db_session.execute(
+        select(models.URLPath).where(models.URLPath.value == "/api/v1/orders")
+    )
+    assert len(paths.scalars().all()) == 1